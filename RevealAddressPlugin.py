@@ -1,106 +1,243 @@
-from qgis.core import (QgsNetworkAccessManager, QgsPointXY,
-                       QgsCoordinateTransform, QgsCoordinateReferenceSystem,
-                       Qgis, QgsSettings)
+from qgis.core import (QgsPointXY, QgsCoordinateReferenceSystem,
+                       Qgis, QgsSettings, QgsApplication, QgsVectorLayer,
+                       QgsProject)
 from qgis.gui import QgsMapToolEmitPoint
-from qgis.PyQt.QtWidgets import (QMessageBox, QAction, QToolBar, QDialog)
-from qgis.PyQt.QtNetwork import QNetworkRequest, QNetworkReply
-from qgis.PyQt.QtCore import QUrl, QCoreApplication
+from qgis.PyQt.QtWidgets import (QAction, QToolBar, QDialog, QFileDialog,
+                                 QToolTip)
+from qgis.PyQt.QtCore import QCoreApplication, Qt, QTimer, pyqtSignal
 from qgis.PyQt.QtGui import QIcon
-import json
+from functools import partial
 import os
+import sqlite3
+import time
 from .utils import QgsTools
-from .constants import EPSG
+from .constants import (EPSG, CACHE_DIR_NAME, CACHE_FILE_NAME,
+                        DEFAULT_CACHE_PRECISION, DEFAULT_CACHE_TTL,
+                        DEFAULT_CACHE_MAX_ENTRIES, DEFAULT_CACHE_RADIUS,
+                        SETTINGS_CACHE_PRECISION, SETTINGS_CACHE_TTL,
+                        SETTINGS_CACHE_MAX_ENTRIES, SETTINGS_CACHE_RADIUS,
+                        BACKEND_NOMINATIM, BACKEND_LOCAL,
+                        DEFAULT_LOCAL_MAX_DISTANCE, SETTINGS_BACKEND,
+                        SETTINGS_LOCAL_DATASET, SETTINGS_LOCAL_MAX_DISTANCE,
+                        DEFAULT_REQUEST_RATE, DEFAULT_REQUEST_BURST,
+                        SETTINGS_REQUEST_RATE, SETTINGS_REQUEST_BURST,
+                        DEFAULT_HOVER_DELAY, SETTINGS_HOVER_PREVIEW,
+                        SETTINGS_HOVER_DELAY, DEFAULT_ADDRESS_FIELD,
+                        SETTINGS_ADDRESS_FIELD, DEFAULT_PREFETCH_GRID,
+                        DEFAULT_PREFETCH_MAX_SCALE, SETTINGS_PREFETCH,
+                        SETTINGS_PREFETCH_GRID, SETTINGS_PREFETCH_MAX_SCALE,
+                        FEED_INIT_DELAY, DEFAULT_SAMPLE_SPACING,
+                        SETTINGS_SAMPLE_SPACING, MAX_LINE_SAMPLES,
+                        MIN_LAT, MAX_LAT, MIN_LON, MAX_LON,
+                        OUTSIDE_REGIONS_REJECT, DEFAULT_OUTSIDE_REGIONS,
+                        REGION_GRID_RESOLUTION, SETTINGS_REGIONS_FILE,
+                        SETTINGS_OUTSIDE_REGIONS, SETTINGS_HISTORY_LAYER,
+                        DEFAULT_HEDGE_PERCENTILE, SETTINGS_HEDGE_PERCENTILE,
+                        SETTINGS_SHARED_CACHE, SETTINGS_SELECTION_RECORD_FIELDS)
+from .geocoders import (NominatimBackend, LocalAddressBackend, RoutingBackend,
+                        HedgedBackend)
+from .regions import Region, loadRegions
+from .endpoint import NominatimEndpoint
+from .settings_dialog import RevealAddressSettingsDialog
+from .request_scheduler import RequestScheduler
+from .results_dock import AddressResultsDock
+from .search_widget import AddressSearchWidget
+from .transforms import TransformCache, transformPoints
+from .selection_task import (ReverseGeocodeSelectionTask, selectionOutputFields,
+                             addLayerFields, SELECTION_RECORD_FIELDS)
+from .prefetch import ExtentPrefetcher
+from .line_tool import RevealAddressLineTool, AlongLineLookup
+from .line_results_dock import LineResultsDock
+from .sampling import samplePolyline
+from .address_cache import AddressCache
+from .expression_function import AddressExpressionResolver
+from .history_layer import AddressHistoryLayer, historyRecords, setHistoryLabels
+from .processing_provider import RevealAddressProvider
+from .telemetry import (Telemetry, STAGE_TRANSFORM, STAGE_CACHE, STAGE_RENDER,
+                        STAGE_STARTUP, STAGE_FEED, COUNTER_CACHE_HIT,
+                        COUNTER_CACHE_MISS)
+from .telemetry_dock import TelemetryDock
 
 """Wersja wtyczki"""
 from . import PLUGIN_NAME as plugin_name
 from . import PLUGIN_VERSION as plugin_version
 
 class RevealAddressMapTool(QgsMapToolEmitPoint):
-    def __init__(self, canvas):
+    # punkt w układzie mapy, układ mapy, AddressRecord
+    addressRevealed = pyqtSignal(object, object, object)
+
+    def __init__(self, canvas, cache=None, cache_radius=0, backend=None,
+                 telemetry=None):
         self.canvas = canvas
+        self.cache = cache
+        self.cache_radius = cache_radius
+        self.telemetry = telemetry or Telemetry()
+        self.backend = backend or NominatimBackend(RequestScheduler(telemetry=self.telemetry))
         QgsMapToolEmitPoint.__init__(self, self.canvas)
-        self.coord_transform = QgsCoordinateTransform(canvas.mapSettings().destinationCrs(),
-            QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
-            canvas.mapSettings().transformContext()
+        self.transform_cache = TransformCache(canvas.mapSettings().transformContext())
+        self.coord_transform = None
+        self.updateTransform()
+        self.canvas.destinationCrsChanged.connect(self.updateTransform)
+        self.canvas.transformContextChanged.connect(self.updateTransform)
+
+        self.hover_enabled = False
+        self.hover_pos = None
+        self.hover_handle = None
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(DEFAULT_HOVER_DELAY)
+        self.hover_timer.timeout.connect(self.revealHoverAddress)
+
+    def updateTransform(self):
+        """
+        Odtwarza transformacje po zmianie układu lub kontekstu transformacji mapy
+        """
+        self.transform_cache.clear(self.canvas.mapSettings().transformContext())
+        self.coord_transform = self.transform_cache.transform(
+            self.canvas.mapSettings().destinationCrs(),
+            QgsCoordinateReferenceSystem.fromEpsgId(EPSG)
         )
-        self.nam = QgsNetworkAccessManager.instance()
+
+    def transformPoints(self, points, source_crs=None):
+        """
+        Transformuje listę punktów (domyślnie w układzie mapy) do EPSG:4326
+        """
+        if source_crs is None:
+            coord_transform = self.coord_transform
+        else:
+            coord_transform = self.transform_cache.transform(source_crs)
+        return transformPoints(coord_transform, points)
+
+    def setHoverEnabled(self, enabled, delay=DEFAULT_HOVER_DELAY):
+        self.hover_enabled = enabled
+        self.hover_timer.setInterval(delay)
+        if not enabled:
+            self.cancelHover()
+
+    def cancelHover(self):
+        self.hover_timer.stop()
+        if self.hover_handle is not None:
+            self.backend.cancel(self.hover_handle)
+            self.hover_handle = None
+
+    def canvasMoveEvent(self, event):
+        if not self.hover_enabled:
+            return
+        # kursor się przesunął - poprzednie zapytanie jest nieaktualne
+        self.cancelHover()
+        QToolTip.hideText()
+        self.hover_pos = event.pos()
+        self.hover_timer.start()
+
+    def revealHoverAddress(self):
+        pos = self.hover_pos
+        point_4326 = self.coord_transform.transform(self.toMapCoordinates(pos))
+        lat, lon = point_4326.y(), point_4326.x()
+
+        if self.cache is not None and self.backend.cacheable:
+            address = self.cache.nearest(lat, lon, self.cache_radius)
+            if address is not None:
+                self.showHoverAddress(pos, address)
+                return
+
+        self.hover_handle = self.backend.reverse(
+            lat, lon, partial(self.handleHoverResult, pos, lat, lon))
+
+    def handleHoverResult(self, pos, lat, lon, address, error):
+        self.hover_handle = None
+        if error is not None:
+            return
+        if self.cache is not None and self.backend.cacheable:
+            self.cache.put(lat, lon, address)
+        if pos == self.hover_pos:
+            self.showHoverAddress(pos, address)
+
+    def showHoverAddress(self, pos, address):
+        QToolTip.showText(
+            self.canvas.mapToGlobal(pos), address.text(), self.canvas)
+
+    def deactivate(self):
+        self.cancelHover()
+        QgsMapToolEmitPoint.deactivate(self)
 
     def canvasReleaseEvent(self, event):
         click_coords = self.toMapCoordinates(event.pos())
-        click_coords_4326 = self.coord_transform.transform(click_coords)
+        with self.telemetry.measure(STAGE_TRANSFORM):
+            click_coords_4326 = self.coord_transform.transform(click_coords)
         QgsTools.pushLogInfo(
             f"Kliknięto na mapie: {click_coords} "
             f"(EPSG:{EPSG}: {click_coords_4326})"
         )
-        url = (f"https://nominatim.openstreetmap.org/reverse?format=json"
-               f"&lat={click_coords_4326.y()}&lon={click_coords_4326.x()}"
-        )
-        QgsTools.pushLogInfo(f"Wysyłanie zapytania: {url}")
-        req = QNetworkRequest(QUrl(url))          
-        reply = self.nam.get(req)
-        result = reply.finished.connect(self.handleResult)
-
-        if result:
-            self.canvas.unsetMapTool(self)
-
-    def handleResult(self):
-        reply = self.sender()
-        err = reply.error()
-        try:
-            no_error = QNetworkReply.NetworkError.NoError
-        except AttributeError:
-            no_error = QNetworkReply.NoError
-
-        if err != no_error:
-            msg = f"Request error: {err}"
-            QgsTools.pushLogCritical(msg)
+        lat, lon = click_coords_4326.y(), click_coords_4326.x()
+        crs = self.canvas.mapSettings().destinationCrs()
+
+        if self.cache is not None and self.backend.cacheable:
+            with self.telemetry.measure(STAGE_CACHE):
+                address = self.cache.nearest(lat, lon, self.cache_radius)
+            self.telemetry.increment(
+                COUNTER_CACHE_MISS if address is None else COUNTER_CACHE_HIT)
+            if address is not None:
+                QgsTools.pushLogInfo("Adres odczytany z pamięci podręcznej.")
+                self.showAddress(click_coords, crs, address)
+                return
+
+        self.backend.reverse(
+            lat, lon, partial(self.handleResult, click_coords, crs, lat, lon))
+
+    def handleResult(self, point, crs, lat, lon, address, error):
+        if error is not None:
+            QgsTools.pushLogCritical(error)
             return
-        
-        QgsTools.pushLogInfo("Otrzymano odpowiedź z serwera Nominatim.")
-        
-        address_json = json.loads(str(reply.readAll(), 'utf-8'))
-
-        if "display_name" in address_json:
-            address = address_json["display_name"]
-        else:
-            address = "No address found"
 
-        QgsTools.pushLogInfo(f"Zdekodowany adres: {address}")
+        if self.cache is not None and self.backend.cacheable:
+            self.cache.put(lat, lon, address)
 
-        QMessageBox.information(None, "Address", address)
+        self.showAddress(point, crs, address)
 
         return True
 
+    def showAddress(self, point, crs, address):
+        QgsTools.pushLogInfo(f"Zdekodowany adres: {address.text()}")
+
+        with self.telemetry.measure(STAGE_RENDER):
+            self.addressRevealed.emit(point, crs, address)
+
 
 class RevealAddressPlugin:
     def __init__(self, iface, test_mode=False):
+        # konstruktor wywoływany jest przy starcie QGIS - ciężkie operacje
+        # (QgisFeed) wykonywane są dopiero po załadowaniu interfejsu
+        started = time.perf_counter()
         self.map_tool = None
+        self.feed = None
+        self.feed_timer = None
         self.action = None
+        self.provider = None
+        self.cache = None
+        self.backend = None
+        self.regions = None
+        self.history = None
+        self.history_action = None
+        self.expression_resolver = None
+        self.scheduler = None
+        self.fallback_schedulers = {}
+        self.endpoint = None
+        self.results_dock = None
+        self.line_tools = {}
+        self.line_lookup = None
+        self.line_results_dock = None
+        self.local_action = None
+        self.hover_action = None
+        self.search_widget = None
+        self.selection_task = None
+        self.prefetcher = None
+        self.prefetch_action = None
+        self.transform_cache = TransformCache()
+        self.telemetry = Telemetry()
+        self.telemetry_dock = None
         self.settings = QgsSettings()
         self.test_mode = test_mode
         
-        if not self.test_mode:
-            if Qgis.QGIS_VERSION_INT >= 31000:
-                try:
-                    from .qgis_feed import QgisFeed, QgisFeedDialog
-                    from . import PLUGIN_NAME
-                    self.selected_industry = self.settings.value("selected_industry", None)
-                    show_dialog = self.settings.value("showDialog", True, type=bool)
-
-                    if self.selected_industry is None and show_dialog:
-                        self.showBranchSelectionDialog()
-
-                    select_indust_session = self.settings.value('selected_industry')
-
-                    self.feed = QgisFeed(selected_industry=select_indust_session, 
-                                         plugin_name=PLUGIN_NAME)
-                    self.feed.initFeed()
-                except ImportError:
-                    QgsTools.pushLogWarning(
-                        "Pominięto ładowanie QgisFeed "
-                        "(ImportError lub Test Mode)"
-                    )
-                    
         self.iface = iface
         self.plugin_dir = os.path.dirname(__file__)
         self.icon_path = os.path.join(self.plugin_dir, 'icons', 'icon.svg')
@@ -114,6 +251,7 @@ class RevealAddressPlugin:
             
         self.shortcut = None
         self.first_start = None
+        self.startup_time = time.perf_counter() - started
 
     def addAction(
                 self,
@@ -163,8 +301,26 @@ class RevealAddressPlugin:
         """
         return QCoreApplication.translate('RevealAddressPlugin', message)
     
+    def initProcessing(self):
+        """Register the Processing provider with batch algorithms."""
+        self.provider = RevealAddressProvider(self.requestScheduler)
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
+    def initExpressions(self):
+        """Register the reveal_address() expression function."""
+        self.expression_resolver = AddressExpressionResolver(
+            self.addressCache,
+            self.geocoderBackend,
+            self.settings.value(SETTINGS_CACHE_RADIUS, DEFAULT_CACHE_RADIUS, type=float)
+        )
+        self.expression_resolver.valuesChanged.connect(self.iface.mapCanvas().refreshAllLayers)
+        self.expression_resolver.register()
+
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
+        started = time.perf_counter()
+        self.initProcessing()
+        self.initExpressions()
 
         self.addAction(
             self.icon_path,
@@ -173,13 +329,576 @@ class RevealAddressPlugin:
             parent=self.iface.mainWindow()
         )
 
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Reveal addresses of selected features'),
+            callback=self.revealSelected,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Reveal addresses along a line'),
+            callback=self.runLineTool,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Reveal addresses along a polygon boundary'),
+            callback=self.runPolygonTool,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.search_widget = AddressSearchWidget(
+            self.iface.mapCanvas(), self.requestScheduler(), self.nominatimEndpoint(),
+            parent=self.toolbar)
+        self.toolbar.addWidget(self.search_widget)
+
+        self.local_action = self.addAction(
+            self.icon_path,
+            text=self.tr(u'Use offline address dataset'),
+            callback=self.toggleLocalBackend,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+        self.local_action.setCheckable(True)
+        self.local_action.setChecked(
+            self.settings.value(SETTINGS_BACKEND, BACKEND_NOMINATIM) == BACKEND_LOCAL)
+
+        self.hover_action = self.addAction(
+            self.icon_path,
+            text=self.tr(u'Preview address under cursor'),
+            callback=self.toggleHoverPreview,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+        self.hover_action.setCheckable(True)
+        self.hover_action.setChecked(
+            self.settings.value(SETTINGS_HOVER_PREVIEW, False, type=bool))
+
+        self.prefetch_action = self.addAction(
+            self.icon_path,
+            text=self.tr(u'Prefetch addresses for visible extent'),
+            callback=self.togglePrefetch,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+        self.prefetch_action.setCheckable(True)
+        if self.settings.value(SETTINGS_PREFETCH, False, type=bool):
+            self.prefetch_action.setChecked(True)
+            self.togglePrefetch(True)
+
+        self.history_action = self.addAction(
+            self.icon_path,
+            text=self.tr(u'Record lookups in a history layer'),
+            callback=self.toggleHistoryLayer,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+        self.history_action.setCheckable(True)
+        self.history_action.setChecked(
+            self.settings.value(SETTINGS_HISTORY_LAYER, True, type=bool))
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Save address history…'),
+            callback=self.saveHistory,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Load address history…'),
+            callback=self.loadHistory,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Export address cache…'),
+            callback=self.exportCache,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Import address cache…'),
+            callback=self.importCache,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Lookup statistics'),
+            callback=self.showTelemetry,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
+        self.addAction(
+            self.icon_path,
+            text=self.tr(u'Settings…'),
+            callback=self.showSettings,
+            add_to_toolbar=False,
+            parent=self.iface.mainWindow()
+        )
+
         self.first_start = True
 
+        self.startup_time += time.perf_counter() - started
+        self.telemetry.record(STAGE_STARTUP, self.startup_time)
+        QgsTools.pushLogInfo(
+            f"Czas uruchamiania wtyczki: {self.startup_time * 1000:.1f} ms")
+        if not self.test_mode and Qgis.QGIS_VERSION_INT >= 31000:
+            self.feed_timer = QTimer()
+            self.feed_timer.setSingleShot(True)
+            self.feed_timer.timeout.connect(self.initFeed)
+            self.feed_timer.start(FEED_INIT_DELAY)
+
+    def initFeed(self):
+        """Set up QgisFeed once QGIS has finished starting."""
+        if self.feed is not None:
+            return
+        started = time.perf_counter()
+        try:
+            from .qgis_feed import QgisFeed
+            from . import PLUGIN_NAME
+        except ImportError:
+            QgsTools.pushLogWarning(
+                "Pominięto ładowanie QgisFeed "
+                "(ImportError lub Test Mode)"
+            )
+            return
+
+        self.selected_industry = self.settings.value("selected_industry", None)
+        show_dialog = self.settings.value("showDialog", True, type=bool)
+
+        if self.selected_industry is None and show_dialog:
+            self.showBranchSelectionDialog()
+            # czas oczekiwania na wybór użytkownika nie jest wliczany
+            started = time.perf_counter()
+
+        select_indust_session = self.settings.value('selected_industry')
+
+        self.feed = QgisFeed(selected_industry=select_indust_session,
+                             plugin_name=PLUGIN_NAME)
+        self.feed.initFeed()
+        elapsed = time.perf_counter() - started
+        self.telemetry.record(STAGE_FEED, elapsed)
+        QgsTools.pushLogInfo(f"Zainicjowano QgisFeed w {elapsed * 1000:.1f} ms")
+
+    def addressCache(self):
+        """Open the persistent address cache on first use."""
+        if self.cache is None:
+            path = os.path.join(
+                QgsApplication.qgisSettingsDirPath(), CACHE_DIR_NAME, CACHE_FILE_NAME)
+            self.cache = AddressCache(
+                path,
+                precision=self.settings.value(
+                    SETTINGS_CACHE_PRECISION, DEFAULT_CACHE_PRECISION, type=int),
+                ttl=self.settings.value(
+                    SETTINGS_CACHE_TTL, DEFAULT_CACHE_TTL, type=int),
+                max_entries=self.settings.value(
+                    SETTINGS_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_ENTRIES, type=int)
+            )
+            self.attachSharedCache()
+        return self.cache
+
+    def attachSharedCache(self):
+        """Consult the shared read-only cache file set in the settings, if any."""
+        path = self.settings.value(SETTINGS_SHARED_CACHE, '')
+        try:
+            self.cache.setShared(path or None)
+        except ValueError as e:
+            QgsTools.pushLogWarning(str(e))
+            return
+        if path:
+            QgsTools.pushLogInfo(
+                f"Wspólna pamięć podręczna {path}: {len(self.cache.shared)} adresów")
+
+    def exportCache(self):
+        """Write the address cache to a single file that can be shared."""
+        path, _ = QFileDialog.getSaveFileName(
+            self.iface.mainWindow(),
+            self.tr(u'Export address cache'),
+            'address_cache_export.sqlite',
+            self.tr(u'Address cache (*.sqlite)')
+        )
+        if not path:
+            return
+        if os.path.abspath(path) == os.path.abspath(self.addressCache().path):
+            QgsTools(self.iface).pushWarning(self.tr(u'Choose a file other than the cache itself.'))
+            return
+        try:
+            count = self.addressCache().export(path)
+        except (OSError, sqlite3.Error) as e:
+            QgsTools.pushLogCritical(f"Nie można wyeksportować pamięci podręcznej: {e}")
+            return
+        QgsTools.pushLogInfo(f"Wyeksportowano {count} adresów do {path}")
+
+    def importCache(self):
+        """Merge an exported cache file into the local address cache."""
+        path, _ = QFileDialog.getOpenFileName(
+            self.iface.mainWindow(),
+            self.tr(u'Import address cache'),
+            '',
+            self.tr(u'Address cache (*.sqlite);;All files (*)')
+        )
+        if not path:
+            return
+        try:
+            count = self.addressCache().importFile(path)
+        except ValueError as e:
+            QgsTools.pushLogCritical(str(e))
+            return
+        QgsTools.pushLogInfo(f"Zaimportowano {count} adresów z {path}")
+
+    def geocoderBackend(self):
+        """Create the geocoder backend selected in the settings."""
+        if self.backend is None:
+            dataset = self.settings.value(SETTINGS_LOCAL_DATASET, '')
+            reject = self.settings.value(
+                SETTINGS_OUTSIDE_REGIONS, DEFAULT_OUTSIDE_REGIONS) == OUTSIDE_REGIONS_REJECT
+            remote = self.remoteBackend()
+            if self.settings.value(SETTINGS_BACKEND, BACKEND_NOMINATIM) == BACKEND_LOCAL \
+                    and dataset:
+                local = LocalAddressBackend(
+                    dataset,
+                    self.settings.value(
+                        SETTINGS_LOCAL_MAX_DISTANCE, DEFAULT_LOCAL_MAX_DISTANCE, type=float),
+                    index_dir=os.path.join(QgsApplication.qgisSettingsDirPath(), CACHE_DIR_NAME)
+                )
+                self.backend = RoutingBackend(
+                    self.supportedRegions(), local, None if reject else remote)
+            elif reject:
+                self.backend = RoutingBackend(self.supportedRegions(), remote)
+            else:
+                self.backend = remote
+        return self.backend
+
+    def remoteBackend(self):
+        """Create the Nominatim backend, hedged across the fallback servers if any."""
+        endpoints = self.nominatimEndpoint().endpoints()
+        backends = [NominatimBackend(self.requestScheduler(), endpoints[0])]
+        for endpoint in endpoints[1:]:
+            backends.append(NominatimBackend(self.requestScheduler(endpoint.base_url), endpoint))
+        if len(backends) == 1:
+            return backends[0]
+        return HedgedBackend(
+            backends,
+            self.settings.value(
+                SETTINGS_HEDGE_PERCENTILE, DEFAULT_HEDGE_PERCENTILE, type=float),
+            self.telemetry
+        )
+
+    def supportedRegions(self):
+        """Load the region polygons used to route lookups (Poland by default)."""
+        if self.regions is None:
+            path = self.settings.value(SETTINGS_REGIONS_FILE, '')
+            if path:
+                try:
+                    self.regions = loadRegions(path, REGION_GRID_RESOLUTION)
+                    QgsTools.pushLogInfo(f"Wczytano {len(self.regions)} regionów z {path}")
+                except (OSError, ValueError) as e:
+                    QgsTools.pushLogWarning(f"Nie można wczytać regionów {path}: {e}")
+            if self.regions is None:
+                self.regions = [Region.fromBounds('Polska', MIN_LAT, MAX_LAT, MIN_LON, MAX_LON)]
+        return self.regions
+
+    def nominatimEndpoint(self):
+        """Return the Nominatim server configuration stored in the settings."""
+        if self.endpoint is None:
+            self.endpoint = NominatimEndpoint.fromSettings(self.settings)
+        return self.endpoint
+
+    def resetBackend(self):
+        """Recreate the backend and hand it to the tools that use it."""
+        self.backend = None
+        self.regions = None
+        if self.map_tool is not None:
+            self.map_tool.cancelHover()
+            self.map_tool.backend = self.geocoderBackend()
+        if self.prefetcher is not None:
+            self.prefetcher.setBackend(self.geocoderBackend())
+        if self.line_lookup is not None:
+            self.line_lookup.setBackend(self.geocoderBackend())
+        if self.expression_resolver is not None:
+            self.expression_resolver.resetBackend()
+
+    def requestScheduler(self, fallback_url=None):
+        """Return the scheduler shared by every request sent to the server.
+
+        Each fallback server gets its own scheduler, so its rate limit is
+        independent and its requests are not coalesced with the primary ones.
+        """
+        if fallback_url is not None:
+            scheduler = self.fallback_schedulers.get(fallback_url)
+            if scheduler is None:
+                scheduler = self.fallback_schedulers[fallback_url] = self.createScheduler()
+            return scheduler
+        if self.scheduler is None:
+            self.scheduler = self.createScheduler()
+        return self.scheduler
+
+    def createScheduler(self):
+        return RequestScheduler(
+            rate=self.settings.value(
+                SETTINGS_REQUEST_RATE, DEFAULT_REQUEST_RATE, type=float),
+            burst=self.settings.value(
+                SETTINGS_REQUEST_BURST, DEFAULT_REQUEST_BURST, type=int),
+            telemetry=self.telemetry
+        )
+
+    def toggleLocalBackend(self, checked):
+        """Switch between Nominatim and the offline address dataset."""
+        if checked:
+            dataset = self.settings.value(SETTINGS_LOCAL_DATASET, '')
+            if not dataset or not os.path.exists(dataset):
+                dataset, _ = QFileDialog.getOpenFileName(
+                    self.iface.mainWindow(),
+                    self.tr(u'Select address points dataset'),
+                    '',
+                    self.tr(u'Address points (*.gpkg *.rai);;All files (*)')
+                )
+                if not dataset:
+                    self.local_action.setChecked(False)
+                    return
+                self.settings.setValue(SETTINGS_LOCAL_DATASET, dataset)
+        self.settings.setValue(
+            SETTINGS_BACKEND, BACKEND_LOCAL if checked else BACKEND_NOMINATIM)
+        self.resetBackend()
+
+    def showSettings(self):
+        """Edit the server endpoint, request headers and rate limit."""
+        dialog = RevealAddressSettingsDialog(self.settings, self.iface.mainWindow())
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        self.endpoint = None
+        if self.cache is not None:
+            self.attachSharedCache()
+        if self.search_widget is not None:
+            self.search_widget.cancelSearch()
+            self.search_widget.endpoint = self.nominatimEndpoint()
+        self.resetBackend()
+        schedulers = list(self.fallback_schedulers.values())
+        if self.scheduler is not None:
+            schedulers.append(self.scheduler)
+        for scheduler in schedulers:
+            scheduler.setRate(
+                self.settings.value(SETTINGS_REQUEST_RATE, DEFAULT_REQUEST_RATE, type=float),
+                self.settings.value(SETTINGS_REQUEST_BURST, DEFAULT_REQUEST_BURST, type=int))
+
+    def resultsDock(self):
+        """Create the dock with the lookup history on first use."""
+        if self.results_dock is None:
+            self.results_dock = AddressResultsDock(
+                self.iface.mapCanvas(), self.iface.mainWindow())
+            self.iface.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.results_dock)
+        return self.results_dock
+
+    def showTelemetry(self):
+        """Show the dock with lookup timings and cache statistics."""
+        if self.telemetry_dock is None:
+            self.telemetry_dock = TelemetryDock(self.telemetry, self.iface.mainWindow())
+            self.iface.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.telemetry_dock)
+        self.telemetry_dock.show()
+        self.telemetry_dock.raise_()
+
+    def lineResultsDock(self):
+        """Create the table of addresses along a drawn line on first use."""
+        if self.line_results_dock is None:
+            self.line_results_dock = LineResultsDock(self.iface.mainWindow())
+            self.iface.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.line_results_dock)
+        return self.line_results_dock
+
+    def runLineTool(self):
+        self.activateLineTool(closed=False)
+
+    def runPolygonTool(self):
+        self.activateLineTool(closed=True)
+
+    def activateLineTool(self, closed):
+        """Activate the tool drawing a line (or polygon) to sample addresses along."""
+        tool = self.line_tools.get(closed)
+        if tool is None:
+            tool = self.line_tools[closed] = RevealAddressLineTool(self.iface.mapCanvas(), closed)
+            tool.geometryDrawn.connect(self.revealAlongLine)
+        self.iface.mapCanvas().setMapTool(tool)
+
+    def revealAlongLine(self, points, closed):
+        """Sample the drawn geometry and resolve the samples in order."""
+        map_settings = self.iface.mapCanvas().mapSettings()
+        self.transform_cache.setTransformContext(map_settings.transformContext())
+        coord_transform = self.transform_cache.transform(map_settings.destinationCrs())
+        vertices = [(point.y(), point.x()) for point in transformPoints(coord_transform, points)]
+        samples = samplePolyline(
+            vertices,
+            self.settings.value(SETTINGS_SAMPLE_SPACING, DEFAULT_SAMPLE_SPACING, type=float),
+            closed,
+            MAX_LINE_SAMPLES + 1
+        )
+        if len(samples) > MAX_LINE_SAMPLES:
+            QgsTools(self.iface).pushWarning(
+                self.tr(u'The line is too long; only the first {} points will be resolved.')
+                .format(MAX_LINE_SAMPLES))
+            samples = samples[:MAX_LINE_SAMPLES]
+
+        if self.line_lookup is None:
+            self.line_lookup = AlongLineLookup(
+                self.geocoderBackend(),
+                self.lineResultsDock(),
+                self.addressCache(),
+                self.settings.value(SETTINGS_CACHE_RADIUS, DEFAULT_CACHE_RADIUS, type=float)
+            )
+            self.line_results_dock.cancelRequested.connect(self.line_lookup.cancel)
+        self.line_lookup.start(samples)
+
+    def revealSelected(self):
+        """Resolve addresses of the selected features in a background task."""
+        tools = QgsTools(self.iface)
+        layer = self.iface.activeLayer()
+        if not isinstance(layer, QgsVectorLayer) or layer.selectedFeatureCount() == 0:
+            tools.pushWarning(self.tr(u'Select features on a vector layer first.'))
+            return
+        if self.selection_task is not None:
+            tools.pushWarning(self.tr(u'Addresses of selected features are already being resolved.'))
+            return
+
+        field_name = self.settings.value(SETTINGS_ADDRESS_FIELD, DEFAULT_ADDRESS_FIELD)
+        record_fields = self.settings.value(SETTINGS_SELECTION_RECORD_FIELDS, False, type=bool)
+        names = addLayerFields(layer, selectionOutputFields(field_name, record_fields))
+        if names is None:
+            tools.pushCritical(
+                self.tr(u'Cannot add field "{}" to layer {}.').format(field_name, layer.name()))
+            return
+        record_columns = {name: names[column] for name, column in SELECTION_RECORD_FIELDS.items()} \
+            if record_fields else None
+
+        self.selection_task = ReverseGeocodeSelectionTask(
+            layer,
+            names[field_name],
+            record_columns=record_columns,
+            cache_path=self.addressCache().path,
+            cache_options=self.addressCache().options(),
+            cache_radius=self.settings.value(
+                SETTINGS_CACHE_RADIUS, DEFAULT_CACHE_RADIUS, type=float),
+            shared_cache_path=self.settings.value(SETTINGS_SHARED_CACHE, '') or None,
+            endpoint=self.nominatimEndpoint(),
+            limit=self.requestScheduler().limit
+        )
+        self.selection_task.taskCompleted.connect(self.onSelectionTaskDone)
+        self.selection_task.taskTerminated.connect(self.onSelectionTaskDone)
+        QgsApplication.taskManager().addTask(self.selection_task)
+
+    def onSelectionTaskDone(self):
+        self.selection_task = None
+        # zadanie zapisywało wyniki przez własne połączenie
+        if self.cache is not None:
+            self.cache.reload()
+
+    def togglePrefetch(self, checked):
+        """Start or stop filling the cache for the visible map extent."""
+        self.settings.setValue(SETTINGS_PREFETCH, checked)
+        if checked and self.prefetcher is None:
+            self.prefetcher = ExtentPrefetcher(
+                self.iface.mapCanvas(),
+                self.addressCache(),
+                self.geocoderBackend(),
+                cache_radius=self.settings.value(
+                    SETTINGS_CACHE_RADIUS, DEFAULT_CACHE_RADIUS, type=float),
+                grid_size=self.settings.value(
+                    SETTINGS_PREFETCH_GRID, DEFAULT_PREFETCH_GRID, type=int),
+                max_scale=self.settings.value(
+                    SETTINGS_PREFETCH_MAX_SCALE, DEFAULT_PREFETCH_MAX_SCALE, type=float)
+            )
+            self.prefetcher.start()
+        elif not checked and self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher.deleteLater()
+            self.prefetcher = None
+
+    def historyLayer(self):
+        """Return the layer collecting lookup results, created on first use."""
+        if self.history is None:
+            self.history = AddressHistoryLayer()
+        return self.history
+
+    def recordHistory(self, point, crs, address):
+        if self.settings.value(SETTINGS_HISTORY_LAYER, True, type=bool):
+            self.historyLayer().addResult(point, crs, address)
+
+    def toggleHistoryLayer(self, checked):
+        """Enable or disable recording lookup results in the history layer."""
+        self.settings.setValue(SETTINGS_HISTORY_LAYER, checked)
+
+    def saveHistory(self):
+        """Save the history layer to a GeoPackage file."""
+        path, _ = QFileDialog.getSaveFileName(
+            self.iface.mainWindow(),
+            self.tr(u'Save address history'),
+            'address_history.gpkg',
+            self.tr(u'GeoPackage (*.gpkg)')
+        )
+        if not path:
+            return
+        error = self.historyLayer().saveToGeoPackage(path)
+        if error is not None:
+            QgsTools(self.iface).pushWarning(error)
+
+    def loadHistory(self):
+        """Add a saved history to the project and seed the address cache with it."""
+        path, _ = QFileDialog.getOpenFileName(
+            self.iface.mainWindow(),
+            self.tr(u'Load address history'),
+            '',
+            self.tr(u'GeoPackage (*.gpkg);;All files (*)')
+        )
+        if not path:
+            return
+        layer = QgsVectorLayer(path, os.path.splitext(os.path.basename(path))[0], 'ogr')
+        if not layer.isValid():
+            QgsTools.pushLogCritical(f"Nie można wczytać historii adresów: {path}")
+            return
+        cache = self.addressCache()
+        before = len(cache)
+        cache.putMany(historyRecords(layer))
+        QgsTools.pushLogInfo(
+            f"Dodano {len(cache) - before} adresów z {path} do pamięci podręcznej")
+        setHistoryLabels(layer)
+        QgsProject.instance().addMapLayer(layer)
+
+    def toggleHoverPreview(self, checked):
+        self.settings.setValue(SETTINGS_HOVER_PREVIEW, checked)
+        if self.map_tool is not None:
+            self.map_tool.setHoverEnabled(
+                checked,
+                self.settings.value(SETTINGS_HOVER_DELAY, DEFAULT_HOVER_DELAY, type=int))
+
     def run(self):
-        self.map_tool = RevealAddressMapTool(self.iface.mapCanvas())
+        if self.map_tool is None:
+            self.map_tool = RevealAddressMapTool(
+                self.iface.mapCanvas(),
+                self.addressCache(),
+                self.settings.value(SETTINGS_CACHE_RADIUS, DEFAULT_CACHE_RADIUS, type=float),
+                self.geocoderBackend(),
+                self.telemetry
+            )
+            self.map_tool.addressRevealed.connect(self.resultsDock().addResult)
+            self.map_tool.addressRevealed.connect(self.recordHistory)
+            self.map_tool.setHoverEnabled(
+                self.settings.value(SETTINGS_HOVER_PREVIEW, False, type=bool),
+                self.settings.value(SETTINGS_HOVER_DELAY, DEFAULT_HOVER_DELAY, type=int))
         self.iface.mapCanvas().setMapTool(self.map_tool)
 
     def showBranchSelectionDialog(self):
+        from .qgis_feed import QgisFeedDialog
         self.qgisfeed_dialog = QgisFeedDialog()
 
         if self.qgisfeed_dialog.exec_() == QDialog.Accepted:
@@ -192,15 +911,87 @@ class RevealAddressPlugin:
 
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
+        if self.feed_timer is not None:
+            self.feed_timer.stop()
+            self.feed_timer = None
+
         if hasattr(self, 'actions'):
                     for action in self.actions:
                         self.iface.removePluginMenu(
                             u'&EnviroSolutions',
                             action)
 
+        if self.search_widget is not None:
+            self.search_widget.cancelSearch()
+            self.search_widget.deleteLater()
+            self.search_widget = None
+
         if hasattr(self, 'toolbar') and self.toolbar:
             self.toolbar.clear() 
             self.toolbar = None 
             
         if hasattr(self, 'map_tool') and self.map_tool:
-            self.iface.mapCanvas().unsetMapTool(self.map_tool)
\ No newline at end of file
+            self.iface.mapCanvas().unsetMapTool(self.map_tool)
+            self.map_tool.deleteLater()
+            self.map_tool = None
+
+        if self.provider:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+
+        if self.results_dock is not None:
+            self.results_dock.cleanup()
+            self.iface.removeDockWidget(self.results_dock)
+            self.results_dock.deleteLater()
+            self.results_dock = None
+
+        if self.line_lookup is not None:
+            self.line_lookup.cancel()
+            self.line_lookup = None
+
+        if self.expression_resolver is not None:
+            self.expression_resolver.unregister()
+            self.expression_resolver.deleteLater()
+            self.expression_resolver = None
+
+        if self.history is not None:
+            self.history.unload()
+            self.history.deleteLater()
+            self.history = None
+
+        for tool in self.line_tools.values():
+            self.iface.mapCanvas().unsetMapTool(tool)
+            tool.cleanup()
+            tool.deleteLater()
+        self.line_tools = {}
+
+        if self.line_results_dock is not None:
+            self.iface.removeDockWidget(self.line_results_dock)
+            self.line_results_dock.deleteLater()
+            self.line_results_dock = None
+
+        if self.telemetry_dock is not None:
+            self.telemetry_dock.cleanup()
+            self.iface.removeDockWidget(self.telemetry_dock)
+            self.telemetry_dock.deleteLater()
+            self.telemetry_dock = None
+
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher.deleteLater()
+            self.prefetcher = None
+
+        if self.selection_task is not None:
+            self.selection_task.cancel()
+            self.selection_task = None
+
+        if self.scheduler is not None:
+            self.scheduler.cancelAll()
+            self.scheduler = None
+        for scheduler in self.fallback_schedulers.values():
+            scheduler.cancelAll()
+        self.fallback_schedulers = {}
+
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
@@ -0,0 +1,367 @@
+"""
+Trwała pamięć podręczna wyników reverse geocodingu.
+
+Wyniki (AddressRecord) przechowywane są w bazie SQLite jako słownik
+niepustych pól pod kluczem współrzędnych skwantowanych do zadanej liczby miejsc
+po przecinku. Wpisy starsze niż TTL są pomijane, a po przekroczeniu
+limitu rozmiaru usuwane są wpisy najdawniej używane (LRU). Dla zapytań
+w pobliżu zapisanych punktów leniwie budowany jest indeks przestrzenny
+w pamięci.
+
+Zawartość można wyeksportować do pojedynczego pliku SQLite i zaimportować
+na innym stanowisku. Wyeksportowany plik może też służyć jako wspólna
+pamięć podręczna tylko do odczytu (np. na dysku sieciowym), sprawdzana
+po lokalnej.
+"""
+from urllib.parse import quote
+import json
+import os
+import sqlite3
+import time
+
+from .constants import (DEFAULT_CACHE_PRECISION, DEFAULT_CACHE_TTL,
+                        DEFAULT_CACHE_MAX_ENTRIES)
+from .spatial_index import GridIndex
+from .address_record import AddressRecord
+
+# klucz pól rekordu w zapisanym wpisie
+PAYLOAD_RECORD_KEY = 'record'
+# kolejność wartości we wpisach zapisanych jako lista, przed zapisem nazw pól
+LEGACY_PAYLOAD_FIELDS = (
+    'display_name', 'house_number', 'street', 'postcode', 'city', 'municipality',
+    'county', 'state', 'country', 'country_code', 'teryt_simc', 'teryt_ulic',
+    'osm_type', 'osm_id', 'lat', 'lon', 'bbox',
+)
+
+class AddressCache:
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS addresses (
+            qlat INTEGER NOT NULL,
+            qlon INTEGER NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            payload TEXT NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (qlat, qlon)
+        );
+        CREATE INDEX IF NOT EXISTS addresses_accessed ON addresses (accessed);
+    """
+    # tabela eksportu: wpisy i precyzja kluczy, z którą zostały zapisane
+    EXPORT_SCHEMA = """
+        CREATE TABLE export.addresses (
+            qlat INTEGER NOT NULL,
+            qlon INTEGER NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            payload TEXT NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (qlat, qlon)
+        );
+        CREATE TABLE export.metadata (name TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path, precision=DEFAULT_CACHE_PRECISION,
+                 ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_MAX_ENTRIES,
+                 clock=time.time, shared_path=None, read_only=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.read_only = read_only
+        self.index = None
+        self.shared = None
+
+        if read_only:
+            uri = 'file:' + quote(os.path.abspath(path), safe='/\\:') + '?mode=ro'
+            try:
+                self.conn = sqlite3.connect(uri, uri=True)
+                precision = self.exportedPrecision(self.conn, precision)
+                self.count = self.conn.execute('SELECT COUNT(*) FROM addresses').fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"Nie można otworzyć pamięci podręcznej {path}: {e}")
+        else:
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(self.SCHEMA)
+            self.count = self.conn.execute('SELECT COUNT(*) FROM addresses').fetchone()[0]
+        self.precision = precision
+        self.scale = 10 ** precision
+
+        if shared_path:
+            self.setShared(shared_path)
+
+    def setShared(self, path):
+        """
+        Wskazuje wspólną pamięć podręczną tylko do odczytu (None - brak)
+        """
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+        if path:
+            self.shared = AddressCache(
+                path, self.precision, self.ttl, clock=self.clock, read_only=True)
+
+    def options(self):
+        """
+        Parametry pamięci podręcznej potrzebne do otwarcia tego samego
+        pliku w innym wątku
+        """
+        return {'precision': self.precision, 'ttl': self.ttl,
+                'max_entries': self.max_entries}
+
+    def reload(self):
+        """
+        Odczytuje ponownie liczbę wpisów i odrzuca indeks przestrzenny
+        po zapisach z innego połączenia
+        """
+        self.count = self.conn.execute('SELECT COUNT(*) FROM addresses').fetchone()[0]
+        self.index = None
+
+    def key(self, lat, lon):
+        """
+        Zwraca klucz (qlat, qlon) dla współrzędnych w EPSG:4326
+        """
+        return round(lat * self.scale), round(lon * self.scale)
+
+    def get(self, lat, lon):
+        """
+        Zwraca zapisany AddressRecord lub None
+        """
+        record = self.getByKey(self.key(lat, lon))
+        if record is None and self.shared is not None:
+            record = self.shared.get(lat, lon)
+        return record
+
+    def getByKey(self, key):
+        qlat, qlon = key
+        row = self.conn.execute(
+            'SELECT payload, created FROM addresses WHERE qlat = ? AND qlon = ?',
+            (qlat, qlon)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = self.clock()
+        payload, created = row
+        if self.read_only:
+            if self.ttl and now - created > self.ttl:
+                return None
+            return self.decodePayload(payload)
+        with self.conn:
+            if self.ttl and now - created > self.ttl:
+                self.conn.execute(
+                    'DELETE FROM addresses WHERE qlat = ? AND qlon = ?', (qlat, qlon))
+                self.count -= 1
+                if self.index is not None:
+                    self.index.remove(key)
+                return None
+            self.conn.execute(
+                'UPDATE addresses SET accessed = ? WHERE qlat = ? AND qlon = ?',
+                (now, qlat, qlon)
+            )
+        return self.decodePayload(payload)
+
+    @staticmethod
+    def encodePayload(record):
+        # pola zapisywane z nazwami, więc zmiana pól rekordu nie psuje zapisanych wpisów
+        return json.dumps({PAYLOAD_RECORD_KEY: record.toDict()},
+                          ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def decodePayload(payload):
+        values = json.loads(payload)
+        if isinstance(values, dict):
+            if PAYLOAD_RECORD_KEY in values:
+                return AddressRecord.fromDict(values[PAYLOAD_RECORD_KEY])
+            # wpis zapisany przed wprowadzeniem AddressRecord (pełna odpowiedź)
+            return AddressRecord.fromNominatim(values)
+        # wpis zapisany jako lista wartości
+        return AddressRecord.fromDict(dict(zip(LEGACY_PAYLOAD_FIELDS, values)))
+
+    def nearest(self, lat, lon, radius):
+        """
+        Zwraca rekord zapisany dla najbliższego punktu w promieniu
+        radius metrów lub None. Przy radius równym 0 działa jak get().
+        """
+        if not radius:
+            return self.get(lat, lon)
+        index = self.spatialIndex()
+        while True:
+            hit = index.nearest(lat, lon, radius)
+            if hit is None:
+                break
+            record = self.getByKey(hit[1])
+            if record is not None:
+                return record
+            # wpis wygasł lub został usunięty poza indeksem
+            index.remove(hit[1])
+        if self.shared is not None:
+            return self.shared.nearest(lat, lon, radius)
+        return None
+
+    def spatialIndex(self):
+        """
+        Buduje indeks przestrzenny z zawartości bazy przy pierwszym użyciu
+        """
+        if self.index is None:
+            self.index = GridIndex(cell_size=10 / self.scale)
+            self.index.bulkLoad(
+                ((qlat, qlon), lat, lon) for qlat, qlon, lat, lon in self.conn.execute(
+                    'SELECT qlat, qlon, lat, lon FROM addresses'))
+        return self.index
+
+    def put(self, lat, lon, record):
+        self.putMany([(lat, lon, record)])
+
+    def putMany(self, entries):
+        """
+        Zapisuje wpisy (lat, lon, AddressRecord) w jednej transakcji.
+        Wpis może zawierać czwarty element - czas ustalenia adresu (sekundy
+        od epoki, np. z wczytanej historii); wpisy starsze niż TTL są wtedy
+        pomijane, a nowsze wpisy o tym samym kluczu nie są nadpisywane.
+        """
+        now = self.clock()
+        cutoff = now - self.ttl if self.ttl else None
+        with self.conn:
+            for lat, lon, record, *created in entries:
+                created = created[0] if created and created[0] is not None else now
+                if cutoff is not None and created < cutoff:
+                    continue
+                qlat, qlon = self.key(lat, lon)
+                payload = self.encodePayload(record)
+                cursor = self.conn.execute(
+                    'UPDATE addresses SET lat = ?, lon = ?, payload = ?, '
+                    'created = ?, accessed = ? WHERE qlat = ? AND qlon = ? AND created <= ?',
+                    (lat, lon, payload, created, created, qlat, qlon, created)
+                )
+                if cursor.rowcount == 0:
+                    cursor = self.conn.execute(
+                        'INSERT OR IGNORE INTO addresses '
+                        '(qlat, qlon, lat, lon, payload, created, accessed) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (qlat, qlon, lat, lon, payload, created, created)
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    self.count += 1
+                if self.index is not None:
+                    self.index.insert((qlat, qlon), lat, lon)
+            if self.max_entries and self.count > self.max_entries:
+                self.evict(self.count - self.max_entries)
+
+    def evict(self, number):
+        """
+        Usuwa podaną liczbę najdawniej używanych wpisów
+        """
+        keys = self.conn.execute(
+            'SELECT qlat, qlon FROM addresses ORDER BY accessed LIMIT ?',
+            (number,)
+        ).fetchall()
+        self.conn.executemany(
+            'DELETE FROM addresses WHERE qlat = ? AND qlon = ?', keys)
+        self.count -= len(keys)
+        if self.index is not None:
+            for key in keys:
+                self.index.remove(key)
+
+    def purgeExpired(self):
+        if not self.ttl:
+            return 0
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM addresses WHERE created < ?', (self.clock() - self.ttl,))
+        self.count -= cursor.rowcount
+        self.index = None
+        return cursor.rowcount
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM addresses')
+        self.count = 0
+        self.index = None
+
+    @staticmethod
+    def exportedPrecision(conn, default, schema='main'):
+        """
+        Precyzja kluczy zapisana w pliku eksportu (lub default)
+        """
+        try:
+            row = conn.execute(
+                f"SELECT value FROM {schema}.metadata WHERE name = 'precision'").fetchone()
+        except sqlite3.OperationalError:
+            return default
+        return int(row[0]) if row else default
+
+    def export(self, path):
+        """
+        Zapisuje aktualne wpisy do nowego pliku SQLite; zwraca liczbę wpisów
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        self.conn.execute('ATTACH DATABASE ? AS export', (path,))
+        try:
+            with self.conn:
+                self.conn.executescript(self.EXPORT_SCHEMA)
+                cursor = self.conn.execute(
+                    'INSERT INTO export.addresses SELECT * FROM addresses WHERE created >= ?',
+                    (self.clock() - self.ttl if self.ttl else 0,))
+                self.conn.execute(
+                    "INSERT INTO export.metadata VALUES ('precision', ?)", (str(self.precision),))
+            return cursor.rowcount
+        finally:
+            self.conn.execute('DETACH DATABASE export')
+
+    def importFile(self, path):
+        """
+        Wczytuje wpisy z pliku eksportu (lub innej pamięci podręcznej)
+        w jednej transakcji. Klucze przeliczane są według własnej precyzji,
+        a przy konflikcie zostaje nowszy wpis. Zwraca liczbę nowych
+        lub zaktualizowanych wpisów.
+        """
+        if not os.path.exists(path):
+            raise ValueError(f"Plik {path} nie istnieje")
+        try:
+            self.conn.execute('ATTACH DATABASE ? AS source', (path,))
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Nie można otworzyć pliku {path}: {e}")
+        try:
+            before = self.conn.total_changes
+            with self.conn:
+                # WHERE w SELECT jest wymagane przed ON CONFLICT
+                self.conn.execute(
+                    'INSERT INTO addresses (qlat, qlon, lat, lon, payload, created, accessed) '
+                    'SELECT CAST(round(lat * :scale) AS INTEGER), '
+                    'CAST(round(lon * :scale) AS INTEGER), lat, lon, payload, created, created '
+                    'FROM source.addresses WHERE created >= :cutoff '
+                    'ON CONFLICT (qlat, qlon) DO UPDATE SET lat = excluded.lat, '
+                    'lon = excluded.lon, payload = excluded.payload, '
+                    'created = excluded.created, accessed = excluded.accessed '
+                    'WHERE excluded.created > addresses.created',
+                    {'scale': self.scale,
+                     'cutoff': self.clock() - self.ttl if self.ttl else 0})
+            imported = self.conn.total_changes - before
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Plik {path} nie jest pamięcią podręczną adresów: {e}")
+        finally:
+            self.conn.execute('DETACH DATABASE source')
+
+        self.count = self.conn.execute('SELECT COUNT(*) FROM addresses').fetchone()[0]
+        self.index = None
+        if self.max_entries and self.count > self.max_entries:
+            with self.conn:
+                self.evict(self.count - self.max_entries)
+        return imported
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
+        self.conn.close()
+
+    def __len__(self):
+        return self.count
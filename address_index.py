@@ -0,0 +1,290 @@
+"""
+Zwarty, mapowany do pamięci indeks punktów adresowych.
+
+Plik indeksu (*.rai) zawiera punkty posortowane w pasach szerokości
+geograficznej, a w obrębie pasa według długości geograficznej. Kolumny
+współrzędnych i identyfikatorów zapisane są jako tablice liczb 32-bitowych,
+a teksty (ulice, miejscowości, numery) w jednej tablicy napisów. Otwarcie
+indeksu to tylko mmap nagłówka, a wyszukiwanie najbliższego punktu to
+kilka wyszukiwań binarnych w pasach pokrywających promień zapytania.
+
+Budowa (AddressIndexWriter) odbywa się strumieniowo: punkty zapisywane są
+do pliku tymczasowego, a następnie rozmieszczane w pasach (sortowanie przez
+zliczanie) bezpośrednio w zmapowanym pliku wynikowym. W pamięci pozostają
+tylko słowniki unikalnych napisów i miejsc. Moduł nie zależy od QGIS.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from .constants import MIN_LAT, MAX_LAT, MIN_LON, MAX_LON, LOCAL_COUNTRY
+from .address_record import AddressRecord, formatAddress
+from .spatial_index import METERS_PER_DEGREE, distanceMeters
+
+INDEX_SUFFIX = '.rai'
+MAGIC = b'RAIX'
+VERSION = 1
+# magic, wersja, liczba punktów, miejsc, napisów, pasów, wysokość pasa, min_lat
+HEADER = struct.Struct('<4sIIIIIdd')
+# współrzędne zapisywane są w jednostkach 1e-7 stopnia
+SCALE = 10 ** 7
+DEFAULT_STRIP_HEIGHT = 0.001
+# pola miejsca wspólne dla wielu punktów (numer porządkowy zapisywany osobno)
+PLACE_FIELDS = ('street', 'postcode', 'city', 'municipality', 'county', 'state',
+                'teryt_simc', 'teryt_ulic')
+# rekord pliku tymczasowego: lon, lat, numer, miejsce
+POINT = struct.Struct('<iiII')
+# promień, od którego zaczyna się wyszukiwanie (zwiększany do zadanego)
+START_RADIUS = 25.0
+
+
+def _column(view, offset, count, typecode):
+    end = offset + count * 4
+    return view[offset:end].cast(typecode), end
+
+
+class AddressIndex:
+    """
+    Indeks tylko do odczytu; rekordy dostępne są przez index[i]
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise IOError("Indeks adresów wymaga architektury little-endian")
+        self.path = path
+        with open(path, 'rb') as stream:
+            if os.fstat(stream.fileno()).st_size < HEADER.size:
+                raise IOError(f"Nieprawidłowy plik indeksu adresów: {path}")
+            self.mm = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.count, places, strings, self.strips,
+         self.strip_height, self.min_lat) = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise IOError(f"Nieprawidłowy plik indeksu adresów: {path}")
+        view = memoryview(self.mm)
+
+        offset = HEADER.size
+        self.strip_offsets, offset = _column(view, offset, self.strips + 1, 'I')
+        self.lons, offset = _column(view, offset, self.count, 'i')
+        self.lats, offset = _column(view, offset, self.count, 'i')
+        self.house_numbers, offset = _column(view, offset, self.count, 'I')
+        self.places, offset = _column(view, offset, self.count, 'I')
+        self.place_strings, offset = _column(
+            view, offset, places * len(PLACE_FIELDS), 'I')
+        self.string_offsets, offset = _column(view, offset, strings + 1, 'I')
+        self.blob = view[offset:]
+
+    def close(self):
+        for name in ('strip_offsets', 'lons', 'lats', 'house_numbers', 'places',
+                     'place_strings', 'string_offsets', 'blob'):
+            getattr(self, name).release()
+        self.mm.close()
+
+    def __len__(self):
+        return self.count
+
+    def string(self, idx):
+        if not idx:
+            return None
+        return str(self.blob[self.string_offsets[idx]:self.string_offsets[idx + 1]], 'utf-8')
+
+    def __getitem__(self, position):
+        place = self.places[position] * len(PLACE_FIELDS)
+        fields = {
+            name: self.string(self.place_strings[place + i])
+            for i, name in enumerate(PLACE_FIELDS)
+        }
+        record = AddressRecord(
+            house_number=self.string(self.house_numbers[position]),
+            country=LOCAL_COUNTRY,
+            lat=self.lats[position] / SCALE,
+            lon=self.lons[position] / SCALE,
+            **fields
+        )
+        record.display_name = formatAddress(record)
+        return record
+
+    def nearest(self, lat, lon, radius):
+        """
+        Zwraca (odległość w metrach, pozycja) najbliższego punktu
+        w promieniu radius metrów lub None. Wyszukiwanie zaczyna się
+        od małego promienia, więc w gęstej zabudowie sprawdzanych jest
+        tylko kilka punktów.
+        """
+        search_radius = min(START_RADIUS, radius)
+        while True:
+            best = self.nearestWithin(lat, lon, search_radius)
+            if best is not None or search_radius >= radius:
+                return best
+            search_radius = min(search_radius * 4, radius)
+
+    def nearestWithin(self, lat, lon, radius):
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+        first = max(0, math.floor((lat - d_lat - self.min_lat) / self.strip_height))
+        last = min(self.strips - 1, math.floor((lat + d_lat - self.min_lat) / self.strip_height))
+        lon_min = math.floor((lon - d_lon) * SCALE)
+        lon_max = math.ceil((lon + d_lon) * SCALE)
+        lats, lons = self.lats, self.lons
+
+        best = None
+        for strip in range(first, last + 1):
+            start, end = self.strip_offsets[strip], self.strip_offsets[strip + 1]
+            if start == end:
+                continue
+            lo = bisect_left(lons, lon_min, start, end)
+            hi = bisect_right(lons, lon_max, lo, end)
+            for position in range(lo, hi):
+                distance = distanceMeters(lat, lon, lats[position] / SCALE, lons[position] / SCALE)
+                if distance <= radius and (best is None or distance < best[0]):
+                    best = (distance, position)
+        return best
+
+
+class AddressIndexWriter:
+    """
+    Strumieniowa budowa indeksu: add() dla każdego punktu, potem finish()
+    """
+
+    def __init__(self, path, strip_height=DEFAULT_STRIP_HEIGHT,
+                 bounds=(MIN_LAT, MAX_LAT, MIN_LON, MAX_LON)):
+        self.path = path
+        self.strip_height = strip_height
+        self.min_lat, self.max_lat, self.min_lon, self.max_lon = bounds
+        self.strips = math.floor((self.max_lat - self.min_lat) / strip_height) + 1
+        self.strip_counts = array('I', bytes(4 * self.strips))
+        # napis o identyfikatorze 0 oznacza brak wartości
+        self.strings = {'': 0}
+        self.places = {}
+        self.count = 0
+        self.skipped = 0
+        self.points = tempfile.TemporaryFile(
+            dir=os.path.dirname(os.path.abspath(path)), suffix='.points')
+        self.buffer = []
+
+    def intern(self, value):
+        value = str(value).strip() if value is not None else ''
+        idx = self.strings.get(value)
+        if idx is None:
+            idx = self.strings[value] = len(self.strings)
+        return idx
+
+    def add(self, lat, lon, fields):
+        """
+        Dodaje punkt (EPSG:4326) z polami adresu; punkty spoza zasięgu są pomijane
+        """
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            self.skipped += 1
+            return
+        place_key = tuple(self.intern(fields.get(name)) for name in PLACE_FIELDS)
+        place = self.places.get(place_key)
+        if place is None:
+            place = self.places[place_key] = len(self.places)
+        lat = round(lat * SCALE)
+        self.strip_counts[self.strip(lat)] += 1
+        self.buffer.append(POINT.pack(
+            round(lon * SCALE), lat, self.intern(fields.get('house_number')), place))
+        self.count += 1
+        if len(self.buffer) >= 65536:
+            self.flushBuffer()
+
+    def strip(self, lat):
+        """
+        Numer pasa dla szerokości w jednostkach 1e-7 stopnia
+        """
+        strip = math.floor((lat / SCALE - self.min_lat) / self.strip_height)
+        return min(max(strip, 0), self.strips - 1)
+
+    def addAll(self, points):
+        for lat, lon, fields in points:
+            self.add(lat, lon, fields)
+
+    def flushBuffer(self):
+        self.points.write(b''.join(self.buffer))
+        self.buffer = []
+
+    def layout(self):
+        """
+        Zwraca przesunięcia sekcji pliku: (początki kolumn punktów, miejsca, napisy, koniec)
+        """
+        offset = HEADER.size + 4 * (self.strips + 1)
+        columns = [offset + 4 * self.count * i for i in range(4)]
+        places = offset + 16 * self.count
+        strings = places + 4 * len(PLACE_FIELDS) * len(self.places)
+        return columns, places, strings
+
+    def finish(self):
+        self.flushBuffer()
+        columns, places_offset, strings_offset = self.layout()
+        encoded = [value.encode('utf-8') for value in self.strings]
+        string_offsets = array('I', [0])
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+        size = strings_offset + 4 * len(string_offsets) + string_offsets[-1]
+
+        strip_offsets = array('I', [0])
+        for count in self.strip_counts:
+            strip_offsets.append(strip_offsets[-1] + count)
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w+b') as stream:
+            stream.truncate(size)
+            stream.write(HEADER.pack(
+                MAGIC, VERSION, self.count, len(self.places), len(self.strings),
+                self.strips, self.strip_height, self.min_lat))
+            stream.write(strip_offsets.tobytes())
+            stream.seek(places_offset)
+            for place in self.places:
+                stream.write(array('I', place).tobytes())
+            stream.write(string_offsets.tobytes())
+            for value in encoded:
+                stream.write(value)
+            stream.flush()
+            if self.count:
+                with mmap.mmap(stream.fileno(), size) as mm:
+                    self.placePoints(mm, columns, strip_offsets)
+                    mm.flush()
+        os.replace(tmp_path, self.path)
+        self.points.close()
+        self.strings = self.places = None
+
+    def placePoints(self, mm, columns, strip_offsets):
+        view = memoryview(mm)
+        lons, lats, houses, places = (
+            view[offset:offset + 4 * self.count].cast('I' if i > 1 else 'i')
+            for i, offset in enumerate(columns))
+        try:
+            # rozmieszczenie punktów w pasach (sortowanie przez zliczanie)
+            cursors = array('I', strip_offsets[:-1])
+            self.points.seek(0)
+            while True:
+                chunk = self.points.read(POINT.size * 65536)
+                if not chunk:
+                    break
+                for lon, lat, house, place in POINT.iter_unpack(chunk):
+                    strip = self.strip(lat)
+                    position = cursors[strip]
+                    cursors[strip] = position + 1
+                    lons[position] = lon
+                    lats[position] = lat
+                    houses[position] = house
+                    places[position] = place
+
+            # sortowanie punktów w obrębie pasa według długości geograficznej
+            for strip in range(self.strips):
+                start, end = strip_offsets[strip], strip_offsets[strip + 1]
+                if end - start < 2:
+                    continue
+                rows = sorted(zip(lons[start:end], lats[start:end],
+                                  houses[start:end], places[start:end]))
+                for column, values in zip((lons, lats, houses, places), zip(*rows)):
+                    column[start:end] = array(column.format, values)
+        finally:
+            for column in (lons, lats, houses, places):
+                column.release()
+            view.release()
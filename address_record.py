@@ -0,0 +1,172 @@
+"""
+Zwarta reprezentacja wyniku reverse geocodingu.
+
+AddressRecord przechowuje tylko potrzebne pola odpowiedzi Nominatim
+w atrybutach __slots__, dzięki czemu miliony rekordów można trzymać
+w pamięci i pamięci podręcznej bez narzutu słowników, a zapis do
+kolumn atrybutów nie wymaga ponownego parsowania tekstu.
+"""
+
+NO_ADDRESS = 'No address found'
+
+# Klucze słownika address Nominatim w kolejności pierwszeństwa
+STREET_KEYS = ('road', 'pedestrian', 'footway', 'square', 'place', 'hamlet')
+CITY_KEYS = ('city', 'town', 'village', 'hamlet', 'suburb')
+
+_EMPTY = {}
+
+
+def _first(mapping, keys):
+    for key in keys:
+        value = mapping.get(key)
+        if value:
+            return value
+    return None
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def formatAddress(record):
+    """
+    Składa czytelny adres z pól rekordu (dla danych spoza Nominatim)
+    """
+    parts = [
+        ' '.join(filter(None, (record.street, record.house_number))),
+        ' '.join(filter(None, (record.postcode, record.city))),
+        record.municipality,
+        record.county,
+        record.state,
+        record.country,
+    ]
+    return ', '.join(part for part in parts if part)
+
+
+class AddressRecord:
+    # pola zapisywane w kolumnach atrybutów, według typu kolumny
+    STRING_FIELDS = (
+        'display_name',
+        'house_number',
+        'street',
+        'postcode',
+        'city',
+        'municipality',
+        'county',
+        'state',
+        'country',
+        'country_code',
+        'teryt_simc',
+        'teryt_ulic',
+        'osm_type',
+    )
+    INTEGER_FIELDS = ('osm_id',)
+    REAL_FIELDS = ('lat', 'lon')
+    ATTRIBUTE_FIELDS = STRING_FIELDS + INTEGER_FIELDS + REAL_FIELDS
+
+    # zasięg obiektu nie jest zapisywany w kolumnach atrybutów
+    __slots__ = ATTRIBUTE_FIELDS + ('bbox',)
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def fromNominatim(cls, data):
+        """
+        Tworzy rekord z odpowiedzi reverse Nominatim (dict). Odpowiedź
+        z błędem ("Unable to geocode") daje rekord bez adresu.
+        """
+        address = data.get('address') or _EMPTY
+        extratags = data.get('extratags') or _EMPTY
+        bbox = data.get('boundingbox')
+
+        record = cls.__new__(cls)
+        record.display_name = data.get('display_name')
+        record.house_number = address.get('house_number')
+        record.street = _first(address, STREET_KEYS)
+        record.postcode = address.get('postcode')
+        record.city = _first(address, CITY_KEYS)
+        record.municipality = address.get('municipality')
+        record.county = address.get('county')
+        record.state = address.get('state')
+        record.country = address.get('country')
+        record.country_code = address.get('country_code')
+        record.teryt_simc = extratags.get('teryt:simc')
+        record.teryt_ulic = extratags.get('teryt:ulic')
+        record.osm_type = data.get('osm_type')
+        record.osm_id = data.get('osm_id')
+        record.lat = _float(data.get('lat'))
+        record.lon = _float(data.get('lon'))
+        record.bbox = tuple(map(float, bbox)) if bbox else None
+        return record
+
+    @classmethod
+    def fromValues(cls, values):
+        """
+        Odtwarza rekord z krotki/listy zwróconej przez values()
+        """
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(record, name, value)
+        if record.bbox is not None:
+            record.bbox = tuple(record.bbox)
+        return record
+
+    @classmethod
+    def fromDict(cls, fields):
+        """
+        Odtwarza rekord ze słownika zwróconego przez toDict(); nieznane
+        nazwy pól są pomijane
+        """
+        record = cls(**fields)
+        if record.bbox is not None:
+            record.bbox = tuple(record.bbox)
+        return record
+
+    @classmethod
+    def qgsFields(cls, names=None, prefix=''):
+        """
+        Zwraca QgsFields z kolumnami atrybutów names (domyślnie
+        ATTRIBUTE_FIELDS), z nazwami poprzedzonymi przedrostkiem prefix
+        """
+        # import w metodzie - pozostała część modułu nie zależy od QGIS
+        from qgis.core import QgsField, QgsFields
+        from qgis.PyQt.QtCore import QVariant
+
+        fields = QgsFields()
+        for name in names or cls.ATTRIBUTE_FIELDS:
+            if name in cls.STRING_FIELDS:
+                field_type = QVariant.String
+            elif name in cls.INTEGER_FIELDS:
+                field_type = QVariant.LongLong
+            else:
+                field_type = QVariant.Double
+            fields.append(QgsField(f"{prefix}{name}", field_type))
+        return fields
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def toDict(self):
+        """
+        Zwraca słownik z niepustymi polami rekordu, niezależny od kolejności pól
+        """
+        return {name: getattr(self, name) for name in self.__slots__
+                if getattr(self, name) is not None}
+
+    def attributes(self):
+        return tuple(getattr(self, name) for name in self.ATTRIBUTE_FIELDS)
+
+    @property
+    def found(self):
+        return self.display_name is not None
+
+    def text(self):
+        return self.display_name or NO_ADDRESS
+
+    def __eq__(self, other):
+        return isinstance(other, AddressRecord) and self.values() == other.values()
+
+    def __repr__(self):
+        return f"AddressRecord({self.text()!r})"
@@ -0,0 +1,178 @@
+"""
+Pomiar czasu rejestracji kanału wiadomości (QgisFeed) na syntetycznym
+pliku ustawień.
+
+Plik ustawień zawiera --keys kluczy: większość w grupach niezwiązanych
+z kanałami (wtyczki, interfejs), a pozostałe w grupach kanałów QGIS
+- wiadomości kanału wtyczki, kanału QGIS oraz klucze pamięci podręcznej.
+Porównywane są wersje registerFeed i removeDismissed sprzed zmiany
+(przeglądanie wszystkich kluczy profilu, wyrażenia regularne i sprawdzanie
+czasu pobrania dla każdego klucza) z funkcjami modułu feed_settings.
+Każdy pomiar wykonywany jest na świeżej kopii pliku, a wliczany jest
+także zapis pliku (sync()), który wykonują obie wersje.
+
+Moduł feed_settings nie zależy od QGIS: w środowisku z QGIS pomiar
+wykonywany jest na QgsSettings, a bez niego na QSettings z PyQt5.
+
+Uruchomienie:
+    python benchmark/bench_qgis_feed.py --keys 50000 --repeat 5 --output feed.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    from qgis.core import QgsSettings as Settings
+    from qgis.PyQt.QtCore import QSettings
+except ImportError:
+    from PyQt5.QtCore import QSettings, QSettings as Settings
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+
+PACKAGE = os.path.basename(PLUGIN_DIR)
+plugin = importlib.import_module(PACKAGE)
+feed_settings = importlib.import_module(f'{PACKAGE}.feed_settings')
+
+# skrócony adres kanału wtyczki w postaci używanej w kluczach ustawień
+FEED_SHORT = 'httpsqgisfeedenvirosolutionspl?industryEpluginrevealaddress'
+OTHER_GROUPS = ('plugins', 'UI', 'Qgis', 'qgis/digitizing', 'Processing/Configuration')
+
+
+def legacyRegisterFeed(settings, short):
+    """
+    registerFeed sprzed zmiany
+    """
+    old = re.compile(f"core/NewsFeed/{short}")
+    new = re.compile(f"app/news-feed/items/{short}")
+    for key in settings.allKeys():
+        if old.match(key) or new.match(key):
+            final_key = re.sub(r'(\d+)', r'9999\1', key.replace(short, 'httpsfeedqgisorg'))
+            settings.setValue(final_key, settings.value(key))
+        if 'cache' in key:
+            if feed_settings.isFetchTimeRegistered(settings, short) is True:
+                settings.remove(key)
+    settings.sync()
+    settings.beginGroup(f"app/news-feed/items/{short}")
+    settings.setValue("last-fetch-time", 0)
+    settings.endGroup()
+
+
+def legacyRemoveDismissed(settings, short):
+    """
+    removeDismissed sprzed zmiany
+    """
+    old = re.compile(f"core/NewsFeed/{short}")
+    new = re.compile(f"app/news-feed/items/{short}")
+    for key in settings.allKeys():
+        if old.match(key) or new.match(key):
+            if settings.contains(re.sub(r'(\d+)', r'9999\1',
+                                        key.replace(short, 'httpsfeedqgisorg'))):
+                settings.remove(key)
+
+
+def buildSettings(path, short, keys, entries):
+    """
+    Tworzy plik ustawień z keys kluczami, w tym entries wiadomości kanału wtyczki
+    """
+    settings = QSettings(path, QSettings.Format.IniFormat)
+    count = 0
+    feed_groups = (f"core/NewsFeed/{short}", f"app/news-feed/items/{short}")
+    for number in range(entries):
+        for group in feed_groups:
+            for field in ('title', 'content', 'link', 'image-url'):
+                settings.setValue(f"{group}/entries/items/{number}/{field}", f"{field} {number}")
+                count += 1
+        # co druga wiadomość ma już odpowiednik w kanale QGIS (odrzucona)
+        if number % 2:
+            settings.setValue(f"app/news-feed/items/httpsfeedqgisorg/entries/items/9999{number}/title",
+                              f"title {number}")
+            count += 1
+    settings.setValue(f"app/news-feed/items/{short}/last-fetch-time", 1)
+    count += 1
+    number = 0
+    while count < keys:
+        if number % 50 == 0:
+            settings.setValue(f"app/news-feed/items/feed{number}/image-cache/{number}", number)
+        else:
+            group = OTHER_GROUPS[number % len(OTHER_GROUPS)]
+            settings.setValue(f"{group}/section{number % 100}/key{number}", number)
+        count += 1
+        number += 1
+    settings.sync()
+
+
+def measure(template, work_dir, short, function, repeat):
+    timings = []
+    for run in range(repeat):
+        path = os.path.join(work_dir, f'run{run}.ini')
+        shutil.copyfile(template, path)
+        settings = Settings(path, QSettings.Format.IniFormat)
+        # plik wczytywany jest przy pierwszym odczycie - w QGIS dzieje się
+        # to przy uruchomieniu, więc nie jest wliczane do pomiaru
+        settings.contains(f"app/news-feed/items/{short}/last-fetch-time")
+        started = time.perf_counter()
+        function(settings, short)
+        timings.append(time.perf_counter() - started)
+        del settings
+        os.remove(path)
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pomiar rejestracji kanału wiadomości QgisFeed')
+    parser.add_argument('--keys', type=int, default=50000)
+    parser.add_argument('--entries', type=int, default=200, help='wiadomości kanału wtyczki')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='plik JSON z wynikami')
+    args = parser.parse_args()
+
+    work_dir = tempfile.TemporaryDirectory()
+    results = {
+        'plugin_version': plugin.PLUGIN_VERSION,
+        'settings': f'{Settings.__module__}.{Settings.__name__}',
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': vars(args),
+        'operations': {},
+    }
+    try:
+        template = os.path.join(work_dir.name, 'template.ini')
+        buildSettings(template, FEED_SHORT, args.keys, args.entries)
+
+        operations = {
+            'registerFeed': (legacyRegisterFeed, feed_settings.registerFeedEntries),
+            'removeDismissed': (legacyRemoveDismissed, feed_settings.removeDismissedEntries),
+        }
+        for name, (legacy, current) in operations.items():
+            before = measure(template, work_dir.name, FEED_SHORT, legacy, args.repeat)
+            after = measure(template, work_dir.name, FEED_SHORT, current, args.repeat)
+            results['operations'][name] = {
+                'legacy': before,
+                'current': after,
+                'speedup': round(before['median_ms'] / after['median_ms'], 1) if after['median_ms'] else None,
+            }
+    finally:
+        work_dir.cleanup()
+
+    for name, metrics in results['operations'].items():
+        print(f"{name}: {json.dumps(metrics)}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Pomiar wydajności wtyczki Reveal Address względem lokalnego serwera
+zastępczego Nominatim (stand_in_server.py).
+
+Tryby pomiaru:
+    cold  - kliknięcia narzędzia mapy przy pustej pamięci podręcznej,
+    warm  - ponowne kliknięcia w te same punkty (odpowiedzi z pamięci podręcznej),
+    batch - algorytm Processing dla warstwy punktowej.
+
+Dla każdego trybu raportowane są percentyle p50/p95/p99 czasu od kliknięcia
+do wyświetlenia adresu (w trybie batch - od wysłania zapytania dla punktu
+do otrzymania odpowiedzi), przepustowość oraz szczytowe zużycie pamięci.
+Wyniki zapisywane są w JSON razem z wersją wtyczki, aby można je było
+porównywać między wydaniami (--compare).
+
+Uruchomienie (w środowisku z QGIS):
+    python benchmark/bench_reveal_address.py --points 500 --latency 0.05 --output wyniki.json
+    python benchmark/bench_reveal_address.py --output nowe.json --compare wyniki.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qgis.core import (Qgis, QgsApplication, QgsPointXY, QgsVectorLayer,
+                       QgsFeature, QgsGeometry, QgsCoordinateReferenceSystem,
+                       QgsProcessingContext, QgsProcessingFeedback)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QPoint, QEventLoop, QTimer
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+
+from stand_in_server import StandInServer
+
+PACKAGE = os.path.basename(PLUGIN_DIR)
+plugin = importlib.import_module(PACKAGE)
+plugin_module = importlib.import_module(f'{PACKAGE}.RevealAddressPlugin')
+algorithm_module = importlib.import_module(f'{PACKAGE}.reverse_geocode_algorithm')
+constants = importlib.import_module(f'{PACKAGE}.constants')
+AddressCache = importlib.import_module(f'{PACKAGE}.address_cache').AddressCache
+NominatimBackend = importlib.import_module(f'{PACKAGE}.geocoders').NominatimBackend
+RequestScheduler = importlib.import_module(f'{PACKAGE}.request_scheduler').RequestScheduler
+NominatimEndpoint = importlib.import_module(f'{PACKAGE}.endpoint').NominatimEndpoint
+
+
+class ClickEvent:
+    def pos(self):
+        return QPoint(0, 0)
+
+
+def percentile(values, fraction):
+    """
+    Percentyl metodą najbliższej rangi
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, wall_time, count, peak_python, timeouts=0):
+    return {
+        'count': count,
+        'timeouts': timeouts,
+        'wall_time_s': round(wall_time, 4),
+        'throughput_per_s': round(count / wall_time, 2) if wall_time else None,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'peak_python_kb': round(peak_python / 1024, 1),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 3)
+
+
+def randomPoints(count, seed):
+    rng = random.Random(seed)
+    return [
+        QgsPointXY(rng.uniform(constants.MIN_LON, constants.MAX_LON),
+                   rng.uniform(constants.MIN_LAT, constants.MAX_LAT))
+        for _ in range(count)
+    ]
+
+
+def runClicks(tool, points, timeout):
+    """
+    Klika kolejno we wszystkie punkty i czeka na wszystkie wyniki
+    """
+    started = {}
+    latencies = []
+
+    def onRevealed(point, crs, record):
+        start = started.pop((point.x(), point.y()), None)
+        if start is not None:
+            latencies.append(time.perf_counter() - start)
+            if not started:
+                loop.quit()
+
+    # oczekiwanie w pętli zdarzeń, bez ciągłego odpytywania processEvents()
+    loop = QEventLoop()
+    tool.addressRevealed.connect(onRevealed)
+    event = ClickEvent()
+    tracemalloc.start()
+    begin = time.perf_counter()
+    for point in points:
+        tool.toMapCoordinates = lambda pos, point=point: point
+        started[(point.x(), point.y())] = time.perf_counter()
+        tool.canvasReleaseEvent(event)
+
+    if started:
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+        timer.start(max(0, int((begin + timeout - time.perf_counter()) * 1000)))
+        loop.exec()
+        timer.stop()
+    wall_time = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tool.addressRevealed.disconnect(onRevealed)
+    return summarize(latencies, wall_time, len(latencies), peak, timeouts=len(started))
+
+
+class TimedReplyPool(algorithm_module.ReplyPool):
+    """
+    Pula zapytań algorytmu zapisująca czas od wysłania zapytania
+    do otrzymania odpowiedzi dla każdego punktu
+    """
+
+    latencies = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = {}
+
+    def fill(self):
+        first_id = self.job_id + 1
+        super().fill()
+        now = time.perf_counter()
+        for job_id in range(first_id, self.job_id + 1):
+            self.started[job_id] = now
+
+    def handleFinished(self, job_id, data, error):
+        start = self.started.pop(job_id, None)
+        if start is not None:
+            TimedReplyPool.latencies.append(time.perf_counter() - start)
+        super().handleFinished(job_id, data, error)
+
+
+def runBatch(server_url, points, max_in_flight):
+    layer = QgsVectorLayer('Point?crs=EPSG:4326', 'benchmark', 'memory')
+    features = []
+    for point in points:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(point))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+
+    algorithm = algorithm_module.ReverseGeocodeAlgorithm().create()
+    parameters = {
+        'INPUT': layer,
+        'MAX_IN_FLIGHT': max_in_flight,
+        'REQUEST_RATE': 0,
+        'SERVER_URL': server_url,
+        'OUTPUT': 'TEMPORARY_OUTPUT',
+    }
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    # algorytm korzysta z puli mierzącej czas zapytań
+    TimedReplyPool.latencies = []
+    reply_pool = algorithm_module.ReplyPool
+    algorithm_module.ReplyPool = TimedReplyPool
+    tracemalloc.start()
+    begin = time.perf_counter()
+    try:
+        _, ok = algorithm.run(parameters, context, feedback)
+    finally:
+        algorithm_module.ReplyPool = reply_pool
+    wall_time = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if not ok:
+        raise RuntimeError('Algorytm Processing zakończył się błędem')
+    return summarize(TimedReplyPool.latencies, wall_time, len(points), peak)
+
+
+def compareResults(previous, current):
+    print(f"\nPorównanie z wersją {previous.get('plugin_version')}:")
+    for mode, metrics in current['modes'].items():
+        old_metrics = previous.get('modes', {}).get(mode)
+        if not old_metrics:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s', 'peak_python_kb'):
+            old, new = old_metrics.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"  {mode:6} {metric:18} {old:>12} -> {new:>12} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pomiar wydajności wtyczki Reveal Address')
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--batch-points', type=int, default=1000)
+    parser.add_argument('--max-in-flight', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--modes', default='cold,warm,batch')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='plik JSON z wynikami')
+    parser.add_argument('--compare', help='plik JSON z wynikami poprzedniego wydania')
+    args = parser.parse_args()
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+
+    qgs = QgsApplication([], True)
+    qgs.initQgis()
+    server = StandInServer(latency=args.latency, jitter=args.jitter).start()
+    tmp_dir = tempfile.TemporaryDirectory()
+
+    results = {
+        'plugin_version': plugin.PLUGIN_VERSION,
+        'qgis_version': Qgis.QGIS_VERSION,
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': vars(args),
+        'modes': {},
+    }
+    try:
+        canvas = QgsMapCanvas()
+        canvas.setDestinationCrs(QgsCoordinateReferenceSystem.fromEpsgId(constants.EPSG))
+        cache = AddressCache(os.path.join(tmp_dir.name, 'cache.sqlite'))
+        backend = NominatimBackend(RequestScheduler(rate=0), NominatimEndpoint(server.url))
+        tool = plugin_module.RevealAddressMapTool(canvas, cache, 0, backend)
+        points = randomPoints(args.points, args.seed)
+
+        if 'cold' in modes or 'warm' in modes:
+            results['modes']['cold'] = runClicks(tool, points, args.timeout)
+        if 'warm' in modes:
+            results['modes']['warm'] = runClicks(tool, points, args.timeout)
+        if 'batch' in modes:
+            results['modes']['batch'] = runBatch(
+                server.url, randomPoints(args.batch_points, args.seed + 1),
+                args.max_in_flight)
+        cache.close()
+    finally:
+        server.stop()
+        tmp_dir.cleanup()
+
+    for mode, metrics in results['modes'].items():
+        print(f"{mode}: {json.dumps(metrics)}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as previous_file:
+            compareResults(json.load(previous_file), results)
+
+    qgs.exitQgis()
+
+
+if __name__ == '__main__':
+    main()
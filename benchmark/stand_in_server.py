@@ -0,0 +1,136 @@
+"""
+Lokalny serwer zastępujący Nominatim na potrzeby testów wydajności.
+
+Odpowiada na /reverse i /search syntetycznymi (lub wczytanymi z pliku)
+odpowiedziami z konfigurowalnym opóźnieniem, dzięki czemu pomiary nie
+zależą od sieci ani od limitów publicznego serwera.
+
+Uruchomienie samodzielne:
+    python stand_in_server.py --port 8089 --latency 0.15 --jitter 0.05
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import random
+import threading
+import time
+
+
+def syntheticReverse(lat, lon):
+    house_number = int(abs(lat * 1e4 + lon * 1e4)) % 200 + 1
+    road = f"Ulica Testowa {int(abs(lon) * 100) % 50}"
+    return {
+        'place_id': int(abs(lat * 1e6)),
+        'osm_type': 'node',
+        'osm_id': int(abs(lon * 1e6)),
+        'lat': str(lat),
+        'lon': str(lon),
+        'display_name': f"{house_number}, {road}, Miasto Testowe, Polska",
+        'address': {
+            'house_number': str(house_number),
+            'road': road,
+            'city': 'Miasto Testowe',
+            'postcode': '00-001',
+            'country': 'Polska',
+            'country_code': 'pl',
+        },
+        'boundingbox': [str(lat - 1e-4), str(lat + 1e-4), str(lon - 1e-4), str(lon + 1e-4)],
+    }
+
+
+def syntheticSearch(query, limit):
+    return [
+        dict(syntheticReverse(52.0 + i * 0.01, 21.0 + i * 0.01),
+             display_name=f"{query} {i}, Polska")
+        for i in range(limit)
+    ]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server = self.server
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        with server.lock:
+            server.request_count += 1
+
+        if url.path.endswith('/reverse'):
+            lat, lon = float(params.get('lat', 0)), float(params.get('lon', 0))
+            body = server.canned.get((round(lat, 4), round(lon, 4))) \
+                or syntheticReverse(lat, lon)
+        elif url.path.endswith('/search'):
+            body = syntheticSearch(params.get('q', ''), int(params.get('limit', 10)))
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, canned_path=None):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.canned = {}
+        if canned_path:
+            with open(canned_path, 'r', encoding='utf-8') as canned_file:
+                for item in json.load(canned_file):
+                    self.canned[(round(float(item['lat']), 4),
+                                 round(float(item['lon']), 4))] = item
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='stałe opóźnienie odpowiedzi w sekundach')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='losowe dodatkowe opóźnienie w sekundach')
+    parser.add_argument('--canned', help='plik JSON z listą gotowych odpowiedzi reverse')
+    args = parser.parse_args()
+
+    server = StandInServer(args.port, args.latency, args.jitter, args.canned)
+    print(f"Serwer zastępczy Nominatim: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
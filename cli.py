@@ -0,0 +1,349 @@
+"""
+Wsadowy reverse geocoding z wiersza poleceń, bez uruchamiania QGIS.
+
+Współrzędne czytane są strumieniowo z pliku CSV lub GeoJSON-lines
+(albo ze standardowego wejścia), rozwiązywane przez pulę wątków
+o ograniczonej liczbie równoległych zapytań i zapisywane na bieżąco
+w kolejności wejścia. Zużycie pamięci nie zależy od rozmiaru pliku.
+Po przerwaniu zadanie można wznowić od ostatniego punktu kontrolnego.
+
+Przykład (z katalogu nadrzędnego względem katalogu wtyczki):
+    python -m reveal_address_plugin.cli punkty.csv -o adresy.csv \\
+        --checkpoint adresy.ckpt --concurrency 4 --rate 1
+"""
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import argparse
+import csv
+import json
+import os
+import sys
+
+from .constants import (NOMINATIM_URL, DEFAULT_REQUEST_RATE, DEFAULT_ZOOM,
+                        DEFAULT_ACCEPT_LANGUAGE)
+from .address_record import AddressRecord
+from .nominatim_client import NominatimClient
+
+FORMAT_CSV = 'csv'
+FORMAT_GEOJSONL = 'geojsonl'
+# współrzędne znalezionego obiektu nie mogą nadpisać kolumn lat/lon wejścia
+OUTPUT_FIELDS = tuple(f"result_{name}" if name in AddressRecord.REAL_FIELDS else name
+                      for name in AddressRecord.ATTRIBUTE_FIELDS)
+CHECKPOINT_EVERY = 100
+
+
+def detectFormat(path):
+    if path and path != '-' and os.path.splitext(path)[1].lower() in ('.geojsonl', '.geojsons', '.jsonl', '.ndjson'):
+        return FORMAT_GEOJSONL
+    return FORMAT_CSV
+
+
+class CsvReader:
+    """
+    Czyta wiersze CSV z kolumnami współrzędnych w EPSG:4326
+    """
+
+    def __init__(self, stream, lat_field='lat', lon_field='lon', delimiter=','):
+        self.reader = csv.DictReader(stream, delimiter=delimiter)
+        self.lat_field = lat_field
+        self.lon_field = lon_field
+
+    @property
+    def fieldnames(self):
+        return self.reader.fieldnames or []
+
+    def __iter__(self):
+        for row in self.reader:
+            try:
+                point = float(row[self.lat_field]), float(row[self.lon_field])
+            except (KeyError, TypeError, ValueError):
+                point = None
+            yield point, row
+
+
+class GeoJsonLinesReader:
+    """
+    Czyta obiekty GeoJSON (po jednym w wierszu); dla geometrii innych niż
+    punkt używany jest pierwszy wierzchołek. Dla niepoprawnych wierszy
+    zwracany jest rekord None - są pomijane w wynikach i liczone jako błędy.
+    """
+
+    def __init__(self, stream, log=None):
+        self.stream = stream
+        self.log = log or (lambda message: None)
+        self.fieldnames = []
+
+    @staticmethod
+    def firstPosition(coordinates):
+        while coordinates and isinstance(coordinates[0], list):
+            coordinates = coordinates[0]
+        return coordinates
+
+    def __iter__(self):
+        for number, line in enumerate(self.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                feature = json.loads(line)
+            except ValueError as e:
+                self.log(f"Wiersz {number}: niepoprawny JSON: {e}")
+                yield None, None
+                continue
+            if not isinstance(feature, dict):
+                self.log(f"Wiersz {number}: oczekiwano obiektu GeoJSON")
+                yield None, None
+                continue
+            position = self.firstPosition(
+                (feature.get('geometry') or {}).get('coordinates') or [])
+            point = (position[1], position[0]) if len(position) >= 2 else None
+            yield point, feature
+
+
+class CsvWriter:
+
+    def __init__(self, stream, input_fields, write_header=True, delimiter=','):
+        self.fieldnames = list(input_fields) + [
+            name for name in OUTPUT_FIELDS if name not in input_fields]
+        self.writer = csv.DictWriter(stream, self.fieldnames, delimiter=delimiter,
+                                     extrasaction='ignore')
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, record, values):
+        row = dict(record)
+        row.update(zip(OUTPUT_FIELDS, values))
+        self.writer.writerow(row)
+
+
+class GeoJsonLinesWriter:
+
+    def __init__(self, stream, input_fields=(), write_header=True):
+        self.stream = stream
+
+    def write(self, record, values):
+        feature = dict(record)
+        properties = dict(feature.get('properties') or {})
+        properties.update(zip(OUTPUT_FIELDS, values))
+        feature['properties'] = properties
+        self.stream.write(json.dumps(feature, ensure_ascii=False) + '\n')
+
+
+class Checkpoint:
+    """
+    Punkt kontrolny: liczba wierszy wejścia zapisanych już w pliku wynikowym
+    oraz długość tego pliku. Przy wznowieniu plik wynikowy jest przycinany
+    do zapisanej długości, więc wiersze nie są duplikowane.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """
+        Zwraca krotkę (rows, offset)
+        """
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, 'r', encoding='utf-8') as checkpoint_file:
+            state = json.load(checkpoint_file)
+        return state.get('rows', 0), state.get('offset', 0)
+
+    def save(self, rows, offset):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump({'rows': rows, 'offset': offset}, checkpoint_file)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkGeocoder:
+    """
+    Rozwiązuje rekordy z czytnika przez klienta i zapisuje wyniki w kolejności
+    wejścia. W pamięci przechowywane jest co najwyżej 2 × concurrency rekordów.
+    """
+
+    def __init__(self, client, concurrency=4, cache=None, log=None):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.log = log or (lambda message: None)
+        self.failed = 0
+
+    def lookup(self, point):
+        try:
+            return self.client.reverse(*point), None
+        except (OSError, ValueError) as e:
+            return None, e
+
+    def resultValues(self, point, address, error):
+        if error is not None:
+            self.failed += 1
+            self.log(f"{point[0]:.6f}, {point[1]:.6f}: {error}")
+            return (None,) * len(OUTPUT_FIELDS)
+        return address.attributes()
+
+    def run(self, reader, writer, skip=0, checkpoint=None, sync=None):
+        """
+        Zwraca liczbę wierszy wejścia zapisanych łącznie z pominiętymi.
+        sync() opróżnia bufor wyjścia i zwraca jego bieżącą długość.
+        """
+        rows = skip
+        window = deque()
+
+        def writeHead():
+            nonlocal rows
+            point, record, result = window.popleft()
+            if record is None:
+                # niepoprawny wiersz wejścia - pominięty w wynikach
+                rows += 1
+                return
+            if hasattr(result, 'result'):
+                address, error = result.result()
+                if error is None and self.cache is not None:
+                    self.cache.put(point[0], point[1], address)
+                values = self.resultValues(point, address, error)
+            else:
+                values = result
+            writer.write(record, values)
+            rows += 1
+            if checkpoint is not None and sync is not None \
+                    and rows % CHECKPOINT_EVERY == 0:
+                checkpoint.save(rows, sync())
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for index, (point, record) in enumerate(reader):
+                if index < skip:
+                    continue
+                if record is None:
+                    self.failed += 1
+                    result = None
+                elif point is None:
+                    result = (None,) * len(OUTPUT_FIELDS)
+                else:
+                    cached = self.cache.get(*point) if self.cache is not None else None
+                    if cached is not None:
+                        result = cached.attributes()
+                    else:
+                        result = executor.submit(self.lookup, point)
+                window.append((point, record, result))
+                while window and (len(window) > 2 * self.concurrency
+                                  or self.isReady(window[0][2])):
+                    writeHead()
+            while window:
+                writeHead()
+
+        if checkpoint is not None and sync is not None:
+            checkpoint.save(rows, sync())
+        return rows
+
+    @staticmethod
+    def isReady(result):
+        return not hasattr(result, 'result') or result.done()
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='reveal_address',
+        description='Wsadowy reverse geocoding punktów z pliku CSV lub GeoJSON-lines.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='plik wejściowy (domyślnie standardowe wejście)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='plik wynikowy (domyślnie standardowe wyjście)')
+    parser.add_argument('--format', choices=(FORMAT_CSV, FORMAT_GEOJSONL),
+                        help='format wejścia i wyjścia (domyślnie według rozszerzenia)')
+    parser.add_argument('--lat-field', default='lat')
+    parser.add_argument('--lon-field', default='lon')
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--url', default=NOMINATIM_URL, help='adres serwera Nominatim')
+    parser.add_argument('--user-agent', help='nagłówek User-Agent zapytań')
+    parser.add_argument('--accept-language', default=DEFAULT_ACCEPT_LANGUAGE,
+                        help='preferowany język nazw (nagłówek Accept-Language)')
+    parser.add_argument('--zoom', type=int, default=DEFAULT_ZOOM,
+                        help='poziom szczegółowości odpowiedzi reverse (0-18)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_REQUEST_RATE,
+                        help='maksymalna liczba zapytań na sekundę (0 = bez limitu)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='liczba równoległych zapytań')
+    parser.add_argument('--checkpoint',
+                        help='plik punktu kontrolnego umożliwiający wznowienie zadania')
+    parser.add_argument('--cache', help='plik pamięci podręcznej adresów (SQLite)')
+    parser.add_argument('--shared-cache',
+                        help='wspólna pamięć podręczna tylko do odczytu (eksport z wtyczki)')
+    return parser.parse_args(argv)
+
+
+def openStream(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def main(argv=None, client=None):
+    args = parseArgs(argv)
+    data_format = args.format or detectFormat(args.input)
+    checkpoint = None
+    skip, offset = 0, 0
+    if args.checkpoint:
+        if args.output == '-':
+            sys.exit('Punkt kontrolny wymaga zapisu wyników do pliku (--output).')
+        checkpoint = Checkpoint(args.checkpoint)
+        skip, offset = checkpoint.load()
+
+    cache = None
+    if args.cache:
+        from .address_cache import AddressCache
+        try:
+            cache = AddressCache(args.cache, shared_path=args.shared_cache)
+        except ValueError as e:
+            sys.exit(str(e))
+    elif args.shared_cache:
+        sys.exit('Wspólna pamięć podręczna wymaga lokalnej (--cache).')
+
+    client = client or NominatimClient(
+        args.url, rate=args.rate, user_agent=args.user_agent,
+        accept_language=args.accept_language, zoom=args.zoom)
+    geocoder = BulkGeocoder(
+        client, args.concurrency, cache,
+        log=lambda message: print(message, file=sys.stderr))
+
+    input_stream = openStream(args.input, 'r')
+    if skip:
+        output_stream = openStream(args.output, 'r+')
+        output_stream.seek(offset)
+        output_stream.truncate()
+    else:
+        output_stream = openStream(args.output, 'w')
+
+    def sync():
+        output_stream.flush()
+        return output_stream.tell()
+
+    try:
+        if data_format == FORMAT_GEOJSONL:
+            reader = GeoJsonLinesReader(input_stream, geocoder.log)
+            writer = GeoJsonLinesWriter(output_stream)
+        else:
+            reader = CsvReader(input_stream, args.lat_field, args.lon_field, args.delimiter)
+            writer = CsvWriter(output_stream, reader.fieldnames,
+                               write_header=not skip, delimiter=args.delimiter)
+        rows = geocoder.run(reader, writer, skip, checkpoint, sync)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+        if cache is not None:
+            cache.close()
+
+    if checkpoint is not None:
+        checkpoint.remove()
+    print(f"Przetworzono {rows} wierszy, błędy: {geocoder.failed}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,4 +4,139 @@ MIN_LON, MAX_LON = 14.07, 24.03
 
 PLUGIN_ICON = './icons/plugin_icon.png'
 
-EPSG = 4326
\ No newline at end of file
+EPSG = 4326
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+# Poziom szczegółowości odpowiedzi reverse (18 = budynek)
+DEFAULT_ZOOM = 18
+DEFAULT_ADDRESS_DETAILS = True
+# Pusty nagłówek Accept-Language - nazwy w języku lokalnym
+DEFAULT_ACCEPT_LANGUAGE = ''
+
+# Opóźnienie (ms) inicjalizacji QgisFeed po uruchomieniu QGIS
+FEED_INIT_DELAY = 3000
+# Kanał wiadomości EnviroSolutions i branże (kod w adresie kanału: nazwa w oknie wyboru)
+FEED_URL = 'https://qgisfeed.envirosolutions.pl/'
+INDUSTRIES = {
+    "999": "Nie wybrano",
+    "E": "Energetyka/OZE",
+    "U": "Urząd",
+    "T": "Transport/Drogi",
+    "PG": "Planowanie/Geodezja",
+    "WK": "WodKan",
+    "S": "Środowisko",
+    "RL": "Rolnictwo/Leśnictwo",
+    "TK": "Telkom",
+    "ED": "Edukacja",
+    "I": "Inne",
+    "IT": "IT",
+    "N": "Nieruchomości",
+}
+
+# Limit zapytań do serwera (polityka Nominatim: 1 zapytanie/s)
+DEFAULT_REQUEST_RATE = 1.0
+DEFAULT_REQUEST_BURST = 1
+DEFAULT_MAX_RETRIES = 3
+# Limit czasu (s) przesyłania odpowiedzi; 0 - bez limitu
+DEFAULT_REQUEST_TIMEOUT = 15
+# Zapytanie zapasowe do kolejnego serwera wysyłane jest, gdy serwer główny
+# nie odpowie w czasie odpowiadającym percentylowi dotychczasowych czasów
+# odpowiedzi (lub w DEFAULT_HEDGE_DELAY ms, dopóki pomiarów jest za mało)
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_DELAY = 2000
+HEDGE_MIN_DELAY = 200
+HEDGE_MIN_SAMPLES = 20
+# Dokładność (miejsca po przecinku) łączenia zapytań o te same współrzędne
+COALESCE_PRECISION = 5
+
+# Opóźnienie (ms) podglądu adresu pod kursorem
+DEFAULT_HOVER_DELAY = 400
+
+# Nazwa pola, do którego zapisywane są adresy zaznaczonych obiektów
+DEFAULT_ADDRESS_FIELD = 'address'
+# Liczba obiektów zapisywanych w jednej transakcji edycji warstwy
+SELECTION_COMMIT_CHUNK = 50
+
+# Odstęp (m) punktów próbkowania wzdłuż narysowanej linii i ich maksymalna liczba
+DEFAULT_SAMPLE_SPACING = 25
+MAX_LINE_SAMPLES = 2000
+
+# Funkcja wyrażeń reveal_address: maksymalna liczba oczekujących zapytań,
+# liczba zapamiętanych wartości i opóźnienie (ms) odświeżenia mapy
+EXPRESSION_MAX_PENDING = 100
+EXPRESSION_VALUES_SIZE = 50000
+EXPRESSION_REFRESH_DELAY = 500
+
+# Wstępne pobieranie adresów dla widocznego zasięgu mapy
+DEFAULT_PREFETCH_GRID = 4
+DEFAULT_PREFETCH_MAX_SCALE = 5000
+PREFETCH_DELAY = 1000
+
+# Dostępne silniki geokodowania
+BACKEND_NOMINATIM = 'nominatim'
+BACKEND_LOCAL = 'local'
+# Maksymalna odległość (m) do punktu adresowego w lokalnym zbiorze danych
+DEFAULT_LOCAL_MAX_DISTANCE = 200
+# Nazwy atrybutów lokalnego zbioru punktów adresowych (np. PRG),
+# przypisane do pól AddressRecord
+LOCAL_FIELD_NAMES = {
+    'house_number': ('numer', 'numerporzadkowy', 'pa_numerporzadkowy', 'house_number'),
+    'street': ('ulica', 'nazwaulicy', 'road', 'street'),
+    'postcode': ('kod_pocztowy', 'kodpocztowy', 'kod', 'postcode'),
+    'city': ('miejscowosc', 'miejscowość', 'city'),
+    'municipality': ('gmina', 'municipality'),
+    'county': ('powiat', 'county'),
+    'state': ('wojewodztwo', 'województwo', 'state'),
+    'teryt_simc': ('simc', 'simc_id', 'idsimc', 'teryt_simc'),
+    'teryt_ulic': ('ulic', 'ulic_id', 'idulic', 'teryt_ulic'),
+}
+LOCAL_COUNTRY = 'Polska'
+
+# Obsługa punktów spoza regionów objętych lokalnym zbiorem danych
+# (domyślnie granice Polski): zapytanie do Nominatim albo odrzucenie
+OUTSIDE_REGIONS_REMOTE = 'nominatim'
+OUTSIDE_REGIONS_REJECT = 'reject'
+DEFAULT_OUTSIDE_REGIONS = OUTSIDE_REGIONS_REMOTE
+# Rozdzielczość siatki wstępnie przeliczonej przynależności do regionu
+REGION_GRID_RESOLUTION = 64
+
+# Ustawienia lokalnej pamięci podręcznej adresów
+CACHE_DIR_NAME = 'reveal_address'
+CACHE_FILE_NAME = 'address_cache.sqlite'
+DEFAULT_CACHE_PRECISION = 4
+DEFAULT_CACHE_TTL = 30 * 24 * 3600
+DEFAULT_CACHE_MAX_ENTRIES = 100000
+# Promień (m), w którym kliknięcie obsługuje najbliższy zapisany adres
+DEFAULT_CACHE_RADIUS = 15
+
+# Klucze QgsSettings
+SETTINGS_PREFIX = 'reveal_address'
+SETTINGS_CACHE_PRECISION = f'{SETTINGS_PREFIX}/cache_precision'
+SETTINGS_CACHE_TTL = f'{SETTINGS_PREFIX}/cache_ttl'
+SETTINGS_CACHE_MAX_ENTRIES = f'{SETTINGS_PREFIX}/cache_max_entries'
+SETTINGS_CACHE_RADIUS = f'{SETTINGS_PREFIX}/cache_radius'
+SETTINGS_REQUEST_RATE = f'{SETTINGS_PREFIX}/request_rate'
+SETTINGS_REQUEST_BURST = f'{SETTINGS_PREFIX}/request_burst'
+SETTINGS_HOVER_PREVIEW = f'{SETTINGS_PREFIX}/hover_preview'
+SETTINGS_HOVER_DELAY = f'{SETTINGS_PREFIX}/hover_delay'
+SETTINGS_ADDRESS_FIELD = f'{SETTINGS_PREFIX}/address_field'
+SETTINGS_PREFETCH = f'{SETTINGS_PREFIX}/prefetch'
+SETTINGS_PREFETCH_GRID = f'{SETTINGS_PREFIX}/prefetch_grid'
+SETTINGS_PREFETCH_MAX_SCALE = f'{SETTINGS_PREFIX}/prefetch_max_scale'
+SETTINGS_BACKEND = f'{SETTINGS_PREFIX}/backend'
+SETTINGS_LOCAL_DATASET = f'{SETTINGS_PREFIX}/local_dataset'
+SETTINGS_LOCAL_MAX_DISTANCE = f'{SETTINGS_PREFIX}/local_max_distance'
+SETTINGS_SERVER_URL = f'{SETTINGS_PREFIX}/server_url'
+SETTINGS_USER_AGENT = f'{SETTINGS_PREFIX}/user_agent'
+SETTINGS_ACCEPT_LANGUAGE = f'{SETTINGS_PREFIX}/accept_language'
+SETTINGS_ZOOM = f'{SETTINGS_PREFIX}/zoom'
+SETTINGS_ADDRESS_DETAILS = f'{SETTINGS_PREFIX}/address_details'
+SETTINGS_AUTHCFG = f'{SETTINGS_PREFIX}/authcfg'
+SETTINGS_SAMPLE_SPACING = f'{SETTINGS_PREFIX}/sample_spacing'
+SETTINGS_REGIONS_FILE = f'{SETTINGS_PREFIX}/regions_file'
+SETTINGS_OUTSIDE_REGIONS = f'{SETTINGS_PREFIX}/outside_regions'
+SETTINGS_HISTORY_LAYER = f'{SETTINGS_PREFIX}/history_layer'
+SETTINGS_REQUEST_TIMEOUT = f'{SETTINGS_PREFIX}/request_timeout'
+SETTINGS_FALLBACK_URLS = f'{SETTINGS_PREFIX}/fallback_urls'
+SETTINGS_HEDGE_PERCENTILE = f'{SETTINGS_PREFIX}/hedge_percentile'
+SETTINGS_SHARED_CACHE = f'{SETTINGS_PREFIX}/shared_cache'
+SETTINGS_SELECTION_RECORD_FIELDS = f'{SETTINGS_PREFIX}/selection_record_fields'
@@ -0,0 +1,110 @@
+"""
+Konfiguracja serwera Nominatim zapisana w QgsSettings.
+
+NominatimEndpoint buduje adresy URL i obiekty QNetworkRequest z nagłówkami,
+uwierzytelnieniem (authcfg), limitem czasu przesyłania oraz zezwoleniem
+na HTTP/2. Serwery zapasowe mają te same parametry co serwer główny. Kompresję gzip
+obsługuje Qt: dopóki nagłówek Accept-Encoding nie jest ustawiany ręcznie,
+QNetworkAccessManager sam go dodaje i rozpakowuje odpowiedź.
+"""
+from qgis.core import QgsApplication, QgsSettings
+from qgis.PyQt.QtNetwork import QNetworkRequest
+from qgis.PyQt.QtCore import QUrl
+
+from .utils import QgsTools
+from .constants import (NOMINATIM_URL, DEFAULT_ZOOM, DEFAULT_ADDRESS_DETAILS,
+                        DEFAULT_ACCEPT_LANGUAGE, DEFAULT_REQUEST_TIMEOUT,
+                        SETTINGS_SERVER_URL, SETTINGS_USER_AGENT,
+                        SETTINGS_ACCEPT_LANGUAGE, SETTINGS_ZOOM,
+                        SETTINGS_ADDRESS_DETAILS, SETTINGS_AUTHCFG,
+                        SETTINGS_REQUEST_TIMEOUT, SETTINGS_FALLBACK_URLS)
+from .nominatim import USER_AGENT, reverseUrl, searchUrl, requestHeaders
+
+try:
+    HTTP2_ALLOWED = QNetworkRequest.Attribute.Http2AllowedAttribute
+except AttributeError:
+    HTTP2_ALLOWED = None
+
+
+class NominatimEndpoint:
+
+    def __init__(self, base_url=NOMINATIM_URL, user_agent=USER_AGENT,
+                 accept_language=DEFAULT_ACCEPT_LANGUAGE, zoom=DEFAULT_ZOOM,
+                 address_details=DEFAULT_ADDRESS_DETAILS, authcfg='',
+                 timeout=DEFAULT_REQUEST_TIMEOUT, fallback_urls=()):
+        self.base_url = base_url or NOMINATIM_URL
+        self.user_agent = user_agent or USER_AGENT
+        self.accept_language = accept_language
+        self.zoom = zoom
+        self.address_details = address_details
+        self.authcfg = authcfg
+        self.timeout = timeout
+        self.fallback_urls = [url for url in fallback_urls if url and url != self.base_url]
+        # nagłówki są takie same dla każdego zapytania
+        self.headers = [
+            (name.encode('ascii'), value.encode('utf-8'))
+            for name, value in requestHeaders(self.user_agent, accept_language).items()
+        ]
+        self.headers.append((b'Connection', b'keep-alive'))
+
+    @classmethod
+    def fromSettings(cls, settings=None):
+        settings = settings or QgsSettings()
+        return cls(
+            base_url=settings.value(SETTINGS_SERVER_URL, NOMINATIM_URL),
+            user_agent=settings.value(SETTINGS_USER_AGENT, ''),
+            accept_language=settings.value(SETTINGS_ACCEPT_LANGUAGE, DEFAULT_ACCEPT_LANGUAGE),
+            zoom=settings.value(SETTINGS_ZOOM, DEFAULT_ZOOM, type=int),
+            address_details=settings.value(
+                SETTINGS_ADDRESS_DETAILS, DEFAULT_ADDRESS_DETAILS, type=bool),
+            authcfg=settings.value(SETTINGS_AUTHCFG, ''),
+            timeout=settings.value(SETTINGS_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT, type=float),
+            fallback_urls=settings.value(SETTINGS_FALLBACK_URLS, [], type=list)
+        )
+
+    def save(self, settings=None):
+        settings = settings or QgsSettings()
+        settings.setValue(SETTINGS_SERVER_URL, self.base_url)
+        # domyślny User-Agent nie jest zapisywany, bo zawiera wersję wtyczki
+        settings.setValue(
+            SETTINGS_USER_AGENT, '' if self.user_agent == USER_AGENT else self.user_agent)
+        settings.setValue(SETTINGS_ACCEPT_LANGUAGE, self.accept_language)
+        settings.setValue(SETTINGS_ZOOM, self.zoom)
+        settings.setValue(SETTINGS_ADDRESS_DETAILS, self.address_details)
+        settings.setValue(SETTINGS_AUTHCFG, self.authcfg)
+        settings.setValue(SETTINGS_REQUEST_TIMEOUT, self.timeout)
+        settings.setValue(SETTINGS_FALLBACK_URLS, self.fallback_urls)
+
+    def endpoints(self):
+        """
+        Zwraca listę: serwer główny, a po nim serwery zapasowe
+        """
+        return [self] + [
+            NominatimEndpoint(url, self.user_agent, self.accept_language, self.zoom,
+                              self.address_details, self.authcfg, self.timeout)
+            for url in self.fallback_urls
+        ]
+
+    def reverseUrl(self, lat, lon):
+        return reverseUrl(lat, lon, self.base_url, self.zoom, self.address_details)
+
+    def searchUrl(self, query, limit):
+        return searchUrl(query, limit, self.base_url, self.address_details)
+
+    def request(self, url):
+        """
+        Zwraca QNetworkRequest z nagłówkami i uwierzytelnieniem serwera
+        """
+        request = QNetworkRequest(QUrl(url))
+        for name, value in self.headers:
+            request.setRawHeader(name, value)
+        if HTTP2_ALLOWED is not None:
+            request.setAttribute(HTTP2_ALLOWED, True)
+        if self.timeout:
+            # bez limitu wolna odpowiedź blokowałaby wynik bez końca
+            request.setTransferTimeout(int(self.timeout * 1000))
+        if self.authcfg and not QgsApplication.authManager().updateNetworkRequest(
+                request, self.authcfg):
+            QgsTools.pushLogWarning(
+                f"Nie można zastosować konfiguracji uwierzytelniania {self.authcfg}")
+        return request
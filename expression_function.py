@@ -0,0 +1,236 @@
+"""
+Funkcja wyrażeń reveal_address(geometria[, pole]).
+
+Funkcja nie wyszukuje adresów z góry dla całej warstwy: przy obliczaniu
+wartości dla obiektu zwraca adres od razu, jeśli jest już znany,
+a w przeciwnym razie zwraca NULL i zleca wyszukiwanie. Dzięki temu tabela
+atrybutów czy etykiety wyzwalają zapytania tylko dla wierszy i obiektów,
+które faktycznie są wyświetlane. Zapytania wysyłane są przez wspólny
+silnik i harmonogram z niskim priorytetem, a nadmiarowe (np. dla wierszy
+przewiniętych w tabeli) są anulowane. Po otrzymaniu wyników mapa jest
+odświeżana, a wiersze tabeli otrzymują wartość przy ponownym odczycie.
+
+Pamięć podręczna i silnik tworzone są dopiero przy pierwszym wyszukiwaniu,
+więc rejestracja funkcji nie wydłuża uruchamiania QGIS.
+
+Wyrażenia mogą być obliczane w wątkach renderowania, dlatego znane
+wartości przechowywane są w słowniku chronionym blokadą, a zlecenia
+przekazywane do wątku głównego sygnałem.
+"""
+from qgis.core import (Qgis, QgsWkbTypes, QgsExpression, QgsGeometry,
+                       QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+                       QgsProject)
+from qgis.utils import qgsfunction
+from qgis.PyQt.QtCore import (QObject, QThread, QCoreApplication, QTimer,
+                              pyqtSignal)
+from collections import OrderedDict
+from functools import partial
+import threading
+
+from .constants import (EPSG, COALESCE_PRECISION, EXPRESSION_MAX_PENDING,
+                        EXPRESSION_VALUES_SIZE, EXPRESSION_REFRESH_DELAY)
+from .address_record import AddressRecord
+from .request_scheduler import PRIORITY_BACKGROUND
+
+try:
+    POINT_GEOMETRY = Qgis.GeometryType.Point
+except AttributeError:
+    POINT_GEOMETRY = QgsWkbTypes.PointGeometry
+
+FUNCTION_NAME = 'reveal_address'
+FUNCTION_GROUP = 'Reveal Address'
+HELP_TEXT = """
+<h3>reveal_address(geometry[, field])</h3>
+<div class="description">Returns the address of the geometry (its point on surface
+for lines and polygons). Addresses are resolved in the background: the function
+returns NULL until the address is known and the value appears when the row or
+label is drawn again.</div>
+<h4>Arguments</h4>
+<div class="arguments"><table>
+<tr><td class="argument">geometry</td><td>a geometry, e.g. $geometry</td></tr>
+<tr><td class="argument">field</td><td>optional address field, e.g. 'postcode',
+'street', 'city', 'teryt_simc'; the full address by default</td></tr>
+</table></div>
+<h4>Examples</h4>
+<div class="examples"><ul>
+<li>reveal_address($geometry)</li>
+<li>reveal_address($geometry, 'postcode')</li>
+</ul></div>
+"""
+
+
+class AddressExpressionResolver(QObject):
+
+    # lat, lon punktu, dla którego brakuje wartości
+    lookupRequested = pyqtSignal(float, float)
+    # nowe wartości - warstwy wymagają odświeżenia
+    valuesChanged = pyqtSignal()
+
+    def __init__(self, cache_factory, backend_factory, cache_radius=0,
+                 max_pending=EXPRESSION_MAX_PENDING, parent=None):
+        super().__init__(parent)
+        # pamięć podręczna i silnik pobierane przy pierwszym wyszukiwaniu
+        self.cache_factory = cache_factory
+        self.backend_factory = backend_factory
+        self.cache = None
+        self.backend = None
+        self.cache_radius = cache_radius
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        # klucz -> AddressRecord (LRU), klucze zleconych wyszukiwań
+        self.values = OrderedDict()
+        self.requested = set()
+        # klucz -> uchwyt zapytania, w kolejności zlecenia
+        self.pending = OrderedDict()
+        self.local = threading.local()
+        self.function = None
+
+        self.lookupRequested.connect(self.resolve)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(EXPRESSION_REFRESH_DELAY)
+        self.refresh_timer.timeout.connect(self.valuesChanged)
+
+    def register(self):
+        self.function = qgsfunction(
+            args=-1, group=FUNCTION_GROUP, name=FUNCTION_NAME, helpText=HELP_TEXT,
+            usesgeometry=False, referenced_columns=[], handlesnull=True
+        )(self.evaluate)
+        return self.function
+
+    def unregister(self):
+        if self.function is not None:
+            QgsExpression.unregisterFunction(FUNCTION_NAME)
+            self.function = None
+        self.cancel()
+
+    @staticmethod
+    def key(lat, lon):
+        return round(lat, COALESCE_PRECISION), round(lon, COALESCE_PRECISION)
+
+    def transform(self, crs_id):
+        """
+        Transformacja do EPSG:4326 - osobna dla każdego wątku
+        """
+        transforms = getattr(self.local, 'transforms', None)
+        if transforms is None:
+            transforms = self.local.transforms = {}
+        coord_transform = transforms.get(crs_id)
+        if coord_transform is None:
+            coord_transform = transforms[crs_id] = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem(crs_id),
+                QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
+                QgsProject.instance().transformContext()
+            )
+        return coord_transform
+
+    def evaluate(self, values, feature, parent, context):
+        if not values or not isinstance(values[0], QgsGeometry) or values[0].isNull():
+            return None
+        geometry = values[0]
+        field = values[1] if len(values) > 1 else None
+        if field is not None and field not in AddressRecord.ATTRIBUTE_FIELDS:
+            parent.setEvalErrorString(f"Unknown address field: {field}")
+            return None
+
+        if geometry.type() == POINT_GEOMETRY and not geometry.isMultipart():
+            point = geometry.asPoint()
+        else:
+            point = geometry.pointOnSurface().asPoint()
+        crs_id = context.variable('layer_crs') if context is not None else None
+        if crs_id and crs_id != f'EPSG:{EPSG}':
+            point = self.transform(crs_id).transform(point)
+        lat, lon = point.y(), point.x()
+
+        record = self.value(lat, lon)
+        if record is None:
+            return None
+        return record.display_name if field is None else getattr(record, field)
+
+    def value(self, lat, lon):
+        """
+        Zwraca znany rekord dla punktu lub None, zlecając wyszukiwanie
+        """
+        key = self.key(lat, lon)
+        with self.lock:
+            record = self.values.get(key)
+            if record is not None:
+                self.values.move_to_end(key)
+                return record
+            if key in self.requested:
+                return None
+            self.requested.add(key)
+
+        if QThread.currentThread() == QCoreApplication.instance().thread():
+            # wątek główny (tabela atrybutów) - pamięć podręczna od razu
+            return self.resolve(lat, lon)
+        self.lookupRequested.emit(lat, lon)
+        return None
+
+    def store(self, key, record):
+        with self.lock:
+            self.requested.discard(key)
+            self.values[key] = record
+            while len(self.values) > EXPRESSION_VALUES_SIZE:
+                self.values.popitem(last=False)
+
+    def resolve(self, lat, lon):
+        if self.backend is None:
+            self.cache = self.cache_factory()
+            self.backend = self.backend_factory()
+        key = self.key(lat, lon)
+        if self.cache is not None and self.backend.cacheable:
+            record = self.cache.nearest(lat, lon, self.cache_radius)
+            if record is not None:
+                self.store(key, record)
+                self.refresh_timer.start()
+                return record
+        if key in self.pending:
+            return None
+
+        # wyszukiwania najdawniej zlecone (wiersze już przewinięte) są anulowane
+        while len(self.pending) >= self.max_pending:
+            stale_key, handle = self.pending.popitem(last=False)
+            self.backend.cancel(handle)
+            with self.lock:
+                self.requested.discard(stale_key)
+        self.pending[key] = None
+        handle = self.backend.reverse(
+            lat, lon, partial(self.handleResult, key, lat, lon), PRIORITY_BACKGROUND)
+        if key in self.pending:
+            self.pending[key] = handle
+            return None
+        # silnik offline zwraca wynik od razu
+        with self.lock:
+            return self.values.get(key)
+
+    def handleResult(self, key, lat, lon, address, error):
+        self.pending.pop(key, None)
+        if error is not None:
+            with self.lock:
+                self.requested.discard(key)
+            return
+        if self.cache is not None and self.backend.cacheable:
+            self.cache.put(lat, lon, address)
+        self.store(key, address)
+        self.refresh_timer.start()
+
+    def resetBackend(self):
+        """
+        Silnik zostanie pobrany ponownie przy kolejnym wyszukiwaniu
+        """
+        self.cancel()
+        self.backend = None
+
+    def cancel(self):
+        for handle in self.pending.values():
+            if handle is not None:
+                self.backend.cancel(handle)
+        self.pending.clear()
+        with self.lock:
+            self.requested.clear()
+
+    def clear(self):
+        self.cancel()
+        with self.lock:
+            self.values.clear()
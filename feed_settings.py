@@ -0,0 +1,90 @@
+"""
+Przeglądanie ustawień kanałów wiadomości QGIS (QgisFeed).
+
+Wiadomości kanału wtyczki kopiowane są pod klucze kanału QGIS, aby były
+wyświetlane w oknie powitalnym. Przeglądane są tylko grupy, w których
+QGIS przechowuje kanały, zamiast wszystkich ustawień profilu, a zmiany
+zapisywane są dopiero po przejrzeniu kluczy, z jednym sync().
+Funkcje przyjmują obiekt QSettings / QgsSettings, więc moduł nie zależy od QGIS.
+"""
+import re
+
+# grupy ustawień, w których QGIS przechowuje wiadomości kanałów (starszy i nowszy format)
+FEED_SETTINGS_GROUPS = ('core/NewsFeed', 'app/news-feed/items')
+# kanał QGIS w kluczach ustawień i numeracja jego wiadomości
+QGIS_FEED_URL_SHORT = 'httpsfeedqgisorg'
+DIGITS_PATTERN = re.compile(r'(\d+)')
+
+
+def feedKeys(settings):
+    """
+    Zwraca klucze z grup kanałów wiadomości
+    """
+    keys = []
+    for group in FEED_SETTINGS_GROUPS:
+        settings.beginGroup(group)
+        keys.extend(f"{group}/{key}" for key in settings.allKeys())
+        settings.endGroup()
+    return keys
+
+
+def feedPrefixes(feed_short):
+    return tuple(f"{group}/{feed_short}" for group in FEED_SETTINGS_GROUPS)
+
+
+def qgisFeedKey(key, feed_short):
+    """
+    Klucz odpowiadającej wiadomości w kanale QGIS
+    """
+    return DIGITS_PATTERN.sub(r'9999\1', key.replace(feed_short, QGIS_FEED_URL_SHORT))
+
+
+def isFetchTimeRegistered(settings, feed_short):
+    """
+    Sprawdza, czy czas pobrania kanału został już zapisany
+    """
+    return settings.contains(f"core/NewsFeed/{feed_short}/lastFetchTime") \
+        or settings.contains(f"app/news-feed/items/{feed_short}/last-fetch-time")
+
+
+def registerFeedEntries(settings, feed_short):
+    """
+    Kopiuje wiadomości kanału do kanału QGIS; zwraca liczbę skopiowanych kluczy
+    """
+    prefixes = feedPrefixes(feed_short)
+    # klucze czasu pobrania nie zmieniają się w trakcie przeglądania,
+    # więc wystarczy sprawdzić je raz
+    check_fetch = isFetchTimeRegistered(settings, feed_short)
+    values = {}
+    removed = []
+    for key in feedKeys(settings):
+        if key.startswith(prefixes):
+            values[qgisFeedKey(key, feed_short)] = settings.value(key)
+
+        # ponizszy fragment odpowiada za mozliwosc ciaglego wyswietlania wiadomosci
+        # przy wlaczeniu qgis za kazdym razem
+
+        if check_fetch and 'cache' in key:
+            removed.append(key)
+
+    # zapis zebranych zmian dopiero po przejrzeniu kluczy
+    for key, value in values.items():
+        settings.setValue(key, value)
+    for key in removed:
+        settings.remove(key)
+    settings.setValue(f"app/news-feed/items/{feed_short}/last-fetch-time", 0)
+    settings.sync()
+    return len(values)
+
+
+def removeDismissedEntries(settings, feed_short):
+    """
+    Usuwa wiadomości kanału, które mają już odpowiednik w kanale QGIS;
+    zwraca liczbę usuniętych kluczy
+    """
+    prefixes = feedPrefixes(feed_short)
+    removed = [key for key in feedKeys(settings)
+               if key.startswith(prefixes) and settings.contains(qgisFeedKey(key, feed_short))]
+    for key in removed:
+        settings.remove(key)
+    return len(removed)
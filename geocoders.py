@@ -0,0 +1,306 @@
+"""
+Silniki reverse geocodingu wywoływane przez narzędzie mapy.
+
+Każdy silnik udostępnia metodę reverse(lat, lon, callback), która po
+uzyskaniu wyniku wywołuje callback(address, error), gdzie address to
+AddressRecord. Zwracany uchwyt można przekazać do cancel(), aby
+zrezygnować z wyniku.
+"""
+from qgis.core import QgsApplication, QgsProject
+from qgis.PyQt.QtCore import QTimer
+from functools import partial
+import os
+import struct
+
+from .utils import QgsTools
+from .constants import (DEFAULT_LOCAL_MAX_DISTANCE, COALESCE_PRECISION,
+                        DEFAULT_HEDGE_PERCENTILE, DEFAULT_HEDGE_DELAY,
+                        HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES)
+from .nominatim import parseReverse
+from .endpoint import NominatimEndpoint
+from .address_record import AddressRecord
+from .address_index import AddressIndex, INDEX_SUFFIX
+from .local_index_task import LocalIndexTask
+from .regions import findRegion
+from .request_scheduler import PRIORITY_USER
+from .telemetry import (Telemetry, Histogram, STAGE_DECODE, COUNTER_HEDGE,
+                        COUNTER_HEDGE_WON, COUNTER_FALLBACK)
+
+
+class GeocoderBackend:
+    name = ''
+    # czy wyniki warto zapisywać w pamięci podręcznej
+    cacheable = True
+
+    def reverse(self, lat, lon, callback, priority=PRIORITY_USER):
+        raise NotImplementedError
+
+    def cancel(self, handle):
+        pass
+
+
+class NominatimBackend(GeocoderBackend):
+    """
+    Silnik korzystający z API Nominatim. Zapytania przechodzą przez
+    wspólny RequestScheduler, który pilnuje limitu częstotliwości.
+    """
+    name = 'nominatim'
+
+    def __init__(self, scheduler, endpoint=None):
+        self.scheduler = scheduler
+        self.endpoint = endpoint or NominatimEndpoint()
+
+    @staticmethod
+    def requestKey(lat, lon):
+        return ('reverse', round(lat, COALESCE_PRECISION), round(lon, COALESCE_PRECISION))
+
+    def reverse(self, lat, lon, callback, priority=PRIORITY_USER):
+        url = self.endpoint.reverseUrl(lat, lon)
+        if priority == PRIORITY_USER:
+            QgsTools.pushLogInfo(f"Wysyłanie zapytania: {url}")
+        return self.scheduler.submit(
+            self.requestKey(lat, lon),
+            self.endpoint.request(url),
+            partial(self.handleReply, callback, priority),
+            priority
+        )
+
+    def cancel(self, handle):
+        self.scheduler.cancel(handle)
+
+    def handleReply(self, callback, priority, data, error):
+        if error is not None:
+            callback(None, error)
+            return
+
+        if priority == PRIORITY_USER:
+            QgsTools.pushLogInfo("Otrzymano odpowiedź z serwera Nominatim.")
+        try:
+            with self.scheduler.telemetry.measure(STAGE_DECODE):
+                address = parseReverse(data)
+        except ValueError as e:
+            callback(None, f"Invalid response: {e}")
+            return
+        callback(address, None)
+
+
+class LocalAddressBackend(GeocoderBackend):
+    """
+    Silnik offline oparty o mapowany do pamięci indeks punktów adresowych
+    *.rai (index_builder.py). Dla innych zbiorów (np. GeoPackage z PRG)
+    indeks budowany jest raz, w tle, w katalogu index_dir - do tego czasu
+    zapytania kończą się błędem zamiast blokować interfejs.
+    """
+    name = 'local'
+    cacheable = False
+
+    def __init__(self, path, max_distance=DEFAULT_LOCAL_MAX_DISTANCE, index_dir=None):
+        self.path = path
+        self.max_distance = max_distance
+        self.index_dir = index_dir or os.path.dirname(os.path.abspath(path))
+        self.index = None
+        self.task = None
+        self.error = None
+
+    def indexPath(self):
+        if self.path.lower().endswith(INDEX_SUFFIX):
+            return self.path
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        return os.path.join(self.index_dir, name + INDEX_SUFFIX)
+
+    def load(self):
+        index_path = self.indexPath()
+        if index_path != self.path and not self.indexIsFresh(index_path):
+            self.buildIndex(index_path)
+            raise IOError(self.error or f"Building the offline address index from {self.path}…")
+        try:
+            self.index = AddressIndex(index_path)
+        except (OSError, ValueError, struct.error) as e:
+            raise IOError(f"Cannot open the address index {index_path}: {e}")
+        QgsTools.pushLogInfo(
+            f"Otwarto indeks {len(self.index)} punktów adresowych {index_path}")
+
+    def indexIsFresh(self, index_path):
+        try:
+            return os.path.getmtime(index_path) >= os.path.getmtime(self.path)
+        except OSError:
+            return False
+
+    def buildIndex(self, index_path):
+        if self.task is not None or self.error is not None:
+            return
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self.task = LocalIndexTask(
+            self.path, index_path, QgsProject.instance().transformContext())
+        self.task.taskCompleted.connect(self.onIndexBuilt)
+        self.task.taskTerminated.connect(self.onIndexFailed)
+        QgsApplication.taskManager().addTask(self.task)
+
+    def onIndexBuilt(self):
+        self.task = None
+
+    def onIndexFailed(self):
+        # błąd zapamiętywany jest do zmiany zbioru danych w ustawieniach
+        self.error = (self.task.error if self.task is not None else None) \
+            or f"Cannot build the offline address index from {self.path}"
+        self.task = None
+
+    def reverse(self, lat, lon, callback, priority=PRIORITY_USER):
+        if self.index is None:
+            try:
+                self.load()
+            except IOError as e:
+                callback(None, str(e))
+                return
+        hit = self.index.nearest(lat, lon, self.max_distance)
+        callback(AddressRecord() if hit is None else self.index[hit[1]], None)
+
+
+class RoutingBackend(GeocoderBackend):
+    """
+    Kieruje zapytania według regionów: punkty wewnątrz regionów obsługuje
+    backend (np. lokalny zbiór danych), pozostałe - fallback. Bez fallbacku
+    punkty spoza regionów są odrzucane bez wysyłania zapytania.
+    """
+    name = 'routing'
+
+    def __init__(self, regions, backend, fallback=None):
+        self.regions = regions
+        self.backend = backend
+        self.fallback = fallback
+        self.cacheable = backend.cacheable or (fallback is not None and fallback.cacheable)
+
+    def route(self, lat, lon):
+        if findRegion(self.regions, lat, lon) is not None:
+            return self.backend
+        return self.fallback
+
+    def reverse(self, lat, lon, callback, priority=PRIORITY_USER):
+        backend = self.route(lat, lon)
+        if backend is None:
+            callback(None, f"Location {lat:.6f}, {lon:.6f} is outside the supported regions")
+            return None
+        handle = backend.reverse(lat, lon, callback, priority)
+        if handle is None:
+            return None
+        return backend, handle
+
+    def cancel(self, handle):
+        if handle is not None:
+            backend, handle = handle
+            backend.cancel(handle)
+
+
+class HedgedLookup:
+    """
+    Pojedyncze wyszukiwanie w HedgedBackend. Kolejne silniki uruchamiane
+    są po błędzie poprzedniego lub - dla zapytań użytkownika - po
+    przekroczeniu budżetu czasu; pierwsza odpowiedź wygrywa, a pozostałe
+    zapytania są anulowane.
+    """
+
+    def __init__(self, owner, lat, lon, callback, priority):
+        self.owner = owner
+        self.lat = lat
+        self.lon = lon
+        self.callback = callback
+        self.priority = priority
+        self.handles = {}
+        self.next = 0
+        self.done = False
+        self.started = owner.telemetry.clock()
+
+    def launch(self):
+        """
+        Wysyła zapytanie do kolejnego silnika; False, jeśli nie ma już silników
+        """
+        backends = self.owner.backends
+        if self.next >= len(backends):
+            return False
+        idx = self.next
+        self.next += 1
+        self.handles[idx] = None
+        handle = backends[idx].reverse(
+            self.lat, self.lon, partial(self.handleResult, idx), self.priority)
+        if self.done or idx not in self.handles:
+            # wynik otrzymany od razu
+            return True
+        self.handles[idx] = handle
+        if self.priority == PRIORITY_USER and self.next < len(backends):
+            QTimer.singleShot(self.owner.hedgeDelay(), self.hedge)
+        return True
+
+    def hedge(self):
+        if self.done or not self.handles:
+            return
+        self.owner.telemetry.increment(COUNTER_HEDGE)
+        self.launch()
+
+    def handleResult(self, idx, address, error):
+        if self.done:
+            return
+        self.handles.pop(idx, None)
+        if error is not None:
+            if self.handles:
+                # czeka jeszcze odpowiedź innego silnika
+                return
+            if self.next < len(self.owner.backends):
+                QgsTools.pushLogWarning(f"{error} - zapytanie do kolejnego serwera")
+                self.owner.telemetry.increment(COUNTER_FALLBACK)
+                self.launch()
+                return
+        else:
+            elapsed = (self.owner.telemetry.clock() - self.started) * 1000.0
+            if idx == 0:
+                self.owner.latency.add(elapsed)
+            elif self.handles:
+                self.owner.telemetry.increment(COUNTER_HEDGE_WON)
+                if 0 in self.handles:
+                    # serwer główny przegrał i jego zapytanie zostanie anulowane -
+                    # jego czas odpowiedzi jest co najmniej równy dotychczasowemu
+                    self.owner.latency.add(elapsed)
+        self.finish()
+        self.callback(address, error)
+
+    def finish(self):
+        self.done = True
+        for idx, handle in self.handles.items():
+            if handle is not None:
+                self.owner.backends[idx].cancel(handle)
+        self.handles = {}
+
+
+class HedgedBackend(GeocoderBackend):
+    """
+    Uporządkowana lista silników (serwer główny i zapasowe). Po błędzie
+    zapytanie trafia do kolejnego silnika, a jeśli serwer główny nie
+    odpowie na zapytanie użytkownika w czasie odpowiadającym percentylowi
+    jego dotychczasowych czasów odpowiedzi, równolegle wysyłane jest
+    zapytanie zapasowe i używana jest pierwsza odpowiedź.
+    """
+    name = 'hedged'
+
+    def __init__(self, backends, percentile=DEFAULT_HEDGE_PERCENTILE, telemetry=None):
+        self.backends = backends
+        self.percentile = percentile
+        self.telemetry = telemetry or Telemetry()
+        self.cacheable = all(backend.cacheable for backend in backends)
+        # czasy odpowiedzi serwera głównego (ms)
+        self.latency = Histogram()
+
+    def hedgeDelay(self):
+        """
+        Budżet czasu (ms) serwera głównego przed wysłaniem zapytania zapasowego
+        """
+        if self.latency.count < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return int(max(self.latency.percentile(self.percentile), HEDGE_MIN_DELAY))
+
+    def reverse(self, lat, lon, callback, priority=PRIORITY_USER):
+        lookup = HedgedLookup(self, lat, lon, callback, priority)
+        lookup.launch()
+        return None if lookup.done else lookup
+
+    def cancel(self, handle):
+        if handle is not None:
+            handle.finish()
@@ -0,0 +1,152 @@
+"""
+Warstwa punktowa z historią wyników wyszukiwania.
+
+Każdy wynik narzędzia mapy dopisywany jest do warstwy tymczasowej
+(memory) w projekcie, z atrybutami adresu i etykietą. Obiekty zbierane
+są w buforze i dodawane do dostawcy danych raz na iterację pętli
+zdarzeń. Warstwę można zapisać do GeoPackage, a zapisany plik wczytać
+ponownie - również jako dane startowe pamięci podręcznej.
+"""
+from qgis.core import (QgsVectorLayer, QgsFeature, QgsGeometry,
+                       QgsField, QgsProject, QgsVectorFileWriter,
+                       QgsPalLayerSettings, QgsVectorLayerSimpleLabeling,
+                       QgsCoordinateTransform, QgsCoordinateReferenceSystem,
+                       QgsVariantUtils)
+from qgis.PyQt.QtCore import QObject, QTimer, QVariant, QDateTime
+
+from .utils import QgsTools
+from .constants import EPSG
+from .address_record import AddressRecord
+from .transforms import TransformCache
+
+HISTORY_LAYER_NAME = 'Reveal Address history'
+REVEALED_AT_FIELD = 'revealed_at'
+# etykieta: ulica z numerem, a gdy ich brak - pełny adres
+LABEL_EXPRESSION = (
+    "coalesce(nullif(trim(concat(\"street\", ' ', \"house_number\")), ''), \"display_name\")")
+
+
+def historyFields():
+    fields = AddressRecord.qgsFields()
+    fields.append(QgsField(REVEALED_AT_FIELD, QVariant.DateTime))
+    return fields
+
+
+def setHistoryLabels(layer):
+    settings = QgsPalLayerSettings()
+    settings.fieldName = LABEL_EXPRESSION
+    settings.isExpression = True
+    layer.setLabeling(QgsVectorLayerSimpleLabeling(settings))
+    layer.setLabelsEnabled(True)
+
+
+def historyRecords(layer):
+    """
+    Zwraca (lat, lon, AddressRecord, czas ustalenia adresu) dla obiektów
+    warstwy historii; współrzędne punktu zapytania w EPSG:4326, czas
+    w sekundach od epoki (None, gdy nie jest zapisany)
+    """
+    coord_transform = QgsCoordinateTransform(
+        layer.crs(),
+        QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
+        QgsProject.instance().transformContext()
+    )
+    names = [name for name in AddressRecord.ATTRIBUTE_FIELDS
+             if layer.fields().indexOf(name) >= 0]
+    revealed_at_idx = layer.fields().indexOf(REVEALED_AT_FIELD)
+    for feature in layer.getFeatures():
+        geometry = feature.geometry()
+        if geometry.isNull():
+            continue
+        point = coord_transform.transform(geometry.asPoint())
+        fields = {}
+        for name in names:
+            value = feature[name]
+            if not QgsVariantUtils.isNull(value):
+                fields[name] = value
+        if 'display_name' not in fields:
+            continue
+        revealed_at = feature[revealed_at_idx] if revealed_at_idx >= 0 else None
+        created = revealed_at.toSecsSinceEpoch() \
+            if isinstance(revealed_at, QDateTime) and revealed_at.isValid() else None
+        yield point.y(), point.x(), AddressRecord(**fields), created
+
+
+class AddressHistoryLayer(QObject):
+    """
+    Warstwa historii tworzona przy pierwszym wyniku. Usunięcie warstwy
+    z projektu powoduje utworzenie nowej przy kolejnym wyniku.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layer = None
+        self.pending = []
+        self.flush_scheduled = False
+        self.transform_cache = TransformCache()
+        self.fields = historyFields()
+
+    def historyLayer(self):
+        if self.layer is None:
+            self.layer = QgsVectorLayer(
+                f'Point?crs=EPSG:{EPSG}', HISTORY_LAYER_NAME, 'memory')
+            self.layer.dataProvider().addAttributes(self.fields.toList())
+            self.layer.updateFields()
+            setHistoryLabels(self.layer)
+            self.layer.willBeDeleted.connect(self.onLayerDeleted)
+            QgsProject.instance().addMapLayer(self.layer)
+        return self.layer
+
+    def onLayerDeleted(self):
+        self.layer = None
+
+    def addResult(self, point, crs, record):
+        """
+        Dodaje do bufora wynik dla punktu zapytania (w układzie crs)
+        """
+        point = self.transform_cache.transform(crs).transform(point)
+        feature = QgsFeature(self.fields)
+        feature.setGeometry(QgsGeometry.fromPointXY(point))
+        feature.setAttributes(
+            list(record.attributes()) + [QDateTime.currentDateTime()])
+        self.pending.append(feature)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.pending:
+            return
+        features, self.pending = self.pending, []
+        layer = self.historyLayer()
+        if not layer.dataProvider().addFeatures(features)[0]:
+            QgsTools.pushLogWarning(
+                f"Nie można dodać {len(features)} wyników do warstwy historii")
+            return
+        layer.updateExtents()
+        layer.triggerRepaint()
+
+    def saveToGeoPackage(self, path):
+        """
+        Zapisuje historię do pliku GeoPackage; zwraca komunikat błędu lub None
+        """
+        self.flush()
+        if self.layer is None or not self.layer.featureCount():
+            return 'The address history is empty'
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.layerName = 'address_history'
+        error, message, _, _ = QgsVectorFileWriter.writeAsVectorFormatV3(
+            self.layer, path, QgsProject.instance().transformContext(), options)
+        if error != QgsVectorFileWriter.WriterError.NoError:
+            return message or f"Cannot write {path}"
+        QgsTools.pushLogInfo(
+            f"Zapisano {self.layer.featureCount()} wyników do {path}")
+        return None
+
+    def unload(self):
+        self.pending = []
+        if self.layer is not None:
+            self.layer.willBeDeleted.disconnect(self.onLayerDeleted)
+            self.layer = None
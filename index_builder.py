@@ -0,0 +1,303 @@
+"""
+Budowa offline'owego indeksu punktów adresowych (*.rai) z wiersza poleceń.
+
+Obsługiwane źródła:
+    prg-csv  - punkty adresowe PRG w CSV (współrzędne w EPSG:2180 lub 4326),
+    prg-gml  - punkty adresowe PRG w GML (PRG_PunktAdresowy),
+    osm-pbf  - wyciąg OpenStreetMap (wymaga pakietu osmium / pyosmium).
+
+Plik źródłowy czytany jest strumieniowo, a punkty spoza granic Polski
+(MIN_LAT/MAX_LAT/MIN_LON/MAX_LON) są pomijane. Gotowy indeks wskazuje się
+jako zbiór danych offline we wtyczce.
+
+Przykład (z katalogu nadrzędnego względem katalogu wtyczki):
+    python -m reveal_address_plugin.index_builder PRG_PunktyAdresowe.gml -o adresy.rai
+"""
+from xml.etree.ElementTree import iterparse
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+
+from .constants import LOCAL_FIELD_NAMES
+from .address_index import AddressIndexWriter, INDEX_SUFFIX
+
+FORMAT_PRG_CSV = 'prg-csv'
+FORMAT_PRG_GML = 'prg-gml'
+FORMAT_OSM_PBF = 'osm-pbf'
+
+# indeksy położeń węzłów OSM zapisywane w pliku zamiast w pamięci
+NODE_INDEX_SPARSE = 'sparse_file_array'
+NODE_INDEX_DENSE = 'dense_file_array'
+NODE_INDEX_SUFFIX = '.nodes'
+
+# PUWG 1992 (EPSG:2180): odwzorowanie poprzeczne Merkatora na elipsoidzie GRS80
+GRS80_A = 6378137.0
+GRS80_F = 1 / 298.257222101
+PUWG1992_K0 = 0.9993
+PUWG1992_LON0 = math.radians(19.0)
+PUWG1992_FALSE_EASTING = 500000.0
+PUWG1992_FALSE_NORTHING = -5300000.0
+
+_N = GRS80_F / (2 - GRS80_F)
+_A = GRS80_A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64)
+_BETA = (_N / 2 - 2 * _N ** 2 / 3 + 37 * _N ** 3 / 96,
+         _N ** 2 / 48 + _N ** 3 / 15,
+         17 * _N ** 3 / 480)
+_DELTA = (2 * _N - 2 * _N ** 2 / 3 - 2 * _N ** 3,
+          7 * _N ** 2 / 3 - 8 * _N ** 3 / 5,
+          56 * _N ** 3 / 15)
+
+
+def puwg1992ToWgs84(northing, easting):
+    """
+    Przelicza współrzędne PUWG 1992 (x - północ, y - wschód, jak w EPSG:2180)
+    na (lat, lon) w stopniach; szereg Krügera, dokładność rzędu milimetrów
+    """
+    xi = (northing - PUWG1992_FALSE_NORTHING) / (PUWG1992_K0 * _A)
+    eta = (easting - PUWG1992_FALSE_EASTING) / (PUWG1992_K0 * _A)
+    xi_prime, eta_prime = xi, eta
+    for j, beta in enumerate(_BETA, 1):
+        xi_prime -= beta * math.sin(2 * j * xi) * math.cosh(2 * j * eta)
+        eta_prime -= beta * math.cos(2 * j * xi) * math.sinh(2 * j * eta)
+    chi = math.asin(math.sin(xi_prime) / math.cosh(eta_prime))
+    lat = chi + sum(delta * math.sin(2 * j * chi) for j, delta in enumerate(_DELTA, 1))
+    lon = PUWG1992_LON0 + math.atan2(math.sinh(eta_prime), math.cos(xi_prime))
+    return math.degrees(lat), math.degrees(lon)
+
+
+def matchFields(names):
+    """
+    Dopasowuje nazwy kolumn źródła do pól adresu (LOCAL_FIELD_NAMES)
+    """
+    lowered = {name.lower(): name for name in names}
+    matched = {}
+    for address_field, candidates in LOCAL_FIELD_NAMES.items():
+        for candidate in candidates:
+            if candidate in lowered:
+                matched[address_field] = lowered[candidate]
+                break
+    return matched
+
+
+class PrgCsvReader:
+    """
+    Czyta punkty adresowe z CSV. Jeśli są kolumny lat/lon, współrzędne
+    traktowane są jako EPSG:4326, w przeciwnym razie kolumny x/y jako
+    EPSG:2180 (x - północ, y - wschód).
+    """
+
+    def __init__(self, stream, delimiter=None, x_field='x', y_field='y'):
+        header = stream.readline()
+        if delimiter is None:
+            delimiter = ';' if header.count(';') > header.count(',') else ','
+        names = next(csv.reader([header], delimiter=delimiter))
+        self.reader = csv.DictReader(stream, fieldnames=names, delimiter=delimiter)
+        self.fields = matchFields(names)
+        lowered = {name.lower(): name for name in names}
+        if 'lat' in lowered and 'lon' in lowered:
+            self.coordinates = (lowered['lat'], lowered['lon'], False)
+        elif x_field.lower() in lowered and y_field.lower() in lowered:
+            self.coordinates = (lowered[x_field.lower()], lowered[y_field.lower()], True)
+        else:
+            raise ValueError(f"Brak kolumn współrzędnych (lat/lon lub {x_field}/{y_field})")
+
+    def __iter__(self):
+        first, second, projected = self.coordinates
+        for row in self.reader:
+            try:
+                a, b = float(row[first].replace(',', '.')), float(row[second].replace(',', '.'))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            lat, lon = puwg1992ToWgs84(a, b) if projected else (a, b)
+            yield lat, lon, {name: row[column] for name, column in self.fields.items()}
+
+
+class PrgGmlReader:
+    """
+    Czyta obiekty PRG_PunktAdresowy z pliku GML. Przetworzone elementy są
+    usuwane z drzewa, więc zużycie pamięci nie zależy od rozmiaru pliku.
+    """
+
+    FEATURE_SUFFIX = 'punktadresowy'
+    # kolejność jednostek administracyjnych: kraj, województwo, powiat, gmina
+    ADMINISTRATIVE_FIELDS = (None, 'state', 'county', 'municipality')
+
+    def __init__(self, source):
+        self.source = source
+        self.element_fields = {}
+        for address_field, candidates in LOCAL_FIELD_NAMES.items():
+            for candidate in candidates:
+                self.element_fields.setdefault(candidate, address_field)
+
+    @staticmethod
+    def localName(tag):
+        return tag.rsplit('}', 1)[-1].lower()
+
+    def parseFeature(self, element):
+        fields = {}
+        administrative = []
+        position = None
+        for child in element.iter():
+            name = self.localName(child.tag)
+            if name == 'pos' and position is None and child.text:
+                position = child.text.split()
+                srs = self.srsName(element)
+            elif name.startswith('jednostkaadm') and child.text:
+                administrative.append(child.text.strip())
+            elif name in self.element_fields and child.text and child.text.strip():
+                fields.setdefault(self.element_fields[name], child.text.strip())
+        for address_field, value in zip(self.ADMINISTRATIVE_FIELDS, administrative):
+            if address_field is not None:
+                fields.setdefault(address_field, value)
+        if position is None or len(position) < 2:
+            return None
+        a, b = float(position[0]), float(position[1])
+        # EPSG:2180 w GML ma kolejność osi północ, wschód; EPSG:4326 - lat, lon
+        lat, lon = (a, b) if '4326' in srs else puwg1992ToWgs84(a, b)
+        return lat, lon, fields
+
+    def srsName(self, element):
+        for child in element.iter():
+            for key, value in child.attrib.items():
+                if self.localName(key) == 'srsname':
+                    return value
+        return ''
+
+    def __iter__(self):
+        root = None
+        for event, element in iterparse(self.source, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event == 'end' and self.localName(element.tag).endswith(self.FEATURE_SUFFIX):
+                point = self.parseFeature(element)
+                root.clear()
+                if point is not None:
+                    yield point
+
+
+class OsmPbfReader:
+    """
+    Czyta węzły i linie z tagiem addr:housenumber z wyciągu OSM.
+    Dla linii (budynków) używany jest środek ciężkości wierzchołków.
+
+    Położenia węzłów przechowywane są w pliku index_path (indeks
+    node_index osmium), usuwanym po odczycie, więc zużycie pamięci nie
+    rośnie z rozmiarem wyciągu. sparse_file_array wystarcza dla wyciągów
+    krajowych; dense_file_array jest wydajniejszy dla całej planety.
+    """
+
+    TAGS = {
+        'house_number': ('addr:housenumber',),
+        'street': ('addr:street', 'addr:place'),
+        'postcode': ('addr:postcode',),
+        'city': ('addr:city', 'addr:place'),
+        'teryt_simc': ('addr:city:simc',),
+        'teryt_ulic': ('addr:street:sym_ul',),
+    }
+
+    def __init__(self, path, index_path=None, node_index=NODE_INDEX_SPARSE):
+        try:
+            import osmium
+        except ImportError:
+            raise ImportError(
+                "Odczyt plików OSM PBF wymaga pakietu osmium (pip install osmium)")
+        self.osmium = osmium
+        self.path = path
+        self.index_path = index_path or os.path.splitext(path)[0] + NODE_INDEX_SUFFIX
+        self.node_index = node_index
+
+    def fields(self, tags):
+        fields = {}
+        for address_field, keys in self.TAGS.items():
+            for key in keys:
+                value = tags.get(key)
+                if value:
+                    fields[address_field] = value
+                    break
+        return fields
+
+    def __iter__(self):
+        osmium = self.osmium
+        processor = osmium.FileProcessor(self.path) \
+            .with_locations(f"{self.node_index},{self.index_path}") \
+            .with_filter(osmium.filter.KeyFilter('addr:housenumber'))
+        try:
+            yield from self.points(processor)
+        finally:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+    def points(self, processor):
+        for obj in processor:
+            if obj.is_node():
+                if not obj.location.valid():
+                    continue
+                lat, lon = obj.location.lat, obj.location.lon
+            elif obj.is_way():
+                nodes = [node.location for node in obj.nodes if node.location.valid()]
+                if len(nodes) > 1 and nodes[0] == nodes[-1]:
+                    nodes = nodes[:-1]
+                if not nodes:
+                    continue
+                lat = sum(location.lat for location in nodes) / len(nodes)
+                lon = sum(location.lon for location in nodes) / len(nodes)
+            else:
+                continue
+            yield lat, lon, self.fields(obj.tags)
+
+
+def detectFormat(path):
+    extension = path.lower()
+    if extension.endswith('.pbf'):
+        return FORMAT_OSM_PBF
+    if extension.endswith(('.gml', '.xml')):
+        return FORMAT_PRG_GML
+    return FORMAT_PRG_CSV
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='reveal_address_index',
+        description='Budowa indeksu punktów adresowych do wyszukiwania offline.')
+    parser.add_argument('input', help='plik PRG (CSV/GML) lub wyciąg OSM (PBF)')
+    parser.add_argument('-o', '--output', help=f'plik indeksu (domyślnie *{INDEX_SUFFIX})')
+    parser.add_argument('--format', choices=(FORMAT_PRG_CSV, FORMAT_PRG_GML, FORMAT_OSM_PBF),
+                        help='format wejścia (domyślnie według rozszerzenia)')
+    parser.add_argument('--delimiter', help='separator CSV (domyślnie wykrywany)')
+    parser.add_argument('--x-field', default='x', help='kolumna współrzędnej x (EPSG:2180, północ)')
+    parser.add_argument('--y-field', default='y', help='kolumna współrzędnej y (EPSG:2180, wschód)')
+    parser.add_argument('--node-index', choices=(NODE_INDEX_SPARSE, NODE_INDEX_DENSE),
+                        default=NODE_INDEX_SPARSE,
+                        help='plikowy indeks położeń węzłów OSM (tymczasowy, obok pliku indeksu)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    data_format = args.format or detectFormat(args.input)
+    output = args.output or os.path.splitext(args.input)[0] + INDEX_SUFFIX
+    started = time.monotonic()
+
+    writer = AddressIndexWriter(output)
+    if data_format == FORMAT_OSM_PBF:
+        writer.addAll(OsmPbfReader(args.input, output + NODE_INDEX_SUFFIX, args.node_index))
+    elif data_format == FORMAT_PRG_GML:
+        with open(args.input, 'rb') as stream:
+            writer.addAll(PrgGmlReader(stream))
+    else:
+        with open(args.input, 'r', encoding='utf-8-sig', newline='') as stream:
+            writer.addAll(PrgCsvReader(stream, args.delimiter, args.x_field, args.y_field))
+    count, skipped = writer.count, writer.skipped
+    writer.finish()
+
+    print(f"Zapisano {count} punktów adresowych do {output} "
+          f"(pominięto {skipped} spoza zasięgu) w {time.monotonic() - started:.1f} s",
+          file=sys.stderr)
+    return count
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+from qgis.gui import QgsDockWidget
+from qgis.PyQt.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                                 QTableWidget, QTableWidgetItem, QPushButton,
+                                 QFileDialog, QAbstractItemView)
+from qgis.PyQt.QtCore import QCoreApplication, pyqtSignal
+import csv
+
+from .utils import QgsTools
+from .address_record import AddressRecord, NO_ADDRESS
+
+
+class LineResultsDock(QgsDockWidget):
+    """
+    Tabela adresów wzdłuż linii. Kolejne próbki o tym samym adresie łączone
+    są w jeden wiersz z zakresem odległości od początku linii.
+    """
+
+    COLUMNS = ('from_m', 'to_m', 'sample_lat', 'sample_lon')
+    EXPORT_FIELDS = COLUMNS + AddressRecord.ATTRIBUTE_FIELDS
+
+    cancelRequested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName('RevealAddressLineResultsDock')
+        self.setWindowTitle(self.tr('Addresses along line'))
+        self.rows = []
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(
+            [self.tr('From [m]'), self.tr('To [m]'), self.tr('Address')])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+
+        self.progress = QLabel()
+        self.cancel_button = QPushButton(self.tr('Stop'))
+        self.cancel_button.clicked.connect(self.cancelRequested)
+        self.export_button = QPushButton(self.tr('Export CSV…'))
+        self.export_button.clicked.connect(self.exportCsv)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.progress)
+        buttons.addStretch()
+        buttons.addWidget(self.cancel_button)
+        buttons.addWidget(self.export_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+    def tr(self, message):
+        return QCoreApplication.translate('LineResultsDock', message)
+
+    def clear(self):
+        self.rows = []
+        self.table.setRowCount(0)
+        self.progress.clear()
+        if not self.isVisible():
+            self.show()
+
+    def addResult(self, sample, record, done, total):
+        """
+        Dopisuje wynik próbki (lat, lon, odległość); record None oznacza błąd
+        """
+        lat, lon, chainage = sample
+        text = record.text() if record is not None else NO_ADDRESS
+        self.progress.setText(self.tr('{} / {} points').format(done, total))
+        if self.rows and self.rows[-1][4] == text:
+            # ten sam adres co poprzednia próbka - wydłużenie zakresu
+            self.rows[-1][1] = chainage
+            self.table.item(len(self.rows) - 1, 1).setText(f"{chainage:.0f}")
+            return
+
+        self.rows.append([chainage, chainage, lat, lon, text, record])
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for column, value in enumerate((f"{chainage:.0f}", f"{chainage:.0f}", text)):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.scrollToBottom()
+
+    def exportCsv(self):
+        if not self.rows:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr('Export addresses'), 'addresses_along_line.csv',
+            self.tr('CSV (*.csv)'))
+        if not path:
+            return
+        empty = AddressRecord()
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                writer = csv.writer(stream)
+                writer.writerow(self.EXPORT_FIELDS)
+                for from_m, to_m, lat, lon, _, record in self.rows:
+                    writer.writerow(
+                        [round(from_m, 1), round(to_m, 1), lat, lon]
+                        + list((record or empty).attributes()))
+        except OSError as e:
+            QgsTools.pushLogCritical(f"Nie można zapisać pliku {path}: {e}")
+            return
+        QgsTools.pushLogInfo(f"Zapisano {len(self.rows)} adresów do {path}")
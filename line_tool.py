@@ -0,0 +1,170 @@
+"""
+Wyszukiwanie adresów wzdłuż narysowanej linii lub granicy poligonu.
+
+RevealAddressLineTool pozwala narysować linię (lewy przycisk - kolejne
+wierzchołki, prawy - zakończenie). AlongLineLookup rozwiązuje punkty
+próbkowania po kolei, przez ten sam silnik i harmonogram zapytań co
+narzędzie punktowe, a każdy wynik od razu trafia do tabeli.
+"""
+from qgis.core import Qgis, QgsWkbTypes, QgsPointXY, QgsGeometry
+from qgis.gui import QgsMapTool, QgsRubberBand
+from qgis.PyQt.QtCore import Qt, QObject, QTimer, pyqtSignal
+from qgis.PyQt.QtGui import QColor
+from collections import deque
+from functools import partial
+
+from .utils import QgsTools
+
+
+try:
+    LINE_GEOMETRY = Qgis.GeometryType.Line
+    POLYGON_GEOMETRY = Qgis.GeometryType.Polygon
+except AttributeError:
+    LINE_GEOMETRY = QgsWkbTypes.LineGeometry
+    POLYGON_GEOMETRY = QgsWkbTypes.PolygonGeometry
+
+
+class RevealAddressLineTool(QgsMapTool):
+    # wierzchołki w układzie mapy, czy linia jest zamknięta (poligon)
+    geometryDrawn = pyqtSignal(list, bool)
+
+    def __init__(self, canvas, closed=False):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.closed = closed
+        self.points = []
+        self.rubber_band = QgsRubberBand(
+            canvas, POLYGON_GEOMETRY if closed else LINE_GEOMETRY)
+        self.rubber_band.setColor(QColor(220, 30, 30, 160))
+        self.rubber_band.setFillColor(QColor(220, 30, 30, 40))
+        self.rubber_band.setWidth(2)
+        self.setCursor(Qt.CursorShape.CrossCursor)
+
+    def minimumPoints(self):
+        return 3 if self.closed else 2
+
+    def updateRubberBand(self, cursor=None):
+        points = self.points + ([cursor] if cursor is not None else [])
+        if self.closed:
+            self.rubber_band.setToGeometry(QgsGeometry.fromPolygonXY([points]), None)
+        else:
+            self.rubber_band.setToGeometry(QgsGeometry.fromPolylineXY(points), None)
+
+    def canvasMoveEvent(self, event):
+        if self.points:
+            self.updateRubberBand(self.toMapCoordinates(event.pos()))
+
+    def canvasReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.RightButton:
+            self.finish()
+            return
+        self.points.append(QgsPointXY(self.toMapCoordinates(event.pos())))
+        self.updateRubberBand()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.reset()
+        elif event.key() == Qt.Key.Key_Backspace and self.points:
+            self.points.pop()
+            self.updateRubberBand()
+        elif event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.finish()
+
+    def finish(self):
+        if len(self.points) < self.minimumPoints():
+            return
+        points = self.points
+        self.points = []
+        self.updateRubberBand()
+        self.geometryDrawn.emit(points, self.closed)
+
+    def reset(self):
+        self.points = []
+        self.rubber_band.reset(POLYGON_GEOMETRY if self.closed else LINE_GEOMETRY)
+
+    def deactivate(self):
+        self.reset()
+        super().deactivate()
+
+    def cleanup(self):
+        self.reset()
+        self.canvas.scene().removeItem(self.rubber_band)
+
+
+class AlongLineLookup(QObject):
+    """
+    Kolejno rozwiązuje punkty próbkowania (lat, lon, odległość) i przekazuje
+    wyniki do tabeli. Kolejne zapytanie wysyłane jest po otrzymaniu
+    poprzedniego, więc wyniki pojawiają się w kolejności wzdłuż linii.
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self, backend, table, cache=None, cache_radius=0, parent=None):
+        super().__init__(parent)
+        self.backend = backend
+        self.table = table
+        self.cache = cache
+        self.cache_radius = cache_radius
+        self.samples = deque()
+        self.handle = None
+        self.total = 0
+        # kolejny punkt w następnej iteracji pętli zdarzeń - bez rekurencji
+        # przy wynikach zwracanych synchronicznie (pamięć podręczna, silnik
+        # offline); jeden licznik, zatrzymywany w cancel(), więc nie mogą
+        # działać dwa łańcuchy wyszukiwań naraz
+        self.next_timer = QTimer(self)
+        self.next_timer.setSingleShot(True)
+        self.next_timer.setInterval(0)
+        self.next_timer.timeout.connect(self.next)
+
+    def start(self, samples):
+        self.cancel()
+        self.samples = deque(samples)
+        self.total = len(samples)
+        self.table.clear()
+        QgsTools.pushLogInfo(f"Wyszukiwanie adresów dla {self.total} punktów wzdłuż linii")
+        self.next()
+
+    def cancel(self):
+        self.next_timer.stop()
+        self.samples.clear()
+        if self.handle is not None:
+            self.backend.cancel(self.handle)
+            self.handle = None
+
+    def isRunning(self):
+        return bool(self.samples) or self.handle is not None or self.next_timer.isActive()
+
+    def setBackend(self, backend):
+        remaining = list(self.samples)
+        self.cancel()
+        self.backend = backend
+        self.samples = deque(remaining)
+        if self.samples:
+            self.next()
+
+    def next(self):
+        if not self.samples:
+            self.finished.emit()
+            return
+        sample = self.samples.popleft()
+        lat, lon, _ = sample
+        if self.cache is not None and self.backend.cacheable:
+            address = self.cache.nearest(lat, lon, self.cache_radius)
+            if address is not None:
+                self.showResult(sample, address)
+                return
+        self.handle = self.backend.reverse(lat, lon, partial(self.handleResult, sample))
+
+    def handleResult(self, sample, address, error):
+        self.handle = None
+        if error is not None:
+            QgsTools.pushLogWarning(f"Błąd zapytania dla {sample[0]:.6f}, {sample[1]:.6f}: {error}")
+        elif self.cache is not None and self.backend.cacheable:
+            self.cache.put(sample[0], sample[1], address)
+        self.showResult(sample, address)
+
+    def showResult(self, sample, address):
+        self.table.addResult(sample, address, self.total - len(self.samples), self.total)
+        self.next_timer.start()
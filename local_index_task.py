@@ -0,0 +1,82 @@
+"""
+Zadanie w tle budujące indeks *.rai ze zbioru punktów adresowych
+(np. GeoPackage z PRG) wskazanego jako zbiór danych offline.
+
+Punkty czytane są strumieniowo i zapisywane przez AddressIndexWriter, więc
+ani wątek główny, ani pamięć nie zależą od rozmiaru zbioru. Geometrie
+wieloczęściowe (MultiPoint w eksportach PRG) zastępowane są punktem
+leżącym na geometrii.
+"""
+from qgis.core import (Qgis, QgsTask, QgsVectorLayer, QgsCoordinateTransform,
+                       QgsCoordinateReferenceSystem, QgsVariantUtils, QgsWkbTypes)
+
+from .utils import QgsTools
+from .constants import EPSG
+from .address_index import AddressIndexWriter
+from .index_builder import matchFields
+
+try:
+    POINT_GEOMETRY = Qgis.GeometryType.Point
+except AttributeError:
+    POINT_GEOMETRY = QgsWkbTypes.PointGeometry
+
+
+class LocalIndexTask(QgsTask):
+
+    def __init__(self, source_path, index_path, transform_context):
+        super().__init__(f"Reveal Address: indeks {source_path}", QgsTask.CanCancel)
+        self.source_path = source_path
+        self.index_path = index_path
+        self.transform_context = transform_context
+        self.count = 0
+        self.skipped = 0
+        self.error = None
+
+    def run(self):
+        layer = QgsVectorLayer(self.source_path, 'address_points', 'ogr')
+        if not layer.isValid():
+            self.error = f"Nie można wczytać zbioru punktów adresowych: {self.source_path}"
+            return False
+        coord_transform = QgsCoordinateTransform(
+            layer.crs(), QgsCoordinateReferenceSystem.fromEpsgId(EPSG), self.transform_context)
+        names = [field.name() for field in layer.fields()]
+        field_indexes = {name: names.index(column)
+                         for name, column in matchFields(names).items()}
+        total = layer.featureCount() or 1
+
+        writer = AddressIndexWriter(self.index_path)
+        try:
+            for number, feature in enumerate(layer.getFeatures()):
+                if self.isCanceled():
+                    return False
+                geometry = feature.geometry()
+                if geometry.isNull() or geometry.isEmpty():
+                    continue
+                if geometry.type() == POINT_GEOMETRY and not geometry.isMultipart():
+                    point = geometry.asPoint()
+                else:
+                    point = geometry.pointOnSurface().asPoint()
+                point = coord_transform.transform(point)
+                attributes = feature.attributes()
+                fields = {
+                    name: str(attributes[idx])
+                    for name, idx in field_indexes.items()
+                    if not QgsVariantUtils.isNull(attributes[idx]) and attributes[idx] != ''
+                }
+                writer.add(point.y(), point.x(), fields)
+                if number % 10000 == 0:
+                    self.setProgress(number * 100.0 / total)
+            self.count, self.skipped = writer.count, writer.skipped
+            writer.finish()
+        except (OSError, ValueError) as e:
+            self.error = f"Nie można zbudować indeksu {self.index_path}: {e}"
+            return False
+        return True
+
+    def finished(self, result):
+        if result:
+            QgsTools.pushLogInfo(
+                f"Zbudowano indeks {self.count} punktów adresowych {self.index_path} "
+                f"(pominięto {self.skipped} spoza zasięgu)")
+        elif self.error:
+            QgsTools.pushLogCritical(self.error)
@@ -0,0 +1,61 @@
+"""
+Budowanie zapytań do API Nominatim i dekodowanie odpowiedzi.
+
+Moduł nie zależy od QGIS, dzięki czemu może być używany zarówno
+przez narzędzie mapy, jak i przez algorytm Processing.
+"""
+import json
+from urllib.parse import urlencode
+
+from . import PLUGIN_NAME, PLUGIN_VERSION
+from .constants import NOMINATIM_URL, DEFAULT_ZOOM, DEFAULT_ADDRESS_DETAILS
+from .address_record import AddressRecord
+
+USER_AGENT = f"{PLUGIN_NAME.replace(' ', '')}/{PLUGIN_VERSION} (QGIS plugin)"
+
+
+def reverseUrl(lat, lon, base_url=NOMINATIM_URL, zoom=DEFAULT_ZOOM,
+               address_details=DEFAULT_ADDRESS_DETAILS):
+    """
+    Zwraca adres URL zapytania reverse dla współrzędnych w EPSG:4326.
+    Dodatkowe tagi (extratags) zawierają m.in. kody TERYT.
+    """
+    query = urlencode({
+        'format': 'json', 'lat': lat, 'lon': lon, 'zoom': zoom,
+        'addressdetails': int(address_details), 'extratags': 1,
+    })
+    return f"{base_url.rstrip('/')}/reverse?{query}"
+
+
+def searchUrl(query, limit, base_url=NOMINATIM_URL,
+              address_details=DEFAULT_ADDRESS_DETAILS):
+    """
+    Zwraca adres URL wyszukiwania (geokodowania) tekstu query
+    """
+    params = urlencode({'format': 'json', 'q': query, 'limit': limit,
+                        'addressdetails': int(address_details)})
+    return f"{base_url.rstrip('/')}/search?{params}"
+
+
+def requestHeaders(user_agent=USER_AGENT, accept_language=''):
+    """
+    Zwraca nagłówki wysyłane z każdym zapytaniem do serwera
+    """
+    headers = {'User-Agent': user_agent or USER_AGENT}
+    if accept_language:
+        headers['Accept-Language'] = accept_language
+    return headers
+
+
+def decodeReply(data):
+    """
+    Dekoduje surową odpowiedź serwera (bytes) do słownika
+    """
+    return json.loads(str(data, 'utf-8'))
+
+
+def parseReverse(data):
+    """
+    Dekoduje odpowiedź reverse (bytes) do AddressRecord
+    """
+    return AddressRecord.fromNominatim(decodeReply(data))
@@ -0,0 +1,119 @@
+"""
+Klient API Nominatim niezależny od QGIS i Qt.
+
+Używany przez wiersz poleceń (cli.py) do przetwarzania wsadowego bez
+interfejsu graficznego. Metody klienta są bezpieczne wątkowo: wspólny
+limit ogranicza łączną częstotliwość zapytań wszystkich wątków, a odpowiedź
+429/503 otrzymana w jednym wątku wstrzymuje zapytania pozostałych.
+"""
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+import gzip
+import threading
+import time
+
+from .constants import (NOMINATIM_URL, DEFAULT_REQUEST_RATE, DEFAULT_MAX_RETRIES,
+                        DEFAULT_ZOOM, DEFAULT_ADDRESS_DETAILS,
+                        DEFAULT_ACCEPT_LANGUAGE)
+from .nominatim import USER_AGENT, reverseUrl, parseReverse, requestHeaders
+from .rate_limit import (RateLimiter, retryAfterSeconds, backoffDelay,
+                         RETRY_STATUSES)
+
+
+class NominatimClient:
+    """
+    Każdy wątek utrzymuje własne trwałe połączenie (keep-alive) z serwerem,
+    a odpowiedzi przesyłane są w postaci skompresowanej (gzip)
+    """
+
+    def __init__(self, base_url=NOMINATIM_URL, rate=DEFAULT_REQUEST_RATE,
+                 max_retries=DEFAULT_MAX_RETRIES, timeout=30,
+                 user_agent=USER_AGENT, accept_language=DEFAULT_ACCEPT_LANGUAGE,
+                 zoom=DEFAULT_ZOOM, address_details=DEFAULT_ADDRESS_DETAILS):
+        self.base_url = base_url
+        # kubełek tokenów i czas wstrzymania (paused_until) pod wspólną blokadą
+        self.limit = RateLimiter(rate)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.zoom = zoom
+        self.address_details = address_details
+        self.headers = requestHeaders(user_agent, accept_language)
+        self.headers['Accept-Encoding'] = 'gzip'
+        self.local = threading.local()
+
+    def acquire(self):
+        """
+        Czeka na koniec wstrzymania i na token; zapytania wszystkich wątków
+        dzielą jeden limit
+        """
+        while not self.limit.tryAcquire():
+            time.sleep(max(self.limit.delay(), 0.001))
+
+    def reverse(self, lat, lon):
+        """
+        Zwraca AddressRecord. Błędy sieci zgłaszane są wyjątkiem OSError.
+        """
+        return parseReverse(self.get(
+            reverseUrl(lat, lon, self.base_url, self.zoom, self.address_details)))
+
+    def connection(self, parts):
+        """
+        Zwraca połączenie bieżącego wątku z serwerem parts.netloc
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.netloc != (parts.scheme, parts.netloc):
+            if connection is not None:
+                connection.close()
+            connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+            connection = connection_class(parts.netloc, timeout=self.timeout)
+            self.local.connection = connection
+            self.local.netloc = (parts.scheme, parts.netloc)
+        return connection
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def request(self, url):
+        """
+        Wysyła zapytanie GET; zerwane połączenie keep-alive jest raz odnawiane
+        """
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else '')
+        for reconnect in (True, False):
+            connection = self.connection(parts)
+            try:
+                connection.request('GET', path or '/', headers=self.headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (HTTPException, ConnectionError) as e:
+                self.close()
+                if not reconnect:
+                    raise OSError(f"Request error: {e}") from e
+                continue
+            if response.getheader('Content-Encoding', '').lower() == 'gzip':
+                data = gzip.decompress(data)
+            if response.will_close:
+                self.close()
+            return response, data
+
+    def get(self, url):
+        """
+        Zwraca treść odpowiedzi (bytes), ponawiając zapytania odrzucone kodem 429/503
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.acquire()
+            response, data = self.request(url)
+            if response.status < 400:
+                return data
+            error = HTTPError(url, response.status, response.reason, response.headers, None)
+            if response.status not in RETRY_STATUSES or attempt > self.max_retries:
+                raise error
+            delay = retryAfterSeconds(response.getheader('Retry-After'))
+            # acquire() przed kolejną próbą czeka na koniec wstrzymania
+            self.limit.pause(delay if delay is not None else backoffDelay(attempt))
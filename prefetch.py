@@ -0,0 +1,94 @@
+from qgis.core import QgsPointXY, QgsCoordinateReferenceSystem
+from qgis.PyQt.QtCore import QObject, QTimer
+from functools import partial
+
+from .utils import QgsTools
+from .constants import (DEFAULT_PREFETCH_GRID, DEFAULT_PREFETCH_MAX_SCALE,
+                        PREFETCH_DELAY, EPSG)
+from .request_scheduler import PRIORITY_BACKGROUND
+from .transforms import TransformCache, transformPoints
+
+
+class ExtentPrefetcher(QObject):
+    """
+    Wstępnie wypełnia pamięć podręczną adresami z regularnej siatki punktów
+    w widocznym zasięgu mapy. Zapytania wysyłane są z niskim priorytetem,
+    więc nie opóźniają zapytań użytkownika, i są anulowane po zmianie zasięgu.
+    """
+
+    def __init__(self, canvas, cache, backend, cache_radius=0,
+                 grid_size=DEFAULT_PREFETCH_GRID,
+                 max_scale=DEFAULT_PREFETCH_MAX_SCALE, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.cache = cache
+        self.backend = backend
+        self.cache_radius = cache_radius
+        self.grid_size = grid_size
+        self.max_scale = max_scale
+        self.handles = []
+        self.transform_cache = TransformCache()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PREFETCH_DELAY)
+        self.timer.timeout.connect(self.prefetch)
+
+    def start(self):
+        self.canvas.extentsChanged.connect(self.onExtentsChanged)
+        self.timer.start()
+
+    def stop(self):
+        try:
+            self.canvas.extentsChanged.disconnect(self.onExtentsChanged)
+        except TypeError:
+            pass
+        self.cancel()
+
+    def setBackend(self, backend):
+        self.cancel()
+        self.backend = backend
+
+    def onExtentsChanged(self):
+        self.cancel()
+        self.timer.start()
+
+    def cancel(self):
+        self.timer.stop()
+        for handle in self.handles:
+            self.backend.cancel(handle)
+        self.handles = []
+
+    def gridPoints(self, extent):
+        step_x = extent.width() / self.grid_size
+        step_y = extent.height() / self.grid_size
+        return [
+            QgsPointXY(extent.xMinimum() + (col + 0.5) * step_x,
+                       extent.yMinimum() + (row + 0.5) * step_y)
+            for row in range(self.grid_size)
+            for col in range(self.grid_size)
+        ]
+
+    def prefetch(self):
+        if not self.backend.cacheable or self.canvas.scale() > self.max_scale:
+            return
+
+        map_settings = self.canvas.mapSettings()
+        self.transform_cache.clear(map_settings.transformContext())
+        coord_transform = self.transform_cache.transform(
+            map_settings.destinationCrs(), QgsCoordinateReferenceSystem.fromEpsgId(EPSG))
+        points = transformPoints(coord_transform, self.gridPoints(self.canvas.extent()))
+
+        for point in points:
+            lat, lon = point.y(), point.x()
+            if self.cache.nearest(lat, lon, self.cache_radius) is not None:
+                continue
+            self.handles.append(self.backend.reverse(
+                lat, lon, partial(self.store, lat, lon), PRIORITY_BACKGROUND))
+        if self.handles:
+            QgsTools.pushLogInfo(
+                f"Wstępne pobieranie adresów: {len(self.handles)} punktów w zasięgu mapy.")
+
+    def store(self, lat, lon, address, error):
+        if error is None:
+            self.cache.put(lat, lon, address)
@@ -0,0 +1,24 @@
+from qgis.core import QgsProcessingProvider
+from qgis.PyQt.QtGui import QIcon
+import os
+
+from .reverse_geocode_algorithm import ReverseGeocodeAlgorithm
+
+
+class RevealAddressProvider(QgsProcessingProvider):
+
+    def __init__(self, scheduler_factory=None):
+        super().__init__()
+        self.scheduler_factory = scheduler_factory
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(ReverseGeocodeAlgorithm(self.scheduler_factory))
+
+    def id(self):
+        return 'revealaddress'
+
+    def name(self):
+        return 'Reveal Address'
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'icons', 'icon.svg'))
@@ -9,11 +9,13 @@ import os
 import unicodedata
 
 from .constants import INDUSTRIES, FEED_URL
+from .feed_settings import (registerFeedEntries, removeDismissedEntries,
+                            isFetchTimeRegistered)
 
 
 class QgisFeed:
-    def __init__(self, selected_industry, plugin_name):
-        self.s = QgsSettings()
+    def __init__(self, selected_industry, plugin_name, settings=None):
+        self.s = settings or QgsSettings()
         self.industries_dict = INDUSTRIES
 
         self.industry_decoded = [key for key, val in self.industries_dict.items() if val == selected_industry]
@@ -26,8 +28,6 @@ class QgisFeed:
             feedUrl=QUrl(self.es_url)
         )
         self.industry_url_short = self.shortenUrl(self.es_url)
-        self.envirosolutionsFeedPattern_old = re.compile(f"core/NewsFeed/{self.industry_url_short}")
-        self.envirosolutionsFeedPattern_new = re.compile(f"app/news-feed/items/{self.industry_url_short}")
 
         self.parser.fetched.connect(self.registerFeed)
 
@@ -58,45 +58,19 @@ class QgisFeed:
         Function registers QGIS Feed
         """
         QgsMessageLog.logMessage('Registering feed')
-        for key in self.s.allKeys():
-            if self.envirosolutionsFeedPattern_old.match(key) or self.envirosolutionsFeedPattern_new.match(key):
-                finalKey = re.sub(r'(\d+)', r'9999\1', key.replace(self.industry_url_short, 'httpsfeedqgisorg'))
-                self.s.setValue(finalKey, self.s.value(key))
-
-            # ponizszy fragment odpowiada za mozliwosc ciaglego wyswietlania wiadomosci
-            # przy wlaczeniu qgis za kazdym razem
-
-            if 'cache' in key:
-                check_fetch = self.checkIsFetchTime()
-                if check_fetch is True: self.s.remove(key)
-
-        self.s.sync()
-        self.s.beginGroup(f"app/news-feed/items/{self.industry_url_short}")
-        self.s.setValue("last-fetch-time", 0)
+        registerFeedEntries(self.s, self.industry_url_short)
 
     def removeDismissed(self):
         """
         Function checks whether there was already initialized QGIS Feed
         """
-
-        for key in self.s.allKeys():
-            if self.envirosolutionsFeedPattern_old.match(key) or self.envirosolutionsFeedPattern_new.match(key):
-                # sprawdz czy jest odpowiadajacy w qgis
-                if self.s.contains(
-                        re.sub(
-                            r'(\d+)',
-                            r'9999\1',
-                            key.replace(self.industry_url_short, 'httpsfeedqgisorg')
-                        )
-                ):
-                    self.s.remove(key)
+        removeDismissedEntries(self.s, self.industry_url_short)
 
     def checkIsFetchTime(self):
         """
         Function check if the fetch time from QGIS Feed was already registered
         """
-        return self.s.contains(f"core/NewsFeed/{self.industry_url_short}/lastFetchTime") \
-            or self.s.contains(f"app/news-feed/items/{self.industry_url_short}/last-fetch-time")
+        return isFetchTimeRegistered(self.s, self.industry_url_short)
 
     def initFeed(self):
         """
@@ -0,0 +1,124 @@
+"""
+Ograniczanie częstotliwości zapytań (token bucket) i obsługa
+nagłówka Retry-After. Moduł nie zależy od QGIS.
+"""
+from email.utils import parsedate_to_datetime
+import threading
+import time
+
+MAX_BACKOFF = 300
+# kody odpowiedzi, po których zapytanie jest ponawiane
+RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """
+    Kubełek tokenów uzupełniany ze stałą szybkością rate tokenów na sekundę,
+    mieszczący co najwyżej burst tokenów
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """
+        Zwraca liczbę sekund do uzyskania kolejnego tokenu (0 gdy jest dostępny)
+        """
+        if self.rate <= 0:
+            return 0.0
+        self.refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        """
+        Pobiera token, jeśli jest dostępny. Zwraca True w razie powodzenia.
+        """
+        if self.rate <= 0:
+            return True
+        self.refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    """
+    Limit zapytań współdzielony przez wątki: kubełek tokenów oraz czas
+    wstrzymania zapytań po odpowiedzi 429/503 (paused_until)
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.paused_until = 0.0
+
+    def setRate(self, rate, burst=1):
+        with self.lock:
+            self.bucket = TokenBucket(rate, burst, self.clock)
+
+    def delay(self):
+        """
+        Zwraca liczbę sekund do możliwości wysłania zapytania (0 gdy można je wysłać)
+        """
+        with self.lock:
+            return max(0.0, self.paused_until - self.clock(), self.bucket.delay())
+
+    def tryAcquire(self):
+        """
+        Pobiera token, jeśli zapytania nie są wstrzymane i token jest dostępny
+        """
+        with self.lock:
+            if self.paused_until > self.clock():
+                return False
+            return self.bucket.consume()
+
+    def pause(self, seconds):
+        """
+        Wstrzymuje zapytania na seconds sekund (nie dłużej niż MAX_BACKOFF);
+        zwraca czas wstrzymania
+        """
+        seconds = min(MAX_BACKOFF, max(0.0, seconds))
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            return self.paused_until - self.clock()
+
+
+def retryAfterSeconds(value, now=None):
+    """
+    Zamienia wartość nagłówka Retry-After (liczba sekund lub data HTTP)
+    na liczbę sekund. Zwraca None dla wartości nieprawidłowych.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def backoffDelay(attempt, base=1.0):
+    """
+    Wykładnicze opóźnienie dla kolejnej próby (1, 2, 4, ... s)
+    """
+    return min(MAX_BACKOFF, base * 2 ** max(0, attempt - 1))
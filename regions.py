@@ -0,0 +1,168 @@
+"""
+Regiony (poligony w EPSG:4326) służące do kierowania zapytań do silników.
+
+Test przynależności punktu jest wstępnie przeliczany na regularnej
+siatce: komórki, przez które nie przechodzi granica, mają zapisany stan
+(wewnątrz / na zewnątrz), więc zwykle wystarcza sprawdzenie prostokąta
+ograniczającego i odczyt komórki. Tylko dla komórek granicznych liczone
+są przecięcia półprostej z krawędziami leżącymi w tym samym wierszu
+siatki, do pierwszej komórki o znanym stanie.
+Moduł nie zależy od QGIS.
+"""
+import bisect
+import json
+import math
+
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+DEFAULT_RESOLUTION = 64
+
+
+class Region:
+    """
+    Region złożony z pierścieni [(lat, lon), ...]. Przynależność liczona
+    jest regułą parzystości, więc otwory i wieloczęściowe poligony nie
+    wymagają osobnej obsługi.
+    """
+
+    def __init__(self, name, rings, resolution=DEFAULT_RESOLUTION):
+        self.name = name
+        self.edges = []
+        for ring in rings:
+            ring = list(ring)
+            for (lat1, lon1), (lat2, lon2) in zip(ring, ring[1:] + ring[:1]):
+                if lat1 != lat2:
+                    self.edges.append((lat1, lon1, lat2, lon2))
+        if not self.edges:
+            raise ValueError(f"Region {name} nie ma powierzchni")
+
+        lats = [lat for edge in self.edges for lat in (edge[0], edge[2])]
+        lons = [lon for edge in self.edges for lon in (edge[1], edge[3])]
+        self.bounds = (min(lats), max(lats), min(lons), max(lons))
+        self.rows = self.columns = resolution
+        self.cell_height = (self.bounds[1] - self.bounds[0]) / self.rows
+        self.cell_width = (self.bounds[3] - self.bounds[2]) / self.columns or 1.0
+        self.buildGrid()
+
+    @classmethod
+    def fromBounds(cls, name, min_lat, max_lat, min_lon, max_lon):
+        return cls(name, [[(min_lat, min_lon), (min_lat, max_lon),
+                           (max_lat, max_lon), (max_lat, min_lon)]], resolution=1)
+
+    def row(self, lat):
+        return min(max(int((lat - self.bounds[0]) / self.cell_height), 0), self.rows - 1)
+
+    def column(self, lon):
+        return min(max(int((lon - self.bounds[2]) / self.cell_width), 0), self.columns - 1)
+
+    def buildGrid(self):
+        # krawędzie przypisane do każdej komórki, którą może przecinać
+        # (prostokąt ograniczający krawędzi - przybliżenie od góry)
+        self.cell_edges = {}
+        self.row_edges = [[] for _ in range(self.rows)]
+        for idx, (lat1, lon1, lat2, lon2) in enumerate(self.edges):
+            first_row, last_row = sorted((self.row(lat1), self.row(lat2)))
+            first_col, last_col = sorted((self.column(lon1), self.column(lon2)))
+            for row in range(first_row, last_row + 1):
+                self.row_edges[row].append(idx)
+                for column in range(first_col, last_col + 1):
+                    self.cell_edges.setdefault((row, column), []).append(idx)
+
+        self.cells = []
+        for row in range(self.rows):
+            # przecięcia linii środkowej wiersza wyznaczają stan komórek bez krawędzi
+            lat = self.bounds[0] + (row + 0.5) * self.cell_height
+            crossings = sorted(self.crossings(lat, self.row_edges[row]))
+            states = bytearray(self.columns)
+            for column in range(self.columns):
+                if (row, column) in self.cell_edges:
+                    states[column] = BOUNDARY
+                    continue
+                lon = self.bounds[2] + (column + 0.5) * self.cell_width
+                right = len(crossings) - bisect.bisect_right(crossings, lon)
+                states[column] = INSIDE if right % 2 else OUTSIDE
+            self.cells.append(states)
+
+    def crossings(self, lat, edge_indexes):
+        """
+        Długości geograficzne przecięć równoleżnika lat z krawędziami
+        (reguła półotwarta - wierzchołek liczony jest raz)
+        """
+        for idx in edge_indexes:
+            lat1, lon1, lat2, lon2 = self.edges[idx]
+            if (lat1 <= lat) != (lat2 <= lat):
+                yield lon1 + (lat - lat1) / (lat2 - lat1) * (lon2 - lon1)
+
+    def contains(self, lat, lon):
+        min_lat, max_lat, min_lon, max_lon = self.bounds
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        row = self.row(lat)
+        states = self.cells[row]
+        column = self.column(lon)
+        if states[column] != BOUNDARY:
+            return states[column] == INSIDE
+
+        # półprosta na wschód do pierwszej komórki o znanym stanie
+        end = column
+        edges = set()
+        while end < self.columns and states[end] == BOUNDARY:
+            edges.update(self.cell_edges[(row, end)])
+            end += 1
+        if end < self.columns:
+            limit = self.bounds[2] + end * self.cell_width
+            reference = states[end] == INSIDE
+        else:
+            limit = math.inf
+            reference = False
+        count = sum(1 for x in self.crossings(lat, edges) if lon < x <= limit)
+        return reference != bool(count % 2)
+
+
+def regionsFromGeoJson(data, resolution=DEFAULT_RESOLUTION):
+    """
+    Tworzy regiony z obiektów Polygon / MultiPolygon kolekcji GeoJSON
+    (współrzędne lon, lat). Nazwą regionu jest właściwość name.
+    """
+    if data.get('type') == 'FeatureCollection':
+        features = data.get('features', [])
+    elif data.get('type') == 'Feature':
+        features = [data]
+    else:
+        features = [{'type': 'Feature', 'geometry': data, 'properties': {}}]
+
+    regions = []
+    for number, feature in enumerate(features, 1):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        rings = [[(point[1], point[0]) for point in ring]
+                 for polygon in polygons for ring in polygon]
+        name = (feature.get('properties') or {}).get('name') or f"region {number}"
+        regions.append(Region(name, rings, resolution))
+    return regions
+
+
+def loadRegions(path, resolution=DEFAULT_RESOLUTION):
+    with open(path, 'r', encoding='utf-8') as stream:
+        try:
+            data = json.load(stream)
+        except ValueError as e:
+            raise ValueError(f"Niepoprawny plik GeoJSON {path}: {e}")
+    regions = regionsFromGeoJson(data, resolution)
+    if not regions:
+        raise ValueError(f"Plik {path} nie zawiera poligonów")
+    return regions
+
+
+def findRegion(regions, lat, lon):
+    """
+    Zwraca pierwszy region zawierający punkt lub None
+    """
+    for region in regions:
+        if region.contains(lat, lon):
+            return region
+    return None
@@ -0,0 +1,198 @@
+"""
+Centralny harmonogram zapytań sieciowych.
+
+Wszystkie zapytania przechodzą przez RequestScheduler, który pilnuje
+limitu częstotliwości (token bucket), łączy zapytania o ten sam klucz
+w jedno wywołanie sieciowe oraz ponawia zapytania odrzucone kodem
+429/503 z uwzględnieniem nagłówka Retry-After. Przekroczenie limitu
+czasu zapytania (transferTimeout) zgłaszane jest jako błąd. Zapytania w tle
+(PRIORITY_BACKGROUND) wysyłane są tylko wtedy, gdy nie czeka ani nie
+trwa żadne zapytanie użytkownika.
+"""
+from qgis.core import QgsNetworkAccessManager
+from qgis.PyQt.QtNetwork import QNetworkRequest, QNetworkReply
+from qgis.PyQt.QtCore import QObject, QTimer
+from collections import deque
+from functools import partial
+
+from .utils import QgsTools
+from .constants import (DEFAULT_REQUEST_RATE, DEFAULT_REQUEST_BURST,
+                        DEFAULT_MAX_RETRIES)
+from .rate_limit import (RateLimiter, retryAfterSeconds, backoffDelay,
+                         RETRY_STATUSES)
+from .telemetry import (Telemetry, STAGE_QUEUE, STAGE_NETWORK, COUNTER_RETRY,
+                        COUNTER_ERROR, COUNTER_TIMEOUT)
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RequestTicket:
+    """
+    Subskrypcja wyniku zapytania, pozwalająca je anulować
+    """
+    __slots__ = ('key', 'callback')
+
+    def __init__(self, key, callback):
+        self.key = key
+        self.callback = callback
+
+
+class PendingRequest:
+    __slots__ = ('key', 'request', 'tickets', 'reply', 'attempts', 'priority',
+                 'queued', 'sent')
+
+    def __init__(self, key, request, priority, queued):
+        self.key = key
+        self.request = request
+        self.tickets = []
+        self.reply = None
+        self.attempts = 0
+        self.priority = priority
+        # znaczniki czasu do pomiaru oczekiwania w kolejce i w sieci
+        self.queued = queued
+        self.sent = None
+
+
+class RequestScheduler(QObject):
+
+    def __init__(self, rate=DEFAULT_REQUEST_RATE, burst=DEFAULT_REQUEST_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES, telemetry=None, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry or Telemetry()
+        # limit współdzielony z zadaniami w tle (np. ustalanie adresów zaznaczenia)
+        self.limit = RateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.nam = QgsNetworkAccessManager.instance()
+        self.queues = (deque(), deque())
+        self.entries = {}
+        self.user_in_flight = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.dispatch)
+
+    def setRate(self, rate, burst=DEFAULT_REQUEST_BURST):
+        self.limit.setRate(rate, burst)
+        self.scheduleDispatch(0)
+
+    def submit(self, key, request, callback, priority=PRIORITY_USER):
+        """
+        Kolejkuje zapytanie GET. Po zakończeniu wywoływany jest
+        callback(data, error), gdzie data to treść odpowiedzi (bytes).
+        Zapytania o ten sam klucz oczekujące lub będące w locie
+        są łączone w jedno wywołanie sieciowe.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = PendingRequest(key, request, priority, self.telemetry.clock())
+            self.entries[key] = entry
+            self.queues[priority].append(key)
+            self.scheduleDispatch(0)
+        elif priority < entry.priority and entry.reply is None:
+            # zapytanie użytkownika o klucz oczekujący w tle
+            self.queues[entry.priority].remove(key)
+            entry.priority = priority
+            self.queues[priority].append(key)
+            self.scheduleDispatch(0)
+        ticket = RequestTicket(key, callback)
+        entry.tickets.append(ticket)
+        return ticket
+
+    def cancel(self, ticket):
+        """
+        Anuluje subskrypcję. Zapytanie bez subskrybentów jest usuwane
+        z kolejki lub przerywane, jeśli jest już w locie.
+        """
+        entry = self.entries.get(ticket.key)
+        if entry is None or ticket not in entry.tickets:
+            return
+        entry.tickets.remove(ticket)
+        if entry.tickets:
+            return
+        del self.entries[ticket.key]
+        if entry.reply is not None:
+            entry.reply.abort()
+        else:
+            self.queues[entry.priority].remove(ticket.key)
+
+    def cancelAll(self):
+        for entry in list(self.entries.values()):
+            for ticket in list(entry.tickets):
+                self.cancel(ticket)
+
+    def pendingCount(self):
+        return len(self.entries)
+
+    def scheduleDispatch(self, delay):
+        msec = max(0, int(delay * 1000) + (1 if delay > 0 else 0))
+        if not self.timer.isActive() or self.timer.remainingTime() > msec:
+            self.timer.start(msec)
+
+    def nextQueue(self):
+        user_queue, background_queue = self.queues
+        if user_queue:
+            return user_queue
+        if background_queue and not self.user_in_flight:
+            return background_queue
+        return None
+
+    def dispatch(self):
+        while True:
+            queue = self.nextQueue()
+            if queue is None:
+                return
+            if not self.limit.tryAcquire():
+                # token mógł zostać pobrany przez inny wątek
+                self.scheduleDispatch(max(self.limit.delay(), 0.001))
+                return
+            entry = self.entries[queue.popleft()]
+            if entry.priority == PRIORITY_USER:
+                self.user_in_flight += 1
+            entry.sent = self.telemetry.clock()
+            self.telemetry.record(STAGE_QUEUE, entry.sent - entry.queued)
+            entry.reply = self.nam.get(entry.request)
+            entry.reply.finished.connect(partial(self.handleFinished, entry))
+
+    def handleFinished(self, entry):
+        reply = entry.reply
+        entry.reply = None
+        reply.deleteLater()
+        if entry.priority == PRIORITY_USER:
+            self.user_in_flight -= 1
+            if not self.user_in_flight and self.queues[PRIORITY_BACKGROUND]:
+                self.scheduleDispatch(0)
+        if self.entries.get(entry.key) is not entry:
+            # zapytanie zostało anulowane
+            return
+        finished = self.telemetry.clock()
+        self.telemetry.record(STAGE_NETWORK, finished - entry.sent)
+
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        self.telemetry.recordStatus(status)
+        if status in RETRY_STATUSES and entry.attempts < self.max_retries:
+            entry.attempts += 1
+            entry.queued = finished
+            self.telemetry.increment(COUNTER_RETRY)
+            delay = retryAfterSeconds(bytes(reply.rawHeader(b'Retry-After')).decode('latin-1'))
+            if delay is None:
+                delay = backoffDelay(entry.attempts)
+            delay = self.limit.pause(delay)
+            QgsTools.pushLogWarning(
+                f"Serwer odpowiedział kodem {status}, ponowienie za {delay:.0f} s")
+            self.queues[entry.priority].appendleft(entry.key)
+            self.scheduleDispatch(delay)
+            return
+
+        del self.entries[entry.key]
+        if reply.error() == QNetworkReply.NetworkError.OperationCanceledError:
+            # anulowane zapytania kończą się wcześniej - to przekroczenie limitu czasu
+            data, error = None, "Request timed out"
+            self.telemetry.increment(COUNTER_TIMEOUT)
+        elif reply.error() != QNetworkReply.NetworkError.NoError:
+            data, error = None, f"Request error: {reply.errorString()}"
+            self.telemetry.increment(COUNTER_ERROR)
+        else:
+            data, error = reply.readAll().data(), None
+        for ticket in entry.tickets:
+            ticket.callback(data, error)
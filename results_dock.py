@@ -0,0 +1,105 @@
+from qgis.core import (Qgis, QgsWkbTypes, QgsCoordinateTransform,
+                       QgsProject)
+from qgis.gui import QgsDockWidget, QgsRubberBand
+from qgis.PyQt.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                                 QListWidget, QListWidgetItem, QPushButton,
+                                 QApplication)
+from qgis.PyQt.QtCore import Qt, QCoreApplication, QDateTime
+from qgis.PyQt.QtGui import QColor
+
+
+try:
+    POINT_GEOMETRY = Qgis.GeometryType.Point
+except AttributeError:
+    POINT_GEOMETRY = QgsWkbTypes.PointGeometry
+
+
+class AddressResultsDock(QgsDockWidget):
+    """
+    Panel z historią ostatnich wyników. Wyniki dopisywane są asynchronicznie,
+    bez blokowania pętli zdarzeń, a ostatni punkt oznaczany jest na mapie.
+    """
+
+    HISTORY_SIZE = 200
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.setObjectName('RevealAddressResultsDock')
+        self.setWindowTitle(self.tr('Reveal Address'))
+
+        self.history = QListWidget()
+        self.history.setWordWrap(True)
+        self.history.setAlternatingRowColors(True)
+        self.history.itemActivated.connect(self.onItemActivated)
+
+        self.copy_button = QPushButton(self.tr('Copy'))
+        self.copy_button.clicked.connect(self.copySelected)
+        self.clear_button = QPushButton(self.tr('Clear'))
+        self.clear_button.clicked.connect(self.clear)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.copy_button)
+        buttons.addWidget(self.clear_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.history)
+        layout.addLayout(buttons)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.marker = QgsRubberBand(self.canvas, POINT_GEOMETRY)
+        self.marker.setColor(QColor(220, 30, 30))
+        self.marker.setIconSize(12)
+        self.marker.setWidth(3)
+
+    def tr(self, message):
+        return QCoreApplication.translate('AddressResultsDock', message)
+
+    def addResult(self, point, crs, record):
+        """
+        Dopisuje wynik na początku historii i zaznacza punkt (w układzie crs)
+        """
+        address = record.text()
+        time = QDateTime.currentDateTime().toString('HH:mm:ss')
+        item = QListWidgetItem(f"{time}  {address}")
+        item.setToolTip(address)
+        item.setData(Qt.ItemDataRole.UserRole, (point, crs, address))
+
+        self.history.insertItem(0, item)
+        while self.history.count() > self.HISTORY_SIZE:
+            self.history.takeItem(self.history.count() - 1)
+        self.history.setCurrentItem(item)
+
+        if not self.isVisible():
+            self.show()
+        self.showMarker(point, crs)
+
+    def showMarker(self, point, crs):
+        canvas_crs = self.canvas.mapSettings().destinationCrs()
+        if crs != canvas_crs:
+            point = QgsCoordinateTransform(
+                crs, canvas_crs, QgsProject.instance()).transform(point)
+        self.marker.reset(POINT_GEOMETRY)
+        self.marker.addPoint(point)
+
+    def onItemActivated(self, item):
+        point, crs, _ = item.data(Qt.ItemDataRole.UserRole)
+        self.showMarker(point, crs)
+        self.canvas.setCenter(self.marker.asGeometry().asPoint())
+        self.canvas.refresh()
+
+    def copySelected(self):
+        item = self.history.currentItem()
+        if item is not None:
+            QApplication.clipboard().setText(item.data(Qt.ItemDataRole.UserRole)[2])
+
+    def clear(self):
+        self.history.clear()
+        self.marker.reset(POINT_GEOMETRY)
+
+    def cleanup(self):
+        self.marker.reset(POINT_GEOMETRY)
+        self.canvas.scene().removeItem(self.marker)
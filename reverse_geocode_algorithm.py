@@ -0,0 +1,298 @@
+from qgis.core import (QgsProcessingAlgorithm, QgsProcessing,
+                       QgsProcessingParameterFeatureSource,
+                       QgsProcessingParameterFeatureSink,
+                       QgsProcessingParameterNumber,
+                       QgsProcessingParameterString,
+                       QgsProcessingParameterDefinition, QgsProcessingException,
+                       QgsProcessingUtils, QgsSettings,
+                       QgsCoordinateTransform, QgsCoordinateReferenceSystem,
+                       QgsFeatureSink, QgsFeature)
+from qgis.PyQt.QtCore import QEventLoop, QThread, QTimer, QCoreApplication
+from qgis.PyQt.QtGui import QIcon
+from functools import partial
+import os
+
+from .constants import (EPSG, DEFAULT_REQUEST_RATE, DEFAULT_REQUEST_BURST,
+                        SETTINGS_REQUEST_BURST)
+from .nominatim import parseReverse
+from .endpoint import NominatimEndpoint
+from .address_record import AddressRecord
+from .geocoders import NominatimBackend
+from .request_scheduler import RequestScheduler
+from .rate_limit import TokenBucket
+from .transforms import transformPoints
+
+
+class ReplyPool:
+    """
+    Ograniczona pula równoległych zapytań wysyłanych przez RequestScheduler.
+
+    Zadania pobierane są leniwie z iteratora, więc w pamięci znajdują się
+    tylko zapytania będące aktualnie w locie. Opcjonalny kubełek bucket
+    dodatkowo ogranicza częstotliwość zapytań puli, gdy harmonogram jest
+    współdzielony z wtyczką.
+    """
+
+    CANCEL_POLL_MS = 200
+
+    def __init__(self, max_in_flight, feedback, scheduler, bucket=None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.feedback = feedback
+        self.scheduler = scheduler
+        self.bucket = bucket
+        self.fill_timer = QTimer()
+        self.fill_timer.setSingleShot(True)
+        self.fill_timer.timeout.connect(self.fill)
+        self.in_flight = {}
+        self.job_id = 0
+        self.jobs = None
+        self.loop = None
+        self.on_result = None
+
+    def run(self, jobs, on_result):
+        """
+        Wykonuje zapytania dla zadań (key, request, payload) i wywołuje
+        on_result(payload, data, error) dla każdej zakończonej odpowiedzi
+        """
+        self.jobs = iter(jobs)
+        self.on_result = on_result
+        self.loop = QEventLoop()
+
+        cancel_timer = QTimer()
+        cancel_timer.setInterval(self.CANCEL_POLL_MS)
+        cancel_timer.timeout.connect(self.checkCanceled)
+        cancel_timer.start()
+
+        self.fill()
+        if self.in_flight or self.fill_timer.isActive():
+            self.loop.exec()
+        cancel_timer.stop()
+        self.fill_timer.stop()
+
+    def fill(self):
+        while len(self.in_flight) < self.max_in_flight \
+                and not self.feedback.isCanceled():
+            if self.bucket is not None and not self.bucket.consume():
+                if not self.fill_timer.isActive():
+                    self.fill_timer.start(int(self.bucket.delay() * 1000) + 1)
+                break
+            job = next(self.jobs, None)
+            if job is None:
+                break
+            key, request, payload = job
+            self.job_id += 1
+            ticket = self.scheduler.submit(
+                key,
+                request,
+                partial(self.handleFinished, self.job_id)
+            )
+            self.in_flight[self.job_id] = (ticket, payload)
+        if not self.in_flight and not self.fill_timer.isActive():
+            self.loop.quit()
+
+    def handleFinished(self, job_id, data, error):
+        _, payload = self.in_flight.pop(job_id)
+        if not self.feedback.isCanceled():
+            self.on_result(payload, data, error)
+        self.fill()
+
+    def checkCanceled(self):
+        if not self.feedback.isCanceled():
+            return
+        # harmonogram może obsługiwać też inne zapytania wtyczki,
+        # więc anulowane są tylko zapytania puli
+        for ticket, _ in self.in_flight.values():
+            self.scheduler.cancel(ticket)
+        self.in_flight.clear()
+        self.fill_timer.stop()
+        self.loop.quit()
+
+
+class ReverseGeocodeAlgorithm(QgsProcessingAlgorithm):
+    INPUT = 'INPUT'
+    MAX_IN_FLIGHT = 'MAX_IN_FLIGHT'
+    REQUEST_RATE = 'REQUEST_RATE'
+    SERVER_URL = 'SERVER_URL'
+    # liczba punktów transformowanych jednym wywołaniem
+    TRANSFORM_CHUNK = 256
+    OUTPUT = 'OUTPUT'
+
+    def __init__(self, scheduler_factory=None):
+        """
+        :param scheduler_factory: zwraca harmonogram zapytań współdzielony
+            z wtyczką; bez niego algorytm tworzy własny harmonogram
+        """
+        super().__init__()
+        self.scheduler_factory = scheduler_factory
+
+    def tr(self, message):
+        return QCoreApplication.translate('ReverseGeocodeAlgorithm', message)
+
+    def createInstance(self):
+        return ReverseGeocodeAlgorithm(self.scheduler_factory)
+
+    def flags(self):
+        flags = super().flags()
+        if self.scheduler_factory is not None:
+            # współdzielony harmonogram działa w wątku głównym
+            flags |= QgsProcessingAlgorithm.FlagNoThreading
+        return flags
+
+    def name(self):
+        return 'reversegeocodelayer'
+
+    def displayName(self):
+        return self.tr('Reverse geocode point layer')
+
+    def shortHelpString(self):
+        return self.tr(
+            'Resolves the address of every point of the input layer '
+            'using the Nominatim reverse API and writes display_name '
+            'together with the structured address fields (street, house number, '
+            'postcode, city, TERYT codes where available) to a new layer.'
+        )
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'icons', 'icon.svg'))
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT,
+            self.tr('Input point layer'),
+            [QgsProcessing.TypeVectorPoint]
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.MAX_IN_FLIGHT,
+            self.tr('Maximum parallel requests'),
+            QgsProcessingParameterNumber.Integer,
+            defaultValue=1,
+            minValue=1,
+            maxValue=16
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.REQUEST_RATE,
+            self.tr('Maximum requests per second (0 = unlimited)'),
+            QgsProcessingParameterNumber.Double,
+            defaultValue=DEFAULT_REQUEST_RATE,
+            minValue=0
+        ))
+        server_url = QgsProcessingParameterString(
+            self.SERVER_URL,
+            self.tr('Nominatim server URL (empty = plugin settings)'),
+            optional=True
+        )
+        server_url.setFlags(
+            server_url.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(server_url)
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT,
+            self.tr('Geocoded layer'),
+            QgsProcessing.TypeVectorPoint
+        ))
+
+    @staticmethod
+    def chunks(iterable, size):
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.INPUT))
+        max_in_flight = self.parameterAsInt(parameters, self.MAX_IN_FLIGHT, context)
+        request_rate = self.parameterAsDouble(parameters, self.REQUEST_RATE, context)
+        endpoint = NominatimEndpoint.fromSettings()
+        server_url = self.parameterAsString(parameters, self.SERVER_URL, context)
+        if server_url:
+            endpoint.base_url = server_url
+
+        fields = QgsProcessingUtils.combineFields(
+            source.fields(), AddressRecord.qgsFields())
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields,
+            source.wkbType(), source.sourceCrs())
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT))
+
+        coord_transform = QgsCoordinateTransform(
+            source.sourceCrs(),
+            QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
+            context.transformContext()
+        )
+        total = source.featureCount()
+        step = 100.0 / total if total > 0 else 0
+        empty_address = AddressRecord().attributes()
+        done = [0]
+
+        def jobs():
+            for chunk in self.chunks(source.getFeatures(), self.TRANSFORM_CHUNK):
+                if feedback.isCanceled():
+                    return
+                located = []
+                for feature in chunk:
+                    geometry = feature.geometry()
+                    if geometry.isNull() or geometry.isEmpty():
+                        writeFeature(feature, empty_address)
+                    else:
+                        located.append(feature)
+                points = transformPoints(
+                    coord_transform,
+                    [feature.geometry().centroid().asPoint() for feature in located]
+                )
+                for feature, point in zip(located, points):
+                    url = endpoint.reverseUrl(point.y(), point.x())
+                    yield (NominatimBackend.requestKey(point.y(), point.x()),
+                           endpoint.request(url), feature)
+
+        def writeFeature(feature, address_values):
+            out_feature = QgsFeature(fields)
+            out_feature.setGeometry(feature.geometry())
+            out_feature.setAttributes(feature.attributes() + list(address_values))
+            sink.addFeature(out_feature, QgsFeatureSink.FastInsert)
+            done[0] += 1
+            feedback.setProgress(done[0] * step)
+
+        def handleReply(feature, data, error):
+            if error is not None:
+                feedback.reportError(
+                    self.tr('Feature {}: {}').format(feature.id(), error))
+                writeFeature(feature, empty_address)
+                return
+            try:
+                address = parseReverse(data)
+            except ValueError:
+                feedback.reportError(
+                    self.tr('Feature {}: invalid server response').format(feature.id()))
+                writeFeature(feature, empty_address)
+                return
+            writeFeature(feature, address.attributes())
+
+        scheduler, bucket = self.requestScheduler(request_rate)
+        ReplyPool(max_in_flight, feedback, scheduler, bucket).run(jobs(), handleReply)
+
+        return {self.OUTPUT: dest_id}
+
+    def requestScheduler(self, request_rate):
+        """
+        Zwraca harmonogram zapytań i kubełek ograniczający częstotliwość puli.
+
+        Harmonogram wtyczki jest używany, gdy algorytm działa w jego wątku -
+        wtedy obowiązuje limit z ustawień wtyczki, a request_rate może go
+        tylko obniżyć. W pozostałych przypadkach harmonogram tworzony jest
+        w wątku algorytmu, w którym działa pętla zdarzeń puli. Liczba
+        równoległych zapytań ogranicza wyłącznie pulę, nie limit serii.
+        """
+        if self.scheduler_factory is not None:
+            scheduler = self.scheduler_factory()
+            if scheduler.thread() == QThread.currentThread():
+                return scheduler, TokenBucket(request_rate) if request_rate > 0 else None
+        burst = QgsSettings().value(SETTINGS_REQUEST_BURST, DEFAULT_REQUEST_BURST, type=int)
+        return RequestScheduler(rate=request_rate, burst=burst), None
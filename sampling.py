@@ -0,0 +1,44 @@
+"""
+Wyznaczanie punktów próbkowania wzdłuż linii lub granicy poligonu.
+Moduł nie zależy od QGIS.
+"""
+from .spatial_index import distanceMeters
+
+
+def samplePolyline(vertices, spacing, closed=False, max_samples=None):
+    """
+    Zwraca listę (lat, lon, odległość od początku w metrach) punktów
+    rozmieszczonych co spacing metrów wzdłuż linii o wierzchołkach
+    (lat, lon) w EPSG:4326. Pierwszy i ostatni wierzchołek są zawsze
+    próbkowane; dla poligonu (closed) linia jest domykana.
+    """
+    if spacing <= 0:
+        raise ValueError("Odstęp próbkowania musi być dodatni")
+    vertices = list(vertices)
+    if not vertices:
+        return []
+    if closed and len(vertices) > 2 and vertices[0] != vertices[-1]:
+        vertices.append(vertices[0])
+
+    samples = [(vertices[0][0], vertices[0][1], 0.0)]
+    travelled = 0.0
+    next_at = spacing
+    for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[1:]):
+        length = distanceMeters(lat1, lon1, lat2, lon2)
+        if length == 0:
+            continue
+        while next_at < travelled + length:
+            ratio = (next_at - travelled) / length
+            samples.append((lat1 + (lat2 - lat1) * ratio,
+                            lon1 + (lon2 - lon1) * ratio, next_at))
+            next_at += spacing
+            if max_samples is not None and len(samples) >= max_samples:
+                return samples
+        travelled += length
+
+    # koniec linii (dla poligonu pokrywa się z początkiem)
+    if not closed and travelled > samples[-1][2]:
+        samples.append((vertices[-1][0], vertices[-1][1], travelled))
+    if max_samples is not None:
+        samples = samples[:max_samples]
+    return samples
@@ -0,0 +1,41 @@
+"""
+Pamięć podręczna wyników wyszukiwania adresów dla wpisywanych zapytań.
+"""
+from collections import OrderedDict
+import unicodedata
+
+
+def normalizeQuery(text):
+    text = unicodedata.normalize('NFD', text.lower())
+    text = ''.join(part for part in text if unicodedata.category(part) != 'Mn')
+    return ' '.join(text.split())
+
+
+class SearchCache:
+    """
+    Przechowuje wyniki ostatnich zapytań (LRU) pod znormalizowanym tekstem.
+    Wyniki dłuższego zapytania nie są wyznaczane z krótszego: Nominatim
+    dopasowuje całe wyrazy, więc np. "Długa 12" może zwrócić adresy,
+    których nie ma w wynikach "Długa 1".
+    """
+
+    def __init__(self, max_entries=200):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def put(self, query, results):
+        key = normalizeQuery(query)
+        self.entries[key] = results
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, query):
+        """
+        Zwraca listę wyników lub None, gdy potrzebne jest zapytanie do serwera
+        """
+        key = normalizeQuery(query)
+        results = self.entries.get(key)
+        if results is not None:
+            self.entries.move_to_end(key)
+        return results
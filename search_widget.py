@@ -0,0 +1,127 @@
+from qgis.core import (QgsRectangle, QgsPointXY, QgsCoordinateTransform,
+                       QgsCoordinateReferenceSystem, QgsProject)
+from qgis.gui import QgsFilterLineEdit
+from qgis.PyQt.QtWidgets import QCompleter
+from qgis.PyQt.QtCore import QTimer, QStringListModel, QCoreApplication
+from functools import partial
+
+from .utils import QgsTools
+from .constants import EPSG
+from .nominatim import decodeReply
+from .endpoint import NominatimEndpoint
+from .search_cache import SearchCache
+
+
+class AddressSearchWidget(QgsFilterLineEdit):
+    """
+    Pole wyszukiwania adresu (geokodowanie Nominatim /search).
+
+    Zapytania wysyłane są po przerwie w pisaniu, poprzednie niezakończone
+    zapytanie jest anulowane, a wyniki przechowywane w SearchCache.
+    """
+
+    DEBOUNCE_MS = 500
+    MIN_QUERY_LENGTH = 3
+    RESULT_LIMIT = 10
+    # szerokość obszaru (w stopniach) przy wynikach bez zasięgu
+    POINT_EXTENT = 0.002
+
+    def __init__(self, canvas, scheduler, endpoint=None, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.scheduler = scheduler
+        self.endpoint = endpoint or NominatimEndpoint()
+        self.cache = SearchCache()
+        self.ticket = None
+        self.results = {}
+
+        self.setPlaceholderText(self.tr('Search address…'))
+        self.setMinimumWidth(250)
+        self.setMaximumWidth(350)
+
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.activated[str].connect(self.zoomToResult)
+        self.setCompleter(self.completer)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.search)
+        self.textEdited.connect(self.onTextEdited)
+        self.returnPressed.connect(self.search)
+
+    def tr(self, message):
+        return QCoreApplication.translate('AddressSearchWidget', message)
+
+    def onTextEdited(self, text):
+        self.cancelSearch()
+        self.debounce_timer.start()
+
+    def cancelSearch(self):
+        self.debounce_timer.stop()
+        if self.ticket is not None:
+            self.scheduler.cancel(self.ticket)
+            self.ticket = None
+
+    def search(self):
+        self.cancelSearch()
+        query = self.text().strip()
+        if len(query) < self.MIN_QUERY_LENGTH:
+            return
+
+        results = self.cache.get(query)
+        if results is not None:
+            self.showResults(results)
+            return
+
+        url = self.endpoint.searchUrl(query, self.RESULT_LIMIT)
+        QgsTools.pushLogInfo(f"Wysyłanie zapytania: {url}")
+        self.ticket = self.scheduler.submit(
+            ('search', query),
+            self.endpoint.request(url),
+            partial(self.handleResults, query)
+        )
+
+    def handleResults(self, query, data, error):
+        self.ticket = None
+        if error is not None:
+            QgsTools.pushLogCritical(error)
+            return
+        try:
+            results = decodeReply(data)
+        except ValueError:
+            QgsTools.pushLogCritical("Nieprawidłowa odpowiedź serwera Nominatim.")
+            return
+        self.cache.put(query, results)
+        if query == self.text().strip():
+            self.showResults(results)
+
+    def showResults(self, results):
+        self.results = {result['display_name']: result for result in results}
+        self.model.setStringList(list(self.results))
+        if self.results and self.hasFocus():
+            self.completer.complete()
+
+    def zoomToResult(self, display_name):
+        result = self.results.get(display_name)
+        if result is None:
+            return
+
+        if 'boundingbox' in result:
+            south, north, west, east = map(float, result['boundingbox'])
+            extent = QgsRectangle(west, south, east, north)
+        else:
+            extent = QgsRectangle(QgsPointXY(float(result['lon']), float(result['lat'])),
+                                  QgsPointXY(float(result['lon']), float(result['lat'])))
+        if extent.width() < self.POINT_EXTENT or extent.height() < self.POINT_EXTENT:
+            extent.grow(self.POINT_EXTENT / 2)
+
+        coord_transform = QgsCoordinateTransform(
+            QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
+            self.canvas.mapSettings().destinationCrs(),
+            QgsProject.instance()
+        )
+        self.canvas.setExtent(coord_transform.transformBoundingBox(extent))
+        self.canvas.refresh()
@@ -0,0 +1,266 @@
+from qgis.core import (QgsTask, QgsVectorLayerFeatureSource, QgsFeatureRequest,
+                       QgsCoordinateTransform, QgsCoordinateReferenceSystem,
+                       QgsProject, QgsBlockingNetworkRequest, QgsField, QgsFields)
+from qgis.PyQt.QtCore import QVariant
+from qgis.PyQt.QtNetwork import QNetworkRequest
+from qgis.PyQt.QtCore import pyqtSignal
+import time
+
+from .utils import QgsTools
+from .constants import (EPSG, DEFAULT_REQUEST_RATE, DEFAULT_MAX_RETRIES,
+                        SELECTION_COMMIT_CHUNK)
+from .nominatim import parseReverse
+from .endpoint import NominatimEndpoint
+from .address_cache import AddressCache
+from .address_record import AddressRecord
+from .rate_limit import (RateLimiter, retryAfterSeconds, backoffDelay,
+                         RETRY_STATUSES)
+
+# najdłuższa przerwa między sprawdzeniami, czy zadanie anulowano (s)
+CANCEL_CHECK_INTERVAL = 0.2
+
+
+# kolumny atrybutów rekordu zapisywane na życzenie; przedrostek ra_ chroni
+# istniejące kolumny warstwy, a nazwy mieszczą się w 10 znakach shapefile
+SELECTION_RECORD_FIELDS = {
+    'house_number': 'ra_housenr',
+    'street': 'ra_street',
+    'postcode': 'ra_postcd',
+    'city': 'ra_city',
+    'municipality': 'ra_munic',
+    'county': 'ra_county',
+    'state': 'ra_state',
+    'country': 'ra_country',
+    'country_code': 'ra_ccode',
+    'teryt_simc': 'ra_simc',
+    'teryt_ulic': 'ra_ulic',
+    'osm_type': 'ra_osmtype',
+    'osm_id': 'ra_osmid',
+    'lat': 'ra_lat',
+    'lon': 'ra_lon',
+}
+
+
+def selectionOutputFields(field_name, record_fields=False):
+    """
+    Pola zapisywane w warstwie: pełny adres w field_name oraz, gdy
+    record_fields, atrybuty rekordu w kolumnach SELECTION_RECORD_FIELDS
+    """
+    fields = QgsFields()
+    fields.append(QgsField(field_name, QVariant.String))
+    if record_fields:
+        for field, name in zip(AddressRecord.qgsFields(list(SELECTION_RECORD_FIELDS)),
+                               SELECTION_RECORD_FIELDS.values()):
+            field.setName(name)
+            fields.append(field)
+    return fields
+
+
+def addLayerFields(layer, fields):
+    """
+    Dodaje brakujące pola przez bufor edycji warstwy, więc ich dodanie można
+    cofnąć. Zwraca słownik: nazwa pola -> nazwa w warstwie (dostawca danych
+    może ją skrócić) lub None, gdy pól nie udało się dodać.
+    """
+    names = {field.name(): field.name() for field in fields}
+    missing = [field for field in fields if layer.fields().indexOf(field.name()) == -1]
+    if not missing:
+        return names
+    own_edit_session = not layer.isEditable()
+    if own_edit_session and not layer.startEditing():
+        return None
+    count = layer.fields().count()
+    layer.beginEditCommand("Reveal Address: pola adresu")
+    for field in missing:
+        if not layer.addAttribute(field):
+            layer.destroyEditCommand()
+            if own_edit_session:
+                layer.rollBack()
+            return None
+    layer.endEditCommand()
+    if own_edit_session:
+        if not layer.commitChanges():
+            QgsTools.pushLogCritical(
+                "Nie udało się dodać pól adresu: " + '; '.join(layer.commitErrors()))
+            layer.rollBack()
+            return None
+        # nazwy nadane przez dostawcę danych, np. skrócone w pliku shapefile
+        added = layer.fields().names()[count:]
+        if len(added) == len(missing):
+            names.update(zip((field.name() for field in missing), added))
+    return names
+
+
+class ReverseGeocodeSelectionTask(QgsTask):
+    """
+    Zadanie w tle ustalające adresy zaznaczonych obiektów warstwy.
+
+    Zapytania wykonywane są w wątku zadania, a wyniki przekazywane paczkami
+    do wątku głównego, gdzie zapisywane są w buforze edycji warstwy
+    i zatwierdzane co SELECTION_COMMIT_CHUNK obiektów. Limit zapytań
+    (limit) jest współdzielony z harmonogramem wtyczki, więc zadanie
+    i narzędzia mapy razem nie przekraczają limitu serwera, a odpowiedź
+    429/503 wstrzymuje zapytania ich wszystkich.
+    """
+
+    # lista krotek (fid, AddressRecord)
+    chunkResolved = pyqtSignal(list)
+
+    def __init__(self, layer, field_name, record_columns=None, cache_path=None, cache_options=None,
+                 cache_radius=0, shared_cache_path=None, endpoint=None, limit=None,
+                 chunk_size=SELECTION_COMMIT_CHUNK):
+        super().__init__(
+            f"Reveal Address: {layer.name()} ({layer.selectedFeatureCount()})",
+            QgsTask.CanCancel
+        )
+        self.layer_id = layer.id()
+        self.field_name = field_name
+        # atrybut rekordu -> kolumna warstwy, w której jest zapisywany
+        self.record_columns = record_columns or {}
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.fids = list(layer.selectedFeatureIds())
+        self.coord_transform = QgsCoordinateTransform(
+            layer.crs(),
+            QgsCoordinateReferenceSystem.fromEpsgId(EPSG),
+            QgsProject.instance()
+        )
+        self.cache_path = cache_path
+        # precyzja, TTL i limit wpisów takie jak w pamięci podręcznej wtyczki
+        self.cache_options = cache_options or {}
+        self.cache_radius = cache_radius
+        self.shared_cache_path = shared_cache_path
+        self.endpoint = endpoint or NominatimEndpoint()
+        self.limit = limit or RateLimiter(DEFAULT_REQUEST_RATE)
+        self.chunk_size = chunk_size
+
+        self.pending = []
+        self.resolved = 0
+        self.own_edit_session = False
+        self.chunkResolved.connect(self.writeChunk)
+
+    def run(self):
+        cache = None
+        if self.cache_path:
+            try:
+                cache = AddressCache(self.cache_path, shared_path=self.shared_cache_path,
+                                     **self.cache_options)
+            except ValueError as e:
+                QgsTools.pushLogWarning(str(e))
+                cache = AddressCache(self.cache_path, **self.cache_options)
+        request = QgsFeatureRequest().setFilterFids(self.fids).setNoAttributes()
+        total = len(self.fids)
+        chunk = []
+        try:
+            for i, feature in enumerate(self.source.getFeatures(request)):
+                if self.isCanceled():
+                    return False
+                geometry = feature.geometry()
+                if geometry.isNull() or geometry.isEmpty():
+                    continue
+                point = self.coord_transform.transform(geometry.centroid().asPoint())
+                address = self.lookup(point.y(), point.x(), cache)
+                if address is not None:
+                    chunk.append((feature.id(), address))
+                if len(chunk) >= self.chunk_size:
+                    self.chunkResolved.emit(chunk)
+                    chunk = []
+                self.setProgress((i + 1) * 100.0 / total)
+        finally:
+            if cache is not None:
+                cache.close()
+        # ostatnia paczka zapisywana jest w finished(), w wątku głównym
+        self.pending = chunk
+        return True
+
+    def wait(self):
+        """
+        Czeka na możliwość wysłania zapytania, sprawdzając co
+        CANCEL_CHECK_INTERVAL s, czy zadanie anulowano. Zwraca False po anulowaniu.
+        """
+        while not self.limit.tryAcquire():
+            if self.isCanceled():
+                return False
+            time.sleep(min(max(self.limit.delay(), 0.001), CANCEL_CHECK_INTERVAL))
+        return not self.isCanceled()
+
+    def lookup(self, lat, lon, cache):
+        if cache is not None:
+            address = cache.nearest(lat, lon, self.cache_radius)
+            if address is not None:
+                return address
+
+        url = self.endpoint.reverseUrl(lat, lon)
+        for attempt in range(1, DEFAULT_MAX_RETRIES + 2):
+            if not self.wait():
+                return None
+
+            blocking_request = QgsBlockingNetworkRequest()
+            error = blocking_request.get(self.endpoint.request(url), forceRefresh=True)
+            reply = blocking_request.reply()
+            status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            if status in RETRY_STATUSES and attempt <= DEFAULT_MAX_RETRIES:
+                delay = retryAfterSeconds(bytes(reply.rawHeader(b'Retry-After')).decode('latin-1'))
+                # wait() przed kolejną próbą czeka na koniec wstrzymania
+                self.limit.pause(delay if delay is not None else backoffDelay(attempt))
+                continue
+            if error != QgsBlockingNetworkRequest.NoError:
+                QgsTools.pushLogWarning(
+                    f"Błąd zapytania dla {lat:.6f}, {lon:.6f}: {blocking_request.errorMessage()}")
+                return None
+            try:
+                address = parseReverse(reply.content().data())
+            except ValueError:
+                return None
+            if cache is not None:
+                cache.put(lat, lon, address)
+            return address
+        return None
+
+    def writeChunk(self, chunk):
+        """
+        Zapisuje paczkę wyników w warstwie (wątek główny)
+        """
+        layer = QgsProject.instance().mapLayer(self.layer_id)
+        if layer is None or not chunk:
+            return
+        fields = layer.fields()
+        field_idx = fields.indexOf(self.field_name)
+        if field_idx == -1:
+            return
+        # pola atrybutów rekordu, które udało się dodać do warstwy
+        attribute_indexes = [
+            (fields.indexOf(column), AddressRecord.ATTRIBUTE_FIELDS.index(name))
+            for name, column in self.record_columns.items()
+        ]
+        attribute_indexes = [(idx, position) for idx, position in attribute_indexes if idx != -1]
+
+        if not layer.isEditable():
+            layer.startEditing()
+            self.own_edit_session = True
+        layer.beginEditCommand(f"Reveal Address ({len(chunk)})")
+        for fid, address in chunk:
+            values = address.attributes()
+            changes = {idx: values[position] for idx, position in attribute_indexes}
+            changes[field_idx] = address.text()
+            layer.changeAttributeValues(fid, changes)
+        layer.endEditCommand()
+        self.resolved += len(chunk)
+
+        if self.own_edit_session and not layer.commitChanges(False):
+            QgsTools.pushLogCritical(
+                "Nie udało się zapisać adresów: " + '; '.join(layer.commitErrors()))
+
+    def finished(self, result):
+        self.writeChunk(self.pending)
+        self.pending = []
+
+        layer = QgsProject.instance().mapLayer(self.layer_id)
+        if layer is not None and self.own_edit_session and layer.isEditable():
+            layer.commitChanges()
+
+        if result:
+            QgsTools.pushLogInfo(
+                f"Zapisano adresy {self.resolved} z {len(self.fids)} zaznaczonych obiektów.")
+        else:
+            QgsTools.pushLogWarning(
+                f"Przerwano ustalanie adresów po zapisaniu {self.resolved} obiektów.")
@@ -0,0 +1,150 @@
+from qgis.core import QgsSettings
+from qgis.gui import QgsAuthConfigSelect, QgsFileWidget
+from qgis.PyQt.QtWidgets import (QDialog, QFormLayout, QLineEdit, QSpinBox,
+                                 QDoubleSpinBox, QCheckBox, QComboBox,
+                                 QPlainTextEdit, QDialogButtonBox)
+from qgis.PyQt.QtCore import QCoreApplication
+
+from .constants import (NOMINATIM_URL, DEFAULT_REQUEST_RATE,
+                        DEFAULT_REQUEST_BURST, SETTINGS_REQUEST_RATE,
+                        SETTINGS_REQUEST_BURST, DEFAULT_SAMPLE_SPACING,
+                        SETTINGS_SAMPLE_SPACING, OUTSIDE_REGIONS_REMOTE,
+                        OUTSIDE_REGIONS_REJECT, DEFAULT_OUTSIDE_REGIONS,
+                        SETTINGS_REGIONS_FILE, SETTINGS_OUTSIDE_REGIONS,
+                        DEFAULT_HEDGE_PERCENTILE, SETTINGS_HEDGE_PERCENTILE,
+                        SETTINGS_SHARED_CACHE, SETTINGS_SELECTION_RECORD_FIELDS)
+from .endpoint import NominatimEndpoint
+from .nominatim import USER_AGENT
+
+
+class RevealAddressSettingsDialog(QDialog):
+    """
+    Ustawienia serwera Nominatim: adres, serwery zapasowe, nagłówki,
+    parametry zapytań, uwierzytelnianie, limit czasu i częstotliwości
+    zapytań, odstęp punktów próbkowania wzdłuż linii, regiony kierowania
+    zapytań, wspólna pamięć podręczna oraz kolumny zapisywane dla
+    zaznaczonych obiektów
+    """
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings or QgsSettings()
+        endpoint = NominatimEndpoint.fromSettings(self.settings)
+        self.setWindowTitle(self.tr('Reveal Address settings'))
+
+        self.server_url = QLineEdit(endpoint.base_url)
+        self.server_url.setPlaceholderText(NOMINATIM_URL)
+        self.user_agent = QLineEdit('' if endpoint.user_agent == USER_AGENT else endpoint.user_agent)
+        self.user_agent.setPlaceholderText(USER_AGENT)
+        self.accept_language = QLineEdit(endpoint.accept_language)
+        self.accept_language.setPlaceholderText('pl,en')
+        self.zoom = QSpinBox()
+        self.zoom.setRange(0, 18)
+        self.zoom.setValue(endpoint.zoom)
+        self.address_details = QCheckBox(self.tr('Request address details'))
+        self.address_details.setChecked(endpoint.address_details)
+        self.auth_config = QgsAuthConfigSelect(self)
+        self.auth_config.setConfigId(endpoint.authcfg)
+        self.request_timeout = QSpinBox()
+        self.request_timeout.setRange(0, 600)
+        self.request_timeout.setSuffix(' s')
+        self.request_timeout.setSpecialValueText(self.tr('None'))
+        self.request_timeout.setValue(int(endpoint.timeout))
+        self.fallback_urls = QPlainTextEdit('\n'.join(endpoint.fallback_urls))
+        self.fallback_urls.setPlaceholderText(self.tr('One server URL per line'))
+        self.fallback_urls.setMaximumHeight(80)
+        self.hedge_percentile = QSpinBox()
+        self.hedge_percentile.setRange(50, 99)
+        self.hedge_percentile.setSuffix(' %')
+        self.hedge_percentile.setValue(round(100 * self.settings.value(
+            SETTINGS_HEDGE_PERCENTILE, DEFAULT_HEDGE_PERCENTILE, type=float)))
+
+        self.request_rate = QDoubleSpinBox()
+        self.request_rate.setRange(0, 1000)
+        self.request_rate.setDecimals(1)
+        self.request_rate.setSpecialValueText(self.tr('Unlimited'))
+        self.request_rate.setValue(self.settings.value(
+            SETTINGS_REQUEST_RATE, DEFAULT_REQUEST_RATE, type=float))
+        self.request_burst = QSpinBox()
+        self.request_burst.setRange(1, 100)
+        self.request_burst.setValue(self.settings.value(
+            SETTINGS_REQUEST_BURST, DEFAULT_REQUEST_BURST, type=int))
+
+        self.sample_spacing = QDoubleSpinBox()
+        self.sample_spacing.setRange(1, 10000)
+        self.sample_spacing.setDecimals(0)
+        self.sample_spacing.setSuffix(' m')
+        self.sample_spacing.setValue(self.settings.value(
+            SETTINGS_SAMPLE_SPACING, DEFAULT_SAMPLE_SPACING, type=float))
+
+        self.regions_file = QgsFileWidget()
+        self.regions_file.setFilter(self.tr('GeoJSON (*.geojson *.json)'))
+        self.regions_file.setFilePath(self.settings.value(SETTINGS_REGIONS_FILE, ''))
+        self.outside_regions = QComboBox()
+        self.outside_regions.addItem(self.tr('Send to Nominatim'), OUTSIDE_REGIONS_REMOTE)
+        self.outside_regions.addItem(self.tr('Reject'), OUTSIDE_REGIONS_REJECT)
+        self.outside_regions.setCurrentIndex(max(self.outside_regions.findData(
+            self.settings.value(SETTINGS_OUTSIDE_REGIONS, DEFAULT_OUTSIDE_REGIONS)), 0))
+
+        self.shared_cache = QgsFileWidget()
+        self.shared_cache.setFilter(self.tr('Address cache (*.sqlite);;All files (*)'))
+        self.shared_cache.setFilePath(self.settings.value(SETTINGS_SHARED_CACHE, ''))
+
+        self.selection_record_fields = QCheckBox(
+            self.tr('Write address components of selected features to separate fields'))
+        self.selection_record_fields.setChecked(self.settings.value(
+            SETTINGS_SELECTION_RECORD_FIELDS, False, type=bool))
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QFormLayout()
+        layout.addRow(self.tr('Server URL'), self.server_url)
+        layout.addRow(self.tr('User-Agent'), self.user_agent)
+        layout.addRow(self.tr('Accept-Language'), self.accept_language)
+        layout.addRow(self.tr('Zoom'), self.zoom)
+        layout.addRow('', self.address_details)
+        layout.addRow(self.tr('Authentication'), self.auth_config)
+        layout.addRow(self.tr('Request timeout'), self.request_timeout)
+        layout.addRow(self.tr('Fallback servers'), self.fallback_urls)
+        layout.addRow(self.tr('Query fallback after latency percentile'), self.hedge_percentile)
+        layout.addRow(self.tr('Requests per second'), self.request_rate)
+        layout.addRow(self.tr('Request burst'), self.request_burst)
+        layout.addRow(self.tr('Line sampling spacing'), self.sample_spacing)
+        layout.addRow(self.tr('Supported regions'), self.regions_file)
+        layout.addRow(self.tr('Points outside regions'), self.outside_regions)
+        layout.addRow(self.tr('Shared read-only cache'), self.shared_cache)
+        layout.addRow('', self.selection_record_fields)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    def tr(self, message):
+        return QCoreApplication.translate('RevealAddressSettingsDialog', message)
+
+    def endpoint(self):
+        return NominatimEndpoint(
+            base_url=self.server_url.text().strip() or NOMINATIM_URL,
+            user_agent=self.user_agent.text().strip(),
+            accept_language=self.accept_language.text().strip(),
+            zoom=self.zoom.value(),
+            address_details=self.address_details.isChecked(),
+            authcfg=self.auth_config.configId(),
+            timeout=self.request_timeout.value(),
+            fallback_urls=[url.strip() for url in
+                           self.fallback_urls.toPlainText().splitlines() if url.strip()]
+        )
+
+    def accept(self):
+        self.endpoint().save(self.settings)
+        self.settings.setValue(SETTINGS_REQUEST_RATE, self.request_rate.value())
+        self.settings.setValue(SETTINGS_REQUEST_BURST, self.request_burst.value())
+        self.settings.setValue(SETTINGS_SAMPLE_SPACING, self.sample_spacing.value())
+        self.settings.setValue(SETTINGS_HEDGE_PERCENTILE, self.hedge_percentile.value() / 100)
+        self.settings.setValue(SETTINGS_REGIONS_FILE, self.regions_file.filePath())
+        self.settings.setValue(SETTINGS_OUTSIDE_REGIONS, self.outside_regions.currentData())
+        self.settings.setValue(SETTINGS_SHARED_CACHE, self.shared_cache.filePath())
+        self.settings.setValue(SETTINGS_SELECTION_RECORD_FIELDS,
+                               self.selection_record_fields.isChecked())
+        super().accept()
@@ -0,0 +1,119 @@
+"""
+Siatkowy indeks przestrzenny punktów w EPSG:4326.
+
+Punkty przypisywane są do komórek regularnej siatki, a wyszukiwanie
+najbliższego sąsiada przegląda tylko komórki pokrywające zadany promień.
+"""
+import math
+
+EARTH_RADIUS = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def distanceMeters(lat1, lon1, lat2, lon2):
+    """
+    Przybliżona (równoodległościowa) odległość w metrach,
+    wystarczająca dla promieni rzędu setek metrów
+    """
+    x = (lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = lat2 - lat1
+    return math.hypot(x, y) * METERS_PER_DEGREE
+
+
+class GridIndex:
+
+    def __init__(self, cell_size=0.001):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.items = {}
+
+    def cell(self, lat, lon):
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def insert(self, key, lat, lon):
+        """
+        Dodaje punkt pod kluczem key, zastępując poprzednią pozycję klucza
+        """
+        self.remove(key)
+        cell = self.cell(lat, lon)
+        self.cells.setdefault(cell, {})[key] = (lat, lon)
+        self.items[key] = cell
+
+    def bulkLoad(self, items):
+        """
+        Wstawia wiele punktów (klucz, lat, lon) naraz. Klucze nie mogą
+        występować w indeksie, więc poprzednie pozycje nie są sprawdzane.
+        """
+        cells = self.cells
+        positions = self.items
+        cell_size = self.cell_size
+        floor = math.floor
+        for key, lat, lon in items:
+            cell = (floor(lat / cell_size), floor(lon / cell_size))
+            bucket = cells.get(cell)
+            if bucket is None:
+                bucket = cells[cell] = {}
+            bucket[key] = (lat, lon)
+            positions[key] = cell
+
+    def remove(self, key):
+        cell = self.items.pop(key, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.cells[cell]
+
+    def nearest(self, lat, lon, radius):
+        """
+        Zwraca (odległość w metrach, klucz) najbliższego punktu
+        w promieniu radius metrów lub None.
+
+        Komórki przeglądane są pierścieniami wokół komórki zapytania,
+        więc w gęstych zbiorach wyszukiwanie kończy się zwykle po
+        pierwszym pierścieniu.
+        """
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = d_lat / cos_lat
+        rings = max(
+            math.ceil(d_lat / self.cell_size),
+            math.ceil(d_lon / self.cell_size)
+        )
+        # najmniejszy wymiar komórki w metrach
+        cell_meters = self.cell_size * METERS_PER_DEGREE * cos_lat
+        center_row, center_col = self.cell(lat, lon)
+
+        best = None
+        for ring in range(rings + 1):
+            if best is not None and best[0] <= (ring - 1) * cell_meters:
+                break
+            for row, col in self.ringCells(center_row, center_col, ring):
+                bucket = self.cells.get((row, col))
+                if not bucket:
+                    continue
+                for key, (p_lat, p_lon) in bucket.items():
+                    distance = distanceMeters(lat, lon, p_lat, p_lon)
+                    if distance <= radius and (best is None or distance < best[0]):
+                        best = (distance, key)
+        return best
+
+    @staticmethod
+    def ringCells(center_row, center_col, ring):
+        if ring == 0:
+            yield center_row, center_col
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield center_row - ring, col
+            yield center_row + ring, col
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield row, center_col - ring
+            yield row, center_col + ring
+
+    def clear(self):
+        self.cells.clear()
+        self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
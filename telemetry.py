@@ -0,0 +1,145 @@
+"""
+Pomiary czasu kolejnych etapów wyszukiwania adresu oraz liczniki
+trafień pamięci podręcznej, kodów HTTP i ponowień. Moduł nie zależy
+od QGIS - dane prezentuje panel TelemetryDock.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+import json
+import time
+
+STAGE_TRANSFORM = 'transform'
+STAGE_CACHE = 'cache'
+STAGE_QUEUE = 'queue'
+STAGE_NETWORK = 'network'
+STAGE_DECODE = 'decode'
+STAGE_RENDER = 'render'
+STAGES = (STAGE_TRANSFORM, STAGE_CACHE, STAGE_QUEUE, STAGE_NETWORK,
+          STAGE_DECODE, STAGE_RENDER)
+# jednorazowe pomiary uruchamiania wtyczki
+STAGE_STARTUP = 'startup'
+STAGE_FEED = 'feed'
+
+COUNTER_CACHE_HIT = 'cache_hit'
+COUNTER_CACHE_MISS = 'cache_miss'
+COUNTER_RETRY = 'retry'
+COUNTER_ERROR = 'error'
+COUNTER_TIMEOUT = 'timeout'
+# zapytania zapasowe do kolejnego serwera i odpowiedzi, które je wygrały
+COUNTER_HEDGE = 'hedge'
+COUNTER_HEDGE_WON = 'hedge_won'
+COUNTER_FALLBACK = 'fallback'
+
+# górne granice przedziałów histogramu w milisekundach
+BUCKET_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class Histogram:
+    """
+    Histogram czasów o stałych przedziałach. Pamięć nie rośnie z liczbą
+    pomiarów, a percentyle szacowane są górną granicą przedziału.
+    """
+    __slots__ = ('buckets', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, msec):
+        self.buckets[bisect_left(BUCKET_BOUNDS, msec)] += 1
+        self.count += 1
+        self.total += msec
+        if self.minimum is None or msec < self.minimum:
+            self.minimum = msec
+        if self.maximum is None or msec > self.maximum:
+            self.maximum = msec
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for idx, size in enumerate(self.buckets):
+            seen += size
+            if size and seen >= rank:
+                bound = BUCKET_BOUNDS[idx] if idx < len(BUCKET_BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def toDict(self):
+        labels = [f"<={bound}" for bound in BUCKET_BOUNDS] + [f">{BUCKET_BOUNDS[-1]}"]
+        return {
+            'count': self.count,
+            'mean_ms': self.mean(),
+            'min_ms': self.minimum,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.maximum,
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+class Telemetry:
+    """
+    Zbiera czasy etapów (w sekundach, przechowywane w ms), liczniki
+    zdarzeń i kody odpowiedzi HTTP
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.statuses = {}
+
+    def record(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.add(seconds * 1000.0)
+
+    @contextmanager
+    def measure(self, stage):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(stage, self.clock() - start)
+
+    def increment(self, name, count=1):
+        self.counters[name] = self.counters.get(name, 0) + count
+
+    def recordStatus(self, status):
+        key = str(status) if status else 'none'
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def hitRatio(self):
+        hits = self.counters.get(COUNTER_CACHE_HIT, 0)
+        total = hits + self.counters.get(COUNTER_CACHE_MISS, 0)
+        return hits / total if total else None
+
+    def snapshot(self):
+        ordered = [stage for stage in STAGES if stage in self.stages]
+        ordered += sorted(set(self.stages) - set(STAGES))
+        return {
+            'started': self.started,
+            'stages': {stage: self.stages[stage].toDict() for stage in ordered},
+            'counters': dict(self.counters),
+            'cache_hit_ratio': self.hitRatio(),
+            'http_statuses': dict(self.statuses),
+        }
+
+    def toJson(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def reset(self):
+        self.started = time.time()
+        self.stages.clear()
+        self.counters.clear()
+        self.statuses.clear()
@@ -0,0 +1,111 @@
+from qgis.gui import QgsDockWidget
+from qgis.PyQt.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                                 QTreeWidget, QTreeWidgetItem, QPushButton,
+                                 QLabel, QFileDialog)
+from qgis.PyQt.QtCore import QCoreApplication, QTimer
+
+from .utils import QgsTools
+
+
+class TelemetryDock(QgsDockWidget):
+    """
+    Panel ze statystykami czasu kolejnych etapów wyszukiwania adresu,
+    trafieniami pamięci podręcznej i kodami odpowiedzi serwera.
+    Odświeżany co sekundę, gdy jest widoczny.
+    """
+
+    REFRESH_INTERVAL = 1000
+    COLUMNS = ('count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms')
+
+    def __init__(self, telemetry, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry
+        self.setObjectName('RevealAddressTelemetryDock')
+        self.setWindowTitle(self.tr('Reveal Address statistics'))
+
+        self.stages = QTreeWidget()
+        self.stages.setRootIsDecorated(False)
+        self.stages.setHeaderLabels([
+            self.tr('Stage'), self.tr('Count'), self.tr('Mean [ms]'),
+            self.tr('p50 [ms]'), self.tr('p95 [ms]'), self.tr('Max [ms]')])
+        self.counters = QLabel()
+        self.counters.setWordWrap(True)
+
+        self.reset_button = QPushButton(self.tr('Reset'))
+        self.reset_button.clicked.connect(self.reset)
+        self.export_button = QPushButton(self.tr('Export JSON…'))
+        self.export_button.clicked.connect(self.exportJson)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.reset_button)
+        buttons.addWidget(self.export_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.stages)
+        layout.addWidget(self.counters)
+        layout.addLayout(buttons)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+
+    def tr(self, message):
+        return QCoreApplication.translate('TelemetryDock', message)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    @staticmethod
+    def formatValue(value):
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f"{value:.1f}"
+        return str(value)
+
+    def refresh(self):
+        snapshot = self.telemetry.snapshot()
+        self.stages.clear()
+        for stage, histogram in snapshot['stages'].items():
+            self.stages.addTopLevelItem(QTreeWidgetItem(
+                [stage] + [self.formatValue(histogram[name]) for name in self.COLUMNS]))
+
+        lines = [f"{name}: {count}" for name, count in sorted(snapshot['counters'].items())]
+        ratio = snapshot['cache_hit_ratio']
+        if ratio is not None:
+            lines.append(self.tr('cache hit ratio: {:.0%}').format(ratio))
+        if snapshot['http_statuses']:
+            lines.append('HTTP: ' + ', '.join(
+                f"{status}×{count}"
+                for status, count in sorted(snapshot['http_statuses'].items())))
+        self.counters.setText('\n'.join(lines))
+
+    def reset(self):
+        self.telemetry.reset()
+        self.refresh()
+
+    def exportJson(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr('Export statistics'), 'reveal_address_stats.json',
+            self.tr('JSON (*.json)'))
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as stream:
+                stream.write(self.telemetry.toJson())
+        except OSError as e:
+            QgsTools.pushLogCritical(f"Nie można zapisać statystyk: {e}")
+            return
+        QgsTools.pushLogInfo(f"Zapisano statystyki do {path}")
+
+    def cleanup(self):
+        self.timer.stop()
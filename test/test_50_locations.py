@@ -11,7 +11,6 @@ from qgis.core import (
     QgsProject
 )
 from qgis.gui import QgsMapCanvas
-from qgis.PyQt.QtWidgets import QMessageBox
 from RevealAddressPlugin import RevealAddressMapTool
 from constants import MIN_LAT, MAX_LAT, MIN_LON, MAX_LON
 
@@ -39,7 +38,7 @@ class TestRevealAddressPlugin(unittest.TestCase):
         """
         self.canvas = QgsMapCanvas()
         self.canvas.setDestinationCrs(QgsCoordinateReferenceSystem.fromEpsgId(4326))
-        self.patcher = patch('RevealAddressPlugin.QgsCoordinateTransform')
+        self.patcher = patch('transforms.QgsCoordinateTransform')
         self.MockTransform = self.patcher.start()
         mock_transform_instance = self.MockTransform.return_value
         mock_transform_instance.transform.side_effect = lambda point: point
@@ -59,7 +58,7 @@ class TestRevealAddressPlugin(unittest.TestCase):
         total_tests = 50
         timeout_limit = 15 
 
-        with patch('qgis.PyQt.QtWidgets.QMessageBox.information') as mock_msg_box:
+        with patch.object(self.tool, 'showAddress') as mock_msg_box:
             
             for i in range(total_tests):
                 mock_msg_box.reset_mock()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+
+from ..address_cache import AddressCache
+from ..constants import DEFAULT_CACHE_MAX_ENTRIES
+from ..address_record import AddressRecord
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAddressCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache', 'address_cache.sqlite')
+        self.clock = FakeClock()
+        self.cache = AddressCache(self.path, precision=4, ttl=60,
+                                  max_entries=3, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def testQuantizedKeyHit(self):
+        self.cache.put(52.22971, 21.01221, AddressRecord(display_name='Warszawa'))
+        self.assertEqual(self.cache.get(52.229712, 21.012208),
+                         AddressRecord(display_name='Warszawa'))
+        self.assertIsNone(self.cache.get(52.2298, 21.0122))
+
+    def testExpiredEntryIsDropped(self):
+        self.cache.put(50.0, 20.0, AddressRecord(display_name='Kraków'))
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get(50.0, 20.0))
+        self.assertEqual(len(self.cache), 0)
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        for i in range(3):
+            self.clock.now += 1
+            self.cache.put(50.0 + i, 20.0, AddressRecord(display_name=str(i)))
+        self.clock.now += 1
+        self.cache.get(50.0, 20.0)
+        self.clock.now += 1
+        self.cache.put(53.0, 20.0, AddressRecord(display_name='3'))
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNotNone(self.cache.get(50.0, 20.0))
+        self.assertIsNone(self.cache.get(51.0, 20.0))
+
+    def testNearestCachedAddress(self):
+        self.cache.put(52.22971, 21.01221, AddressRecord(display_name='Warszawa'))
+        self.assertEqual(self.cache.nearest(52.22980, 21.01225, 15),
+                         AddressRecord(display_name='Warszawa'))
+        self.assertIsNone(self.cache.nearest(52.23100, 21.01225, 15))
+
+        self.cache.put(52.23100, 21.01225, AddressRecord(display_name='Śródmieście'))
+        self.assertEqual(self.cache.nearest(52.23102, 21.01225, 15),
+                         AddressRecord(display_name='Śródmieście'))
+
+    def testPutManyKeepsLimit(self):
+        self.cache.putMany(
+            (50.0 + i, 20.0, AddressRecord(display_name=str(i))) for i in range(5))
+        self.assertEqual(len(self.cache), 3)
+        self.cache.putMany([])
+        self.assertEqual(len(self.cache), 3)
+
+    def testPutManyKeepsCreationTime(self):
+        self.cache.putMany([
+            (50.0, 20.0, AddressRecord(display_name='stary'), 900.0),
+            (51.0, 20.0, AddressRecord(display_name='świeży'), 980.0),
+            (52.0, 20.0, AddressRecord(display_name='bez czasu'), None),
+        ])
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(50.0, 20.0))
+        self.clock.now += 45
+        self.assertIsNone(self.cache.get(51.0, 20.0))
+        self.assertEqual(self.cache.get(52.0, 20.0).display_name, 'bez czasu')
+
+    def testPutManyKeepsNewerEntry(self):
+        self.cache.put(50.0, 20.0, AddressRecord(display_name='nowy'))
+        self.cache.putMany([(50.0, 20.0, AddressRecord(display_name='z historii'), 990.0)])
+        self.assertEqual(self.cache.get(50.0, 20.0).display_name, 'nowy')
+        self.assertEqual(len(self.cache), 1)
+
+    def testExportImport(self):
+        self.cache.put(52.22971, 21.01221, AddressRecord(display_name='Warszawa'))
+        self.cache.put(50.06143, 19.93658, AddressRecord(display_name='Kraków'))
+        export_path = os.path.join(self.tmp_dir.name, 'export.sqlite')
+        self.assertEqual(self.cache.export(export_path), 2)
+
+        other = AddressCache(os.path.join(self.tmp_dir.name, 'other.sqlite'),
+                             precision=3, clock=self.clock)
+        try:
+            other.put(50.06143, 19.93658, AddressRecord(display_name='wpis lokalny'))
+            self.clock.now += 1
+            other.put(54.35, 18.65, AddressRecord(display_name='Gdańsk'))
+            self.assertEqual(other.importFile(export_path), 1)
+            self.assertEqual(len(other), 3)
+            self.assertEqual(other.get(52.2297, 21.0122).display_name, 'Warszawa')
+            self.assertEqual(other.nearest(50.0614, 19.9366, 20).display_name, 'wpis lokalny')
+            with self.assertRaises(ValueError):
+                other.importFile(os.path.join(self.tmp_dir.name, 'missing.sqlite'))
+        finally:
+            other.close()
+
+    def testSharedReadOnlyCache(self):
+        self.cache.put(52.22971, 21.01221, AddressRecord(display_name='Warszawa'))
+        shared_path = os.path.join(self.tmp_dir.name, 'shared.sqlite')
+        self.cache.export(shared_path)
+
+        local = AddressCache(os.path.join(self.tmp_dir.name, 'local.sqlite'),
+                             precision=5, clock=self.clock, shared_path=shared_path)
+        try:
+            self.assertEqual(local.get(52.22971, 21.01221).display_name, 'Warszawa')
+            self.assertEqual(local.nearest(52.22980, 21.01225, 15).display_name, 'Warszawa')
+            self.assertEqual(len(local), 0)
+            self.assertEqual(local.shared.precision, 4)
+            local.put(52.22971, 21.01221, AddressRecord(display_name='lokalny'))
+            self.assertEqual(local.get(52.22971, 21.01221).display_name, 'lokalny')
+            self.clock.now += 61
+            local.shared.ttl = 60
+            self.assertIsNone(local.shared.get(52.22971, 21.01221))
+        finally:
+            local.close()
+
+    def testLegacyPayloadIsDecoded(self):
+        record = AddressCache.decodePayload(
+            '{"display_name": "Kraków", "address": {"town": "Kraków"}}')
+        self.assertEqual((record.display_name, record.city), ('Kraków', 'Kraków'))
+
+    def testPayloadStoresFieldNames(self):
+        record = AddressRecord(display_name='Kraków', osm_id=5, bbox=(1.0, 2.0, 3.0, 4.0))
+        payload = AddressCache.encodePayload(record)
+        self.assertEqual(json.loads(payload)['record']['osm_id'], 5)
+        self.assertEqual(AddressCache.decodePayload(payload), record)
+
+    def testListPayloadIsDecoded(self):
+        values = ['Kraków', '1', 'Rynek'] + [None] * 10 + [5, 50.06, 19.94, [1, 2, 3, 4]]
+        record = AddressCache.decodePayload(json.dumps(values))
+        self.assertEqual((record.street, record.osm_id, record.lon), ('Rynek', 5, 19.94))
+        self.assertEqual(record.bbox, (1, 2, 3, 4))
+
+    def testPersistsAcrossInstances(self):
+        self.cache.put(54.35, 18.65, AddressRecord(display_name='Gdańsk'))
+        self.cache.close()
+        self.cache = AddressCache(self.path, clock=self.clock)
+        self.assertEqual(self.cache.get(54.35, 18.65).display_name, 'Gdańsk')
+        self.assertEqual(len(self.cache), 1)
+
+    def testSecondConnectionKeepsLimitAboveDefault(self):
+        self.cache.close()
+        limit = DEFAULT_CACHE_MAX_ENTRIES + 10
+        self.cache = AddressCache(self.path, precision=4, ttl=0,
+                                  max_entries=limit, clock=self.clock)
+        record = AddressRecord(display_name='Warszawa')
+        self.cache.putMany((50 + i / 10000, 20.0, record)
+                           for i in range(DEFAULT_CACHE_MAX_ENTRIES + 5))
+        self.cache.spatialIndex()
+
+        # połączenie zadania w tle z tymi samymi parametrami
+        other = AddressCache(self.path, clock=self.clock, **self.cache.options())
+        try:
+            other.put(54.35, 18.65, AddressRecord(display_name='Gdańsk'))
+            self.assertEqual(len(other), DEFAULT_CACHE_MAX_ENTRIES + 6)
+        finally:
+            other.close()
+
+        self.cache.reload()
+        self.assertEqual(len(self.cache), DEFAULT_CACHE_MAX_ENTRIES + 6)
+        self.assertEqual(self.cache.nearest(54.35, 18.65, 5).display_name, 'Gdańsk')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from ..address_index import AddressIndex, AddressIndexWriter
+from ..index_builder import PrgCsvReader, PrgGmlReader, puwg1992ToWgs84
+from ..spatial_index import distanceMeters
+
+GML = '''<?xml version="1.0" encoding="UTF-8"?>
+<gml:FeatureCollection xmlns:gml="http://www.opengis.net/gml/3.2"
+    xmlns:prg-ad="urn:gugik:specyfikacje:gmlas:panstwowyRejestrGranicAdresy:2.0">
+  <gml:featureMember>
+    <prg-ad:PRG_PunktAdresowy gml:id="PA.1">
+      <prg-ad:jednostkaAdmnistracyjna>Polska</prg-ad:jednostkaAdmnistracyjna>
+      <prg-ad:jednostkaAdmnistracyjna>mazowieckie</prg-ad:jednostkaAdmnistracyjna>
+      <prg-ad:jednostkaAdmnistracyjna>Warszawa</prg-ad:jednostkaAdmnistracyjna>
+      <prg-ad:jednostkaAdmnistracyjna>Warszawa</prg-ad:jednostkaAdmnistracyjna>
+      <prg-ad:miejscowosc>Warszawa</prg-ad:miejscowosc>
+      <prg-ad:ulica>Marszałkowska</prg-ad:ulica>
+      <prg-ad:numerPorzadkowy>1</prg-ad:numerPorzadkowy>
+      <prg-ad:kodPocztowy>00-001</prg-ad:kodPocztowy>
+      <prg-ad:pozycja>
+        <gml:Point srsName="urn:ogc:def:crs:EPSG::2180"><gml:pos>487000 637000</gml:pos></gml:Point>
+      </prg-ad:pozycja>
+    </prg-ad:PRG_PunktAdresowy>
+  </gml:featureMember>
+</gml:FeatureCollection>
+'''
+
+
+class TestAddressIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'adresy.rai')
+        self.index = None
+
+    def tearDown(self):
+        if self.index is not None:
+            self.index.close()
+        self.tmp_dir.cleanup()
+
+    def build(self, points):
+        writer = AddressIndexWriter(self.path)
+        writer.addAll(points)
+        writer.finish()
+        self.index = AddressIndex(self.path)
+        return writer
+
+    def testNearestMatchesBruteForce(self):
+        rng = random.Random(7)
+        points = [(52.2 + rng.random() * 0.05, 21.0 + rng.random() * 0.05,
+                   {'street': f'Ulica {i % 40}', 'house_number': str(i), 'city': 'Warszawa'})
+                  for i in range(3000)]
+        self.build(points)
+        self.assertEqual(len(self.index), 3000)
+        for _ in range(200):
+            lat, lon = 52.2 + rng.random() * 0.05, 21.0 + rng.random() * 0.05
+            expected = min(distanceMeters(lat, lon, p_lat, p_lon) for p_lat, p_lon, _ in points)
+            hit = self.index.nearest(lat, lon, 200)
+            if expected > 200:
+                self.assertIsNone(hit)
+            else:
+                self.assertAlmostEqual(hit[0], expected, delta=0.05)
+
+    def testRecordFields(self):
+        self.build([(52.23, 21.01, {'street': 'Marszałkowska', 'house_number': '10A',
+                                    'postcode': '00-001', 'city': 'Warszawa',
+                                    'teryt_simc': '0918123'})])
+        distance, position = self.index.nearest(52.2301, 21.0101, 50)
+        record = self.index[position]
+        self.assertEqual(record.house_number, '10A')
+        self.assertEqual(record.teryt_simc, '0918123')
+        self.assertIsNone(record.county)
+        self.assertAlmostEqual(record.lat, 52.23)
+        self.assertEqual(record.display_name, 'Marszałkowska 10A, 00-001 Warszawa, Polska')
+
+    def testPointsOutsideBoundsAreSkipped(self):
+        writer = self.build([(48.0, 21.0, {}), (52.0, 30.0, {}), (52.0, 21.0, {})])
+        self.assertEqual((writer.count, writer.skipped), (1, 2))
+        self.assertIsNone(self.index.nearest(52.1, 21.0, 200))
+
+    def testEmptyIndex(self):
+        self.build([])
+        self.assertIsNone(self.index.nearest(52.0, 21.0, 200))
+
+    def testInvalidFile(self):
+        with open(self.path, 'wb') as stream:
+            stream.write(b'not an index' * 10)
+        with self.assertRaises(IOError):
+            AddressIndex(self.path)
+
+
+class TestIndexBuilder(unittest.TestCase):
+
+    def testPuwg1992(self):
+        lat, lon = puwg1992ToWgs84(487000, 637000)
+        self.assertAlmostEqual(lat, 52.23198, places=4)
+        self.assertAlmostEqual(lon, 21.00670, places=4)
+        lat, lon = puwg1992ToWgs84(465000, 500000)
+        self.assertAlmostEqual(lon, 19.0, places=9)
+
+    def testPrgCsv(self):
+        data = 'MIEJSCOWOSC;ULICA;NUMER;KOD_POCZTOWY;X;Y\nWarszawa;Marszałkowska;1;00-001;487000;637000\n'
+        points = list(PrgCsvReader(io.StringIO(data)))
+        self.assertEqual(len(points), 1)
+        lat, lon, fields = points[0]
+        self.assertAlmostEqual(lat, 52.23, places=1)
+        self.assertEqual(fields, {'house_number': '1', 'street': 'Marszałkowska',
+                                  'postcode': '00-001', 'city': 'Warszawa'})
+
+    def testPrgGml(self):
+        points = list(PrgGmlReader(io.BytesIO(GML.encode('utf-8'))))
+        self.assertEqual(len(points), 1)
+        lat, lon, fields = points[0]
+        self.assertAlmostEqual(lon, 21.0, places=1)
+        self.assertEqual(fields['street'], 'Marszałkowska')
+        self.assertEqual(fields['house_number'], '1')
+        self.assertEqual(fields['municipality'], 'Warszawa')
+        self.assertEqual(fields['state'], 'mazowieckie')
+
+
+if __name__ == "__main__":
+    unittest.main()
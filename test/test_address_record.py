@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..address_record import AddressRecord, NO_ADDRESS
+
+REPLY = {
+    'place_id': 123,
+    'osm_type': 'way',
+    'osm_id': 456789,
+    'lat': '52.2297',
+    'lon': '21.0122',
+    'display_name': '1, Marszałkowska, Śródmieście, Warszawa, 00-001, Polska',
+    'address': {
+        'house_number': '1',
+        'road': 'Marszałkowska',
+        'suburb': 'Śródmieście',
+        'city': 'Warszawa',
+        'state': 'województwo mazowieckie',
+        'postcode': '00-001',
+        'country': 'Polska',
+        'country_code': 'pl',
+    },
+    'extratags': {'teryt:simc': '0918123'},
+    'boundingbox': ['52.2296', '52.2298', '21.0121', '21.0123'],
+}
+
+
+class TestAddressRecord(unittest.TestCase):
+
+    def testFromNominatim(self):
+        record = AddressRecord.fromNominatim(REPLY)
+        self.assertEqual(record.street, 'Marszałkowska')
+        self.assertEqual(record.house_number, '1')
+        self.assertEqual(record.city, 'Warszawa')
+        self.assertEqual(record.postcode, '00-001')
+        self.assertEqual(record.teryt_simc, '0918123')
+        self.assertEqual(record.osm_id, 456789)
+        self.assertEqual(record.lat, 52.2297)
+        self.assertEqual(record.bbox, (52.2296, 52.2298, 21.0121, 21.0123))
+
+    def testCityFallsBackToVillage(self):
+        record = AddressRecord.fromNominatim(
+            {'display_name': 'x', 'address': {'village': 'Wólka', 'hamlet': 'Kolonia'}})
+        self.assertEqual(record.city, 'Wólka')
+
+    def testErrorReply(self):
+        record = AddressRecord.fromNominatim({'error': 'Unable to geocode'})
+        self.assertFalse(record.found)
+        self.assertEqual(record.text(), NO_ADDRESS)
+
+    def testValuesRoundTrip(self):
+        record = AddressRecord.fromNominatim(REPLY)
+        self.assertEqual(AddressRecord.fromValues(list(record.values())), record)
+        self.assertEqual(len(record.attributes()), len(AddressRecord.ATTRIBUTE_FIELDS))
+
+    def testDictRoundTrip(self):
+        record = AddressRecord.fromNominatim(REPLY)
+        fields = record.toDict()
+        self.assertNotIn('municipality', fields)
+        self.assertEqual(AddressRecord.fromDict(fields), record)
+        self.assertEqual(AddressRecord.fromDict(dict(fields, removed='x')), record)
+
+    def testAttributeFieldsByType(self):
+        self.assertEqual(set(AddressRecord.ATTRIBUTE_FIELDS),
+                         set(AddressRecord.__slots__) - {'bbox'})
+        self.assertEqual(AddressRecord.INTEGER_FIELDS, ('osm_id',))
+        self.assertNotIn('lat', AddressRecord.STRING_FIELDS)
+
+    def testSlotsOnly(self):
+        with self.assertRaises(AttributeError):
+            AddressRecord().extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
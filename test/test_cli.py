@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from ..address_record import AddressRecord
+from ..cli import (BulkGeocoder, Checkpoint, CsvReader, CsvWriter,
+                   GeoJsonLinesReader, GeoJsonLinesWriter, OUTPUT_FIELDS, main)
+
+
+class FakeClient:
+    def __init__(self, fail_at=None):
+        self.calls = 0
+        self.fail_at = fail_at
+
+    def reverse(self, lat, lon):
+        self.calls += 1
+        if self.fail_at is not None and self.calls >= self.fail_at:
+            raise KeyboardInterrupt
+        return AddressRecord(display_name=f'{lat:.1f} {lon:.1f}', city='Testowo')
+
+
+class TestBulkGeocoder(unittest.TestCase):
+
+    def testCsvKeepsInputOrder(self):
+        rows = 'id,lat,lon\n' + ''.join(f'{i},{50 + i / 10},{20}\n' for i in range(25))
+        reader = CsvReader(io.StringIO(rows))
+        output = io.StringIO()
+        writer = CsvWriter(output, reader.fieldnames)
+
+        written = BulkGeocoder(FakeClient(), concurrency=3).run(reader, writer)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(written, 25)
+        self.assertTrue(lines[0].startswith('id,lat,lon,display_name'))
+        self.assertEqual([line.split(',')[0] for line in lines[1:]],
+                         [str(i) for i in range(25)])
+        self.assertIn('50.2 20.0', lines[3])
+
+    def testInvalidCoordinatesAreWrittenEmpty(self):
+        reader = CsvReader(io.StringIO('lat,lon\nx,20\n'))
+        output = io.StringIO()
+        client = FakeClient()
+        BulkGeocoder(client).run(reader, CsvWriter(output, reader.fieldnames))
+        self.assertEqual(client.calls, 0)
+        self.assertEqual(output.getvalue().splitlines()[1],
+                         'x,20' + ',' * len(OUTPUT_FIELDS))
+
+    def testGeoJsonLines(self):
+        feature = {'type': 'Feature', 'properties': {'id': 1},
+                   'geometry': {'type': 'Point', 'coordinates': [21.0, 52.2]}}
+        output = io.StringIO()
+        BulkGeocoder(FakeClient()).run(
+            GeoJsonLinesReader(io.StringIO(json.dumps(feature) + '\n')),
+            GeoJsonLinesWriter(output))
+        properties = json.loads(output.getvalue())['properties']
+        self.assertEqual(properties['id'], 1)
+        self.assertEqual(properties['display_name'], '52.2 21.0')
+        self.assertEqual(properties['city'], 'Testowo')
+
+    def testMalformedGeoJsonLineIsSkipped(self):
+        feature = {'type': 'Feature', 'properties': {'id': 1},
+                   'geometry': {'type': 'Point', 'coordinates': [21.0, 52.2]}}
+        messages = []
+        output = io.StringIO()
+        geocoder = BulkGeocoder(FakeClient())
+        written = geocoder.run(
+            GeoJsonLinesReader(io.StringIO('{"type": \n[1, 2]\n' + json.dumps(feature) + '\n'),
+                               messages.append),
+            GeoJsonLinesWriter(output))
+        self.assertEqual(written, 3)
+        self.assertEqual(geocoder.failed, 2)
+        self.assertEqual([message.split(':')[0] for message in messages],
+                         ['Wiersz 1', 'Wiersz 2'])
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['properties']['id'], 1)
+
+
+class TestResume(unittest.TestCase):
+
+    def testResumeFromCheckpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, 'points.csv')
+            output_path = os.path.join(tmp_dir, 'out.csv')
+            checkpoint_path = os.path.join(tmp_dir, 'out.ckpt')
+            with open(input_path, 'w', encoding='utf-8') as input_file:
+                input_file.write('id,lat,lon\n')
+                for i in range(250):
+                    input_file.write(f'{i},{50 + i / 1000},20\n')
+            argv = [input_path, '-o', output_path, '--checkpoint', checkpoint_path,
+                    '--concurrency', '1']
+
+            with self.assertRaises(KeyboardInterrupt):
+                main(argv, client=FakeClient(fail_at=150))
+            self.assertEqual(Checkpoint(checkpoint_path).load()[0], 100)
+
+            main(argv, client=FakeClient())
+            self.assertFalse(os.path.exists(checkpoint_path))
+            with open(output_path, 'r', encoding='utf-8') as output_file:
+                ids = [line.split(',')[0] for line in output_file.read().splitlines()]
+            self.assertEqual(ids, ['id'] + [str(i) for i in range(250)])
+
+
+if __name__ == "__main__":
+    unittest.main()
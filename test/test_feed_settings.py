@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..feed_settings import (feedKeys, qgisFeedKey, registerFeedEntries,
+                             removeDismissedEntries)
+
+FEED = 'httpsqgisfeedenvirosolutionspl?industryEpluginrevealaddress'
+
+
+class MemorySettings:
+    """
+    Ustawienia w słowniku z interfejsem QSettings używanym przez moduł
+    """
+
+    def __init__(self, values):
+        self.values = dict(values)
+        self.group = ''
+        self.synced = 0
+
+    def beginGroup(self, group):
+        self.group = group + '/'
+
+    def endGroup(self):
+        self.group = ''
+
+    def allKeys(self):
+        return [key[len(self.group):] for key in self.values if key.startswith(self.group)]
+
+    def value(self, key):
+        return self.values.get(self.group + key)
+
+    def setValue(self, key, value):
+        self.values[self.group + key] = value
+
+    def contains(self, key):
+        return self.group + key in self.values
+
+    def remove(self, key):
+        self.values.pop(self.group + key, None)
+
+    def sync(self):
+        self.synced += 1
+
+
+class TestFeedSettings(unittest.TestCase):
+
+    def testQgisFeedKey(self):
+        self.assertEqual(qgisFeedKey(f'app/news-feed/items/{FEED}/entries/items/12/title', FEED),
+                         'app/news-feed/items/httpsfeedqgisorg/entries/items/999912/title')
+
+    def testOnlyFeedGroupsAreScanned(self):
+        settings = MemorySettings({'plugins/x': 1, f'core/NewsFeed/{FEED}/a': 2})
+        self.assertEqual(feedKeys(settings), [f'core/NewsFeed/{FEED}/a'])
+
+    def testRegisterFeedEntries(self):
+        settings = MemorySettings({
+            f'app/news-feed/items/{FEED}/entries/items/3/title': 'Nowość',
+            f'app/news-feed/items/{FEED}/last-fetch-time': 5,
+            'app/news-feed/items/other/image-cache/1': 'x',
+            'plugins/cache/1': 'y',
+        })
+        self.assertEqual(registerFeedEntries(settings, FEED), 2)
+        values = settings.values
+        self.assertEqual(values['app/news-feed/items/httpsfeedqgisorg/entries/items/99993/title'],
+                         'Nowość')
+        self.assertEqual(values[f'app/news-feed/items/{FEED}/last-fetch-time'], 0)
+        self.assertNotIn('app/news-feed/items/other/image-cache/1', values)
+        self.assertIn('plugins/cache/1', values)
+        self.assertEqual(settings.synced, 1)
+        self.assertEqual(settings.group, '')
+
+    def testCacheKeptBeforeFirstFetch(self):
+        settings = MemorySettings({'app/news-feed/items/other/image-cache/1': 'x'})
+        registerFeedEntries(settings, FEED)
+        self.assertIn('app/news-feed/items/other/image-cache/1', settings.values)
+
+    def testRemoveDismissedEntries(self):
+        settings = MemorySettings({
+            f'core/NewsFeed/{FEED}/entries/1/title': 'a',
+            f'core/NewsFeed/{FEED}/entries/2/title': 'b',
+            'core/NewsFeed/httpsfeedqgisorg/entries/99991/title': 'a',
+        })
+        self.assertEqual(removeDismissedEntries(settings, FEED), 1)
+        self.assertNotIn(f'core/NewsFeed/{FEED}/entries/1/title', settings.values)
+        self.assertIn(f'core/NewsFeed/{FEED}/entries/2/title', settings.values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import gzip
+import json
+import threading
+import unittest
+
+from ..nominatim_client import NominatimClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        server.requests.append((self.path, dict(self.headers)))
+        if server.busy:
+            server.busy -= 1
+            self.send_response(429)
+            self.send_header('Retry-After', server.retry_after)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        body = json.dumps({
+            'display_name': f"{params['lat']} {params['lon']}",
+            'address': {'city': 'Testowo'},
+        }).encode('utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestNominatimClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.connections = set()
+        self.server.requests = []
+        self.server.busy = 0
+        self.server.retry_after = '0'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = NominatimClient(
+            f'http://127.0.0.1:{self.server.server_port}', rate=0,
+            accept_language='pl', zoom=16)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testKeepAliveAndGzip(self):
+        for i in range(3):
+            record = self.client.reverse(50.0 + i, 20.0)
+            self.assertEqual(record.city, 'Testowo')
+        self.assertEqual(len(self.server.connections), 1)
+        path, headers = self.server.requests[0]
+        self.assertIn('zoom=16', path)
+        self.assertEqual(headers['Accept-Language'], 'pl')
+
+    def testRetriesTooManyRequests(self):
+        self.server.busy = 1
+        self.assertEqual(self.client.reverse(50.0, 20.0).display_name, '50.0 20.0')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def testTooManyRequestsPausesOtherThreads(self):
+        self.server.busy = 1
+        self.server.retry_after = '1'
+        self.client.reverse(50.0, 20.0)
+        self.assertEqual(len(self.server.requests), 2)
+
+        self.client.limit.pause(0.3)
+        thread = threading.Thread(target=self.client.acquire)
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+
+if __name__ == "__main__":
+    unittest.main()
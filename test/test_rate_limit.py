@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..rate_limit import (TokenBucket, RateLimiter, retryAfterSeconds, backoffDelay,
+                          MAX_BACKOFF)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def testRateIsEnforced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, burst=2, clock=clock)
+        self.assertTrue(bucket.consume())
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+        self.assertAlmostEqual(bucket.delay(), 1.0)
+
+        clock.now += 0.5
+        self.assertAlmostEqual(bucket.delay(), 0.5)
+        clock.now += 0.5
+        self.assertTrue(bucket.consume())
+
+    def testBurstIsCapped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10.0, burst=3, clock=clock)
+        clock.now += 100
+        consumed = sum(bucket.consume() for _ in range(10))
+        self.assertEqual(consumed, 3)
+
+    def testZeroRateIsUnlimited(self):
+        bucket = TokenBucket(rate=0, clock=FakeClock())
+        self.assertTrue(all(bucket.consume() for _ in range(100)))
+        self.assertEqual(bucket.delay(), 0)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def testPauseBlocksRequests(self):
+        clock = FakeClock()
+        limit = RateLimiter(rate=0, clock=clock)
+        self.assertEqual(limit.pause(5), 5)
+        self.assertFalse(limit.tryAcquire())
+        self.assertEqual(limit.delay(), 5)
+        clock.now += 5
+        self.assertTrue(limit.tryAcquire())
+
+    def testPauseIsCapped(self):
+        clock = FakeClock()
+        limit = RateLimiter(rate=1.0, clock=clock)
+        self.assertEqual(limit.pause(86400), MAX_BACKOFF)
+
+    def testShorterPauseDoesNotShorten(self):
+        clock = FakeClock()
+        limit = RateLimiter(rate=1.0, clock=clock)
+        limit.pause(10)
+        self.assertEqual(limit.pause(1), 10)
+
+    def testSetRate(self):
+        clock = FakeClock()
+        limit = RateLimiter(rate=1.0, clock=clock)
+        self.assertTrue(limit.tryAcquire())
+        self.assertFalse(limit.tryAcquire())
+        limit.setRate(0)
+        self.assertTrue(limit.tryAcquire())
+
+
+class TestRetryAfter(unittest.TestCase):
+
+    def testSeconds(self):
+        self.assertEqual(retryAfterSeconds('120'), 120)
+
+    def testHttpDate(self):
+        self.assertEqual(
+            retryAfterSeconds('Wed, 21 Oct 2015 07:28:30 GMT', now=1445412500), 10)
+
+    def testInvalid(self):
+        self.assertIsNone(retryAfterSeconds('soon'))
+        self.assertIsNone(retryAfterSeconds(''))
+
+    def testBackoff(self):
+        self.assertEqual([backoffDelay(n) for n in (1, 2, 3)], [1, 2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from ..regions import Region, regionsFromGeoJson, loadRegions, findRegion
+
+
+def pointInRing(lat, lon, ring):
+    inside = False
+    for (lat1, lon1), (lat2, lon2) in zip(ring, ring[1:] + ring[:1]):
+        if (lat1 <= lat) != (lat2 <= lat):
+            if lon < lon1 + (lat - lat1) / (lat2 - lat1) * (lon2 - lon1):
+                inside = not inside
+    return inside
+
+
+def starRing(points=400):
+    # nieregularny, niewypukły pierścień wokół (52, 19)
+    rng = random.Random(3)
+    ring = []
+    for i in range(points):
+        angle = 6.283185307 * i / points
+        radius = 1.0 + 0.6 * rng.random()
+        ring.append((52 + radius * math.sin(angle),
+                     19 + 1.6 * radius * math.cos(angle)))
+    return ring
+
+
+class TestRegion(unittest.TestCase):
+
+    def testBounds(self):
+        region = Region.fromBounds('box', 49.0, 55.0, 14.0, 24.0)
+        self.assertTrue(region.contains(52.0, 21.0))
+        self.assertFalse(region.contains(48.9, 21.0))
+        self.assertFalse(region.contains(52.0, 24.5))
+
+    def testMatchesFullRayCasting(self):
+        ring = starRing()
+        region = Region('star', [ring], resolution=32)
+        rng = random.Random(5)
+        for _ in range(5000):
+            lat, lon = rng.uniform(50, 54), rng.uniform(15.5, 22.5)
+            self.assertEqual(region.contains(lat, lon), pointInRing(lat, lon, ring), (lat, lon))
+
+    def testHole(self):
+        outer = [(50, 15), (50, 20), (55, 20), (55, 15)]
+        hole = [(51, 16), (51, 19), (54, 19), (54, 16)]
+        region = Region('ring', [outer, hole], resolution=8)
+        self.assertTrue(region.contains(50.5, 17))
+        self.assertFalse(region.contains(52.5, 17.5))
+
+    def testGeoJson(self):
+        data = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'name': 'west'},
+             'geometry': {'type': 'Polygon', 'coordinates': [
+                 [[14, 49], [19, 49], [19, 55], [14, 55], [14, 49]]]}},
+            {'type': 'Feature', 'properties': {},
+             'geometry': {'type': 'MultiPolygon', 'coordinates': [
+                 [[[19, 49], [24, 49], [24, 52], [19, 52], [19, 49]]]]}},
+            {'type': 'Feature', 'properties': {},
+             'geometry': {'type': 'Point', 'coordinates': [20, 50]}},
+        ]}
+        regions = regionsFromGeoJson(data)
+        self.assertEqual([region.name for region in regions], ['west', 'region 2'])
+        self.assertEqual(findRegion(regions, 52.0, 16.0).name, 'west')
+        self.assertEqual(findRegion(regions, 50.0, 21.0).name, 'region 2')
+        self.assertIsNone(findRegion(regions, 54.0, 21.0))
+
+        fd, path = tempfile.mkstemp(suffix='.geojson')
+        os.close(fd)
+        try:
+            with open(path, 'w', encoding='utf-8') as stream:
+                json.dump(data, stream)
+            self.assertEqual(len(loadRegions(path)), 2)
+            with open(path, 'w', encoding='utf-8') as stream:
+                stream.write('{"type": "FeatureCollection", "features": []}')
+            with self.assertRaises(ValueError):
+                loadRegions(path)
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..sampling import samplePolyline
+from ..spatial_index import METERS_PER_DEGREE
+
+
+class TestSamplePolyline(unittest.TestCase):
+
+    def testSpacingAlongMeridian(self):
+        end = 100 / METERS_PER_DEGREE
+        samples = samplePolyline([(52.0, 21.0), (52.0 + end, 21.0)], 30)
+        self.assertEqual([round(chainage) for _, _, chainage in samples], [0, 30, 60, 90, 100])
+        self.assertAlmostEqual(samples[-1][0], 52.0 + end)
+
+    def testContinuesAcrossVertices(self):
+        step = 20 / METERS_PER_DEGREE
+        samples = samplePolyline([(52.0, 21.0), (52.0 + step, 21.0), (52.0 + 2 * step, 21.0)], 15)
+        self.assertEqual([round(chainage) for _, _, chainage in samples], [0, 15, 30, 40])
+
+    def testPolygonIsClosed(self):
+        step = 100 / METERS_PER_DEGREE
+        square = [(52.0, 21.0), (52.0 + step, 21.0), (52.0 + step, 21.0 + step * 1.6),
+                  (52.0, 21.0 + step * 1.6)]
+        samples = samplePolyline(square, 50, closed=True)
+        self.assertAlmostEqual(samples[-1][2], 350, delta=2)
+        self.assertEqual(len(samples), 8)
+
+    def testLimitAndErrors(self):
+        end = 1000 / METERS_PER_DEGREE
+        self.assertEqual(len(samplePolyline([(52.0, 21.0), (52.0 + end, 21.0)], 10, max_samples=5)), 5)
+        self.assertEqual(samplePolyline([], 10), [])
+        with self.assertRaises(ValueError):
+            samplePolyline([(52.0, 21.0)], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
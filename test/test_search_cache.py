@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..search_cache import SearchCache, normalizeQuery
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SearchCache(max_entries=2)
+
+    def testNormalizeQuery(self):
+        self.assertEqual(normalizeQuery('  Łódź   Piotrkowska '), 'łodz piotrkowska')
+
+    def testExactHit(self):
+        self.cache.put('Kraków', [{'display_name': 'Kraków, Polska'}])
+        self.assertEqual(self.cache.get('krakow'), [{'display_name': 'Kraków, Polska'}])
+
+    def testEmptyPrefixRequiresRequest(self):
+        self.cache.put('Warsz', [])
+        self.assertIsNone(self.cache.get('Warszawa'))
+
+    def testLongerQueryRequiresRequest(self):
+        self.cache.put('Długa 1', [{'display_name': 'Długa 1, Warszawa'}])
+        self.assertIsNone(self.cache.get('Długa 12'))
+        self.assertIsNone(self.cache.get('Długa 1 Warszawa'))
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        self.cache.put('a1', [{'display_name': 'x'}] * 3)
+        self.cache.put('b1', [{'display_name': 'y'}] * 3)
+        self.cache.get('a1')
+        self.cache.put('c1', [{'display_name': 'z'}] * 3)
+        self.assertIsNotNone(self.cache.get('a1'))
+        self.assertIsNone(self.cache.get('b1'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from ..spatial_index import GridIndex, distanceMeters
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = GridIndex(cell_size=0.001)
+        self.index.insert('a', 52.2297, 21.0122)
+        self.index.insert('b', 52.2300, 21.0122)
+
+    def testDistanceMeters(self):
+        self.assertAlmostEqual(distanceMeters(52.0, 21.0, 52.001, 21.0), 111.2, delta=0.5)
+
+    def testNearestWithinRadius(self):
+        distance, key = self.index.nearest(52.22975, 21.0122, 50)
+        self.assertEqual(key, 'a')
+        self.assertLess(distance, 10)
+
+    def testNearestAcrossCellBorder(self):
+        self.assertEqual(self.index.nearest(52.2301, 21.0122, 20)[1], 'b')
+
+    def testOutsideRadius(self):
+        self.assertIsNone(self.index.nearest(52.2350, 21.0122, 50))
+
+    def testReinsertMovesPoint(self):
+        self.index.insert('a', 50.0, 20.0)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.nearest(50.0, 20.0, 1)[1], 'a')
+        self.index.remove('a')
+        self.assertIsNone(self.index.nearest(50.0, 20.0, 1))
+
+
+    def testBulkLoad(self):
+        self.index.bulkLoad([('c', 50.0, 20.0), ('d', 50.0005, 20.0)])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.nearest(50.0004, 20.0, 20)[1], 'd')
+        self.index.remove('c')
+        self.assertIsNone(self.index.nearest(50.0, 20.0, 5))
+
+if __name__ == "__main__":
+    unittest.main()
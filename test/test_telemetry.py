@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+
+from ..telemetry import (Histogram, Telemetry, STAGE_NETWORK, STAGE_DECODE,
+                         COUNTER_CACHE_HIT, COUNTER_CACHE_MISS)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHistogram(unittest.TestCase):
+
+    def testStatistics(self):
+        histogram = Histogram()
+        for msec in (1, 3, 8, 40, 400):
+            histogram.add(msec)
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.mean(), 90.4)
+        self.assertEqual(histogram.percentile(0.5), 10)
+        self.assertEqual(histogram.percentile(0.95), 400)
+        self.assertEqual(histogram.toDict()['buckets']['<=50'], 1)
+
+    def testEmpty(self):
+        self.assertIsNone(Histogram().percentile(0.5))
+        self.assertIsNone(Histogram().mean())
+
+    def testOverflowBucketUsesMaximum(self):
+        histogram = Histogram()
+        histogram.add(25000)
+        self.assertEqual(histogram.percentile(0.5), 25000)
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def testMeasure(self):
+        clock = FakeClock()
+        telemetry = Telemetry(clock=clock)
+        with telemetry.measure(STAGE_DECODE):
+            clock.now += 0.004
+        self.assertAlmostEqual(telemetry.stages[STAGE_DECODE].maximum, 4.0)
+
+    def testSnapshotIsJsonSerializable(self):
+        telemetry = Telemetry()
+        telemetry.record(STAGE_NETWORK, 0.25)
+        telemetry.increment(COUNTER_CACHE_HIT)
+        telemetry.increment(COUNTER_CACHE_MISS, 3)
+        telemetry.recordStatus(200)
+        telemetry.recordStatus(None)
+        data = json.loads(telemetry.toJson())
+        self.assertEqual(data['stages'][STAGE_NETWORK]['count'], 1)
+        self.assertEqual(data['cache_hit_ratio'], 0.25)
+        self.assertEqual(data['http_statuses'], {'200': 1, 'none': 1})
+
+    def testReset(self):
+        telemetry = Telemetry()
+        telemetry.record(STAGE_NETWORK, 0.1)
+        telemetry.reset()
+        self.assertEqual(telemetry.snapshot()['stages'], {})
+        self.assertIsNone(telemetry.hitRatio())
+
+
+if __name__ == "__main__":
+    unittest.main()
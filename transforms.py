@@ -0,0 +1,64 @@
+"""
+Wspólne obiekty transformacji współrzędnych.
+
+Utworzenie QgsCoordinateTransform wymaga przygotowania potoku PROJ, więc
+transformacje przechowywane są dla par (układ źródłowy, układ docelowy)
+i odtwarzane dopiero po zmianie kontekstu transformacji.
+"""
+from qgis.core import (QgsCoordinateTransform, QgsCoordinateReferenceSystem,
+                       QgsGeometry, QgsProject)
+
+from .constants import EPSG
+
+
+class TransformCache:
+
+    def __init__(self, transform_context=None):
+        self.transform_context = transform_context
+        self.transforms = {}
+
+    @staticmethod
+    def crsKey(crs):
+        return crs.authid() or crs.toWkt()
+
+    def transform(self, source_crs, destination_crs=None):
+        """
+        Zwraca transformację do destination_crs (domyślnie EPSG:4326)
+        """
+        if destination_crs is None:
+            destination_crs = QgsCoordinateReferenceSystem.fromEpsgId(EPSG)
+        key = (self.crsKey(source_crs), self.crsKey(destination_crs))
+        coord_transform = self.transforms.get(key)
+        if coord_transform is None:
+            coord_transform = QgsCoordinateTransform(
+                source_crs,
+                destination_crs,
+                self.transform_context or QgsProject.instance().transformContext()
+            )
+            self.transforms[key] = coord_transform
+        return coord_transform
+
+    def setTransformContext(self, transform_context):
+        """
+        Ustawia kontekst transformacji; zapamiętane transformacje
+        odrzucane są tylko wtedy, gdy kontekst się zmienił
+        """
+        if transform_context != self.transform_context:
+            self.clear(transform_context)
+
+    def clear(self, transform_context=None):
+        if transform_context is not None:
+            self.transform_context = transform_context
+        self.transforms.clear()
+
+
+def transformPoints(coord_transform, points):
+    """
+    Transformuje listę QgsPointXY jednym wywołaniem (jako geometrię
+    wielopunktową), zamiast tworzyć wywołanie dla każdego punktu
+    """
+    if not points:
+        return []
+    geometry = QgsGeometry.fromMultiPointXY(points)
+    geometry.transform(coord_transform)
+    return geometry.asMultiPoint()